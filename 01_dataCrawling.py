@@ -2,17 +2,50 @@ import requests
 import xml.etree.ElementTree as ET
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import io
+import math
+import threading
 import time
 import os
 
+from rate_limiter import RateLimiter
+from crawl_manifest import CrawlManifest
+from crawl_metrics import CrawlMetrics
+from price_index import PriceIndex
+from schema import memory_usage_mb, report_memory
+from storage import clean_trade_columns, save_dataset
+
+# API 응답 <item>에서 추출하는 필드 (CSV 컬럼 순서와 동일)
+TRADE_FIELDS = ('거래금액', '전용면적', '건축년도', '층', '아파트', '법정동', '지번', '년', '월', '일', '도로명',
+                '도로명건물본번호코드', '도로명건물부번호코드', '법정동본번코드', '법정동부번코드',
+                '법정동시군구코드', '법정동읍면동코드', '법정동지번코드')
+TRADE_FIELD_INDEX = {field: index for index, field in enumerate(TRADE_FIELDS)}
+# 이후 달의 수집을 중단하는 결과 코드 (22 : 일일 트래픽 초과, 10/30 : 잘못된 요청 파라미터/서비스 키, 99 : 기타 에러)
+STOP_CODES = ("10", "30", "22", "99")
+
 class AptTradeDataCollector:
-    def __init__(self, url, service_key, start_date, end_date, area_codes, sleep_time=0.1):
+    # max_workers가 1보다 크면 여러 달을 동시에 요청 (requests_per_second, daily_limit으로 API 트래픽 제한)
+    # manifest를 넘기면 이전에 정상 수집한 달은 건너뛰고, 최근 recent_months개월만 다시 수집
+    # 요청마다 지역/년월/페이지, 상태 코드, 결과 코드, 바이트 수, 지연 시간, 행 수를 실행 폴더의 {timestamp}_requests.jsonl에 기록
+    def __init__(self, url, service_key, start_date, end_date, area_codes, sleep_time=0.1,
+                 max_workers=1, requests_per_second=10, daily_limit=None, num_of_rows=1000,
+                 manifest=None, recent_months=3):
         self.url = url
         self.service_key = service_key
         self.start_date = start_date
         self.end_date = end_date
         self.area_codes = area_codes
         self.sleep_time = sleep_time
+        self.max_workers = max_workers
+        self.num_of_rows = num_of_rows
+        self.manifest = manifest
+        self.recent_months = recent_months
+        self.rate_limiter = RateLimiter(requests_per_second, capacity=max_workers, daily_limit=daily_limit)
+        # 중단 대상 결과 코드를 받으면 설정 -> 대기 중인 요청은 API를 호출하지 않고 건너뜀
+        self.stop_event = threading.Event()
+        self.stop_result = None
+        self.metrics = None
         self.base_folder = 'DATA/org_crawling_data/area'
         self.initialize_directories()
 
@@ -23,103 +56,263 @@ class AptTradeDataCollector:
         else:
             print(f"폴더가 이미 존재합니다: {self.base_folder}")
 
-    def fetch_data(self, area_code, year_month):
+    def fetch_data(self, area_code, year_month, page_no=1):
         params = {
             'serviceKey': self.service_key,
-            'pageNo': '07_dataResult',
-            'numOfRows': '1000',
+            'pageNo': str(page_no),
+            'numOfRows': str(self.num_of_rows),
             'LAWD_CD': area_code,
             'DEAL_YMD': year_month
         }
         response = requests.get(self.url, params=params)
         return response
 
-    def parse_response(self, response):
+    @staticmethod
+    def parse_response_stream(content, area_name, rows=None, columns=None):
+        # 응답 바이트를 iterparse로 한 번만 훑으면서 <item>의 자식 노드를 한 번씩만 방문
+        # rows(list)에는 행 dict를, columns(dict of list)에는 컬럼별 값을 바로 추가
+        # 반환값 : (결과 코드, 결과 메시지, 파싱한 item 수, 전체 건수)
+        result_code, result_msg, total_count = '', None, None
+        item_count = 0
+        parsed_rows = []
+        column_lists = [columns.setdefault(field, []) for field in TRADE_FIELDS] if columns is not None else None
+        area_list = columns.setdefault('지역', []) if columns is not None else None
+        column_start = len(area_list) if columns is not None else 0
         try:
-            xml_content = response.content.decode('utf-8')
-            root = ET.fromstring(xml_content)
-            result_code = root.find('.//resultCode').text if root.find('.//resultCode') is not None else ''
-            result_msg = root.find('.//resultMsg').text
-            items = root.findall('.//item')
-            return result_code, result_msg, items
+            for _, elem in ET.iterparse(io.BytesIO(content), events=('end',)):
+                tag = elem.tag
+                if tag == 'item':
+                    row = [''] * len(TRADE_FIELDS)
+                    for child in elem:
+                        index = TRADE_FIELD_INDEX.get(child.tag)
+                        if index is not None and child.text is not None:
+                            row[index] = child.text.strip()
+                    elem.clear()
+                    item_count += 1
+                    if rows is not None:
+                        row_dict = dict(zip(TRADE_FIELDS, row))
+                        row_dict['지역'] = area_name  # 지역 컬럼 추가
+                        parsed_rows.append(row_dict)
+                    if column_lists is not None:
+                        for column_list, value in zip(column_lists, row):
+                            column_list.append(value)
+                        area_list.append(area_name)
+                elif tag == 'resultCode':
+                    result_code = elem.text or ''
+                elif tag == 'resultMsg':
+                    result_msg = elem.text
+                elif tag == 'totalCount' and elem.text:
+                    total_count = int(elem.text)
         except ET.ParseError as e:
-            return None, f"데이터 파싱 에러: {e}", None
-
-    def extract_data_from_items(self, items, area_name):
+            # 파싱 도중 실패하면 이미 추가한 컬럼 값을 되돌림
+            if columns is not None:
+                for column in list(TRADE_FIELDS) + ['지역']:
+                    del columns[column][column_start:]
+            return None, f"데이터 파싱 에러: {e}", 0, 0
+
+        if rows is not None:
+            rows.extend(parsed_rows)
+        return result_code, result_msg, item_count, total_count if total_count is not None else item_count
+
+    def fetch_page(self, area_code, area_name, year_month, page_no=1):
+        # 한 페이지 요청 / 파싱 / 추출을 한 번에 처리 (동시 수집 시 작업 단위)
+        # 반환값 : (상태 코드, 결과 코드, 결과 메시지, 행 목록, 전체 건수, 계측용 요청 정보(요청하지 않았으면 None))
+        # 다른 요청이 중단 대상 결과 코드를 받은 뒤라면 요청하지 않음 (상태 코드 None)
+        if self.stop_event.is_set():
+            return None, None, "중단 에러 이후 요청하지 않음", [], 0, None
+        if not self.rate_limiter.acquire():
+            return self.stop(200, "22", "LIMITED NUMBER OF SERVICE REQUESTS EXCEEDS ERROR.") + (None,)
+        started_at = time.perf_counter()
+        response = self.fetch_data(area_code, year_month, page_no)
+        request = {'latency': time.perf_counter() - started_at, 'status': response.status_code, 'result_code': None,
+                   'size': len(response.content), '년월': year_month, '페이지': page_no}
+        if response.status_code != 200:
+            return response.status_code, None, None, [], 0, request
         rows = []
-        for item in items:
-            row = {
-                '거래금액': item.find('.//거래금액').text.strip() if item.find('.//거래금액') is not None else '',
-                '전용면적': item.find('.//전용면적').text.strip() if item.find('.//전용면적') is not None else '',
-                '건축년도': item.find('.//건축년도').text.strip() if item.find('.//건축년도') is not None else '',
-                '층': item.find('.//층').text.strip() if item.find('.//층') is not None else '',
-                '아파트': item.find('.//아파트').text.strip() if item.find('.//아파트') is not None else '',
-                '법정동': item.find('.//법정동').text.strip() if item.find('.//법정동') is not None else '',
-                '지번': item.find('.//지번').text.strip() if item.find('.//지번') is not None else '',
-                '년': item.find('.//년').text.strip() if item.find('.//년') is not None else '',
-                '월': item.find('.//월').text.strip() if item.find('.//월') is not None else '',
-                '일': item.find('.//일').text.strip() if item.find('.//일') is not None else '',
-                '도로명': item.find('.//도로명').text.strip() if item.find('.//도로명') is not None else '',
-                '도로명건물본번호코드': item.find('.//도로명건물본번호코드').text.strip() if item.find('.//도로명건물본번호코드') is not None else '',
-                '도로명건물부번호코드': item.find('.//도로명건물부번호코드').text.strip() if item.find('.//도로명건물부번호코드') is not None else '',
-                '법정동본번코드': item.find('.//법정동본번코드').text.strip() if item.find('.//법정동본번코드') is not None else '',
-                '법정동부번코드': item.find('.//법정동부번코드').text.strip() if item.find('.//법정동부번코드') is not None else '',
-                '법정동시군구코드': item.find('.//법정동시군구코드').text.strip() if item.find('.//법정동시군구코드') is not None else '',
-                '법정동읍면동코드': item.find('.//법정동읍면동코드').text.strip() if item.find('.//법정동읍면동코드') is not None else '',
-                '법정동지번코드': item.find('.//법정동지번코드').text.strip() if item.find('.//법정동지번코드') is not None else '',
-                '지역': area_name  # 지역 컬럼 추가
-            }
-            rows.append(row)
-        return rows
+        result_code, result_msg, _, total_count = self.parse_response_stream(response.content, area_name, rows=rows)
+        request['result_code'] = result_code
+        if result_code in STOP_CODES:
+            self.stop(response.status_code, result_code, result_msg)
+        if result_code != "00":
+            rows = []
+        return response.status_code, result_code, result_msg, rows, total_count, request
+
+    def record_pages(self, area_name, pages, discarded=False):
+        # 한 달치 페이지 요청의 계측 이벤트 기록 (HTTP 실패 또는 결과 코드가 00이 아니면 에러)
+        # discarded : 중단 에러가 난 달 이후라 결과를 버린 달 (행 수 0, discarded 표시)
+        if self.metrics is None:
+            return
+        for page in pages:
+            request = page[5]
+            if request is None:
+                continue
+            fields = {'discarded': True} if discarded else {}
+            self.metrics.record(request['latency'], request['status'], request['result_code'], request['size'],
+                                0 if discarded else len(page[3]),
+                                error=request['status'] != 200 or request['result_code'] != "00",
+                                지역=area_name, 년월=request['년월'], 페이지=request['페이지'], **fields)
+
+    def stop(self, status_code, result_code, result_msg):
+        # 중단 대상 결과를 기록하고 이후 요청을 건너뛰도록 표시
+        self.stop_result = (status_code, result_code, result_msg, [], 0)
+        self.stop_event.set()
+        return self.stop_result
+
+    def get_page_count(self, total_count):
+        return max(1, math.ceil(total_count / self.num_of_rows))
+
+    def merge_pages(self, first_page, other_pages):
+        # 2페이지 이후의 결과를 첫 페이지 결과에 합침 (실패한 페이지는 건너뛰고 완전성 기록에서 확인)
+        status_code, result_code, result_msg, rows, total_count = first_page[:5]
+        rows = list(rows)
+        for page in other_pages:
+            if page[0] == 200 and page[1] == "00":
+                rows.extend(page[3])
+        return status_code, result_code, result_msg, rows, total_count
+
+    def iter_month_results(self, area_code, area_name, month_dates, executor=None):
+        # 월 순서대로 (상태 코드, 결과 코드, 결과 메시지, 행 목록, 전체 건수)를 반환
+        self.stop_event.clear()
+        if executor is None:
+            for current_date in month_dates:
+                year_month = current_date.strftime('%Y%m')
+                first_page = self.fetch_page(area_code, area_name, year_month)
+                other_pages = []
+                if first_page[0] == 200 and first_page[1] == "00":
+                    for page_no in range(2, self.get_page_count(first_page[4]) + 1):
+                        time.sleep(self.sleep_time)
+                        other_pages.append(self.fetch_page(area_code, area_name, year_month, page_no))
+                self.record_pages(area_name, [first_page] + other_pages)
+                yield self.merge_pages(first_page, other_pages)
+            return
+
+        # 동시 수집: max_workers개월씩 첫 페이지를 요청하고, totalCount를 확인한 뒤 그 달들의 남은 페이지를 요청
+        # 중단 대상 결과 코드가 나오면 그 달까지만 반환하고 다음 묶음은 요청하지 않음 (트래픽 한도 보호)
+        for window_start in range(0, len(month_dates), self.max_workers):
+            window = month_dates[window_start:window_start + self.max_workers]
+            first_pages = [future.result() for future in
+                           [executor.submit(self.fetch_page, area_code, area_name, current_date.strftime('%Y%m'))
+                            for current_date in window]]
+            stop_index = next((index for index, page in enumerate(first_pages) if page[1] in STOP_CODES), None)
+            if stop_index is not None:
+                self.record_pages(area_name, first_pages[stop_index + 1:], discarded=True)
+                window, first_pages = window[:stop_index + 1], first_pages[:stop_index + 1]
+            page_futures = [[executor.submit(self.fetch_page, area_code, area_name, current_date.strftime('%Y%m'), page_no)
+                             for page_no in range(2, self.get_page_count(first_page[4]) + 1)]
+                            if first_page[0] == 200 and first_page[1] == "00" else []
+                            for current_date, first_page in zip(window, first_pages)]
+            try:
+                for first_page, futures in zip(first_pages, page_futures):
+                    other_pages = [page_future.result() for page_future in futures]
+                    self.record_pages(area_name, [first_page] + other_pages)
+                    yield self.merge_pages(first_page, other_pages)
+            finally:
+                # 중간에 수집이 중단되면 아직 시작하지 않은 페이지 요청은 취소
+                for futures in page_futures:
+                    for page_future in futures:
+                        page_future.cancel()
+            if stop_index is not None:
+                return
+            if self.stop_event.is_set():
+                # 2페이지 이후 요청에서 중단 코드를 받은 경우 : 순차 수집처럼 다음 달을 그 결과로 보고 중단
+                if window_start + len(window) < len(month_dates):
+                    yield self.stop_result
+                return
+
+    def get_month_dates(self):
+        month_dates = []
+        current_date = self.start_date
+        while current_date <= self.end_date:
+            month_dates.append(current_date)
+            current_date += timedelta(days=32)
+            current_date = current_date.replace(day=1)
+        return month_dates
 
     def collect_apt_trade_data(self):
-        total_months = (self.end_date.year - self.start_date.year) * 12 + self.end_date.month - self.start_date.month + 1
         data_collection_results = {}
+        completeness_results = {}
         total_data = []
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         collection_folder = os.path.join(self.base_folder, timestamp)
         os.makedirs(collection_folder, exist_ok=True)
+        self.metrics = CrawlMetrics(os.path.join(collection_folder, f"{timestamp}_requests.jsonl"), 'molit')
+
+        month_dates = self.get_month_dates()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
 
         for area_index, (area_name, area_code) in enumerate(self.area_codes.items(), start=1):
             print("="*110)
             area_name_display = f"{area_name} 전체" if len(area_name) == 2 else area_name
             print(f"수집 중인 지역: {area_name_display} ({area_code})")
+            area_completeness = []
+
+            # 매니페스트 기준으로 수집이 필요한 달만 선택
+            area_month_dates = month_dates
+            previous_entries = {}
+            if self.manifest is not None:
+                previous_entries = self.manifest.get_entries(area_code)
+                year_months = set(self.manifest.get_months_to_fetch(
+                    area_code, [month_date.strftime('%Y%m') for month_date in month_dates], self.recent_months))
+                area_month_dates = [month_date for month_date in month_dates if month_date.strftime('%Y%m') in year_months]
+                print(f"매니페스트 기준 수집 대상: {len(area_month_dates)}/{len(month_dates)}개월")
+                if not area_month_dates:
+                    data_collection_results[area_name_display] = "새로 수집할 달이 없습니다 (매니페스트 기준 최신 상태)"
+                    continue
+            total_months = len(area_month_dates)
 
             df_list = []
-            current_date = self.start_date
             current_step = 0
             collected_months = 0
+            changed_months = 0
             error_month = None
+            month_results = self.iter_month_results(area_code, area_name, area_month_dates, executor)
 
-            while current_date <= self.end_date:
-                year_month = current_date.strftime('%Y%m')
+            for current_step, (current_date, month_result) in enumerate(zip(area_month_dates, month_results)):
                 display_date = current_date.strftime('%Y년 %m월')
-                response = self.fetch_data(area_code, year_month)
-
-                if response.status_code == 200:
-                    result_code, result_msg, items = self.parse_response(response)
+                status_code, result_code, result_msg, rows, total_count = month_result
+                if self.manifest is not None:
+                    year_month = current_date.strftime('%Y%m')
+                    status = ('ok' if len(rows) >= total_count else 'incomplete') if status_code == 200 and result_code == "00" else 'failed'
+                    content_hash = CrawlManifest.compute_content_hash(rows) if status != 'failed' else None
+                    if status == 'ok' and previous_entries.get(year_month, (None, None))[1] != content_hash:
+                        changed_months += 1
+                    self.manifest.record(area_code, area_name, year_month, status, len(rows), total_count,
+                                         content_hash, timestamp)
+
+                if status_code == 200:
                     if result_code == "00":
-                        df_list.extend(self.extract_data_from_items(items, area_name))
+                        df_list.extend(rows)
                         print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} 데이터 수집 완료")
+                        if len(rows) < total_count:
+                            print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} 일부 페이지 누락: {len(rows)}/{total_count}개")
                         collected_months += 1
+                        area_completeness.append((display_date, len(rows), total_count))
                     else:
                         print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} 데이터 요청 실패: {result_msg} (코드: {result_code})")
-                        if result_code in ["10", "30", "22", "99"]:
+                        if result_code in STOP_CODES:
                             error_month = display_date
                             break
+                elif status_code is None:
+                    print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} 요청 생략: {result_msg}")
                 else:
-                    print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} HTTP 요청 실패: 상태 코드 {response.status_code}")
+                    print(f"[{current_step + 1}/{total_months}/{area_name_display}] - {display_date} HTTP 요청 실패: 상태 코드 {status_code}")
+
+                if executor is None:
+                    time.sleep(self.sleep_time)
 
-                current_date += timedelta(days=32)
-                current_date = current_date.replace(day=1)
-                time.sleep(self.sleep_time)
-                current_step += 1
+            month_results.close()
+            if not error_month:
+                # 수집 종료 시점의 다음 달 (기존 로그 형식 유지)
+                current_date = (self.end_date.replace(day=1) + timedelta(days=32)).replace(day=1)
 
             result = f"{self.start_date.year}년 {self.start_date.month}월 ~ {current_date.year}년 {current_date.month}월 / {collected_months}개월 {len(df_list)}개(파싱된 데이터 수) 수집 완료"
             if error_month:
                 result += f" / 코드 {result_code} 에러로 {error_month}에서 중단"
+            if self.manifest is not None:
+                result += f" / 신규 또는 변경 {changed_months}개월"
             data_collection_results[area_name_display] = result
+            completeness_results[area_name_display] = area_completeness
 
             df = pd.DataFrame(df_list)
             print("\n**********샘플 출력**********\n")
@@ -129,12 +322,17 @@ class AptTradeDataCollector:
             df.to_csv(csv_path, index=False)
             print(f"{area_name} 지역 {len(df)}개 데이터 수집 완료")
             print(f"{area_name} 데이터프레임이 CSV 파일 {csv_path}로 저장되었습니다.")
+            print(f"요청 계측 - {self.metrics.rolling_line()}")
 
             total_data.extend(df_list)
 
-        self.save_log(data_collection_results, collection_folder, timestamp)
+        if executor is not None:
+            executor.shutdown()
+
+        self.save_log(data_collection_results, collection_folder, timestamp, completeness_results)
+        self.metrics.close()
 
-    def save_log(self, data_collection_results, collection_folder, timestamp):
+    def save_log(self, data_collection_results, collection_folder, timestamp, completeness_results=None):
         log_filename = f"{timestamp}_log.txt"
         log_path = os.path.join(collection_folder, log_filename)
 
@@ -150,6 +348,21 @@ class AptTradeDataCollector:
             log_file.write("="*110 + "\n")
             log_file.write("="*110 + "\n\n")
 
+            # (지역, 월)별 수집 완전성 기록 : 수집된 행 수 / API가 알려준 전체 건수(totalCount)
+            if completeness_results:
+                log_file.write("수집 완전성 (수집 건수/전체 건수)\n")
+                for area, months in completeness_results.items():
+                    incomplete_months = [month for month in months if month[1] < month[2]]
+                    log_file.write(f"지역명: {area} / 완전 수집 {len(months) - len(incomplete_months)}개월 / 누락 발생 {len(incomplete_months)}개월\n")
+                    for display_date, row_count, total_count in months:
+                        status = "완료" if row_count >= total_count else "누락"
+                        log_file.write(f"    {display_date} : {row_count}/{total_count} {status}\n")
+                log_file.write("="*110 + "\n\n")
+
+            # 요청 계측 요약 (요청별 기록은 {timestamp}_requests.jsonl)
+            if self.metrics is not None:
+                log_file.write(f"요청 계측: {self.metrics.summary_line()}\n")
+
         print("\n\n" + "="*110)
         print("============================================최종 결과===========================================================")
         print("="*110)
@@ -158,12 +371,16 @@ class AptTradeDataCollector:
             print(f"지역명: {area} / {result}")
 
         print("="*110)
+        if self.metrics is not None:
+            print(f"요청 계측: {self.metrics.summary_line()}")
         print("="*110)
         print("="*110 + "\n\n")
 
     def merge_csv_files(self, base_directory, output_filename):
         all_data_frames = []
         file_names = []
+        # 매니페스트가 있으면 (지역, 년월)마다 가장 최근에 정상 수집한 실행 폴더의 데이터만 사용
+        latest_runs = self.manifest.get_latest_runs() if self.manifest is not None else {}
 
         date_folders = [os.path.join(base_directory, d) for d in os.listdir(base_directory) if
                         os.path.isdir(os.path.join(base_directory, d))]
@@ -176,6 +393,11 @@ class AptTradeDataCollector:
                     df = pd.read_csv(file)
                     if df.empty:
                         continue
+                    if latest_runs:
+                        area_name = os.path.basename(file).split('_')[0]
+                        year_month = df['년'] * 100 + df['월']
+                        owner = year_month.map(lambda ym: latest_runs.get((area_name, ym)))
+                        df = df[owner.isna() | (owner == os.path.basename(date_folder))]
                     all_data_frames.append(df)
                     file_names.append(os.path.basename(file).split('_')[0])
                 except pd.errors.EmptyDataError:
@@ -190,35 +412,50 @@ class AptTradeDataCollector:
             total_data_count_after = merged_df.shape[0]
 
             merged_df.to_csv(output_filename, index=False)
+            # 거래금액 등 타입을 정리해 Parquet(지역/년 파티션)로도 저장 -> 이후 단계는 CSV 재파싱 없이 사용
+            cleaned_df = clean_trade_columns(merged_df)
+            report_memory('total_apt_trade_data', memory_usage_mb(merged_df), cleaned_df)
+            parquet_path = save_dataset(cleaned_df, 'total_apt_trade_data')
             print("=" * 110)
             print(
                 f"중복 데이터 {total_data_count_before - total_data_count_after}개 제거 후 {total_data_count_after}개의 데이터 수집되었습니다.")
             print(f"통합 데이터프레임이 CSV 파일 {output_filename}로 저장되었습니다.")
+            print(f"통합 데이터프레임이 {parquet_path}에도 저장되었습니다.")
         else:
             print("병합할 데이터가 없습니다. CSV 파일이 생성되지 않았습니다.")
 
 # 실행 부분
-start_date = datetime(2000, 1, 1)
-end_date = datetime(2023, 12, 31)
-area_codes = {
-    # '화성': '41590',
-    # '용인 기흥': '41463',
-    # '용인 수지': '41465',
-    # '용인 처인': '41461',
-    # '오산': '41370'
-    #
-    '수원 권선': '41113',
-    '수원 영통': '41117',
-    '수원 장안': '41111',
-    '수원 팔달': '41115',
-    '성남 분당': '41135',
-    '성남 수정': '41131',
-    '성남 중원': '41133',
-    '평택': '41220'
-    }
-url = 'http://openapi.molit.go.kr/OpenAPI_ToolInstallPackage/service/rest/RTMSOBJSvc/getRTMSDataSvcAptTradeDev'
-service_key = ''
-
-collector = AptTradeDataCollector(url, service_key, start_date, end_date, area_codes, sleep_time=0.1)
-collector.collect_apt_trade_data()
-collector.merge_csv_files('DATA/org_crawling_data/area', 'DATA/org_crawling_data/total_apt_trade_data.csv')
+if __name__ == '__main__':
+    start_date = datetime(2000, 1, 1)
+    end_date = datetime(2023, 12, 31)
+    area_codes = {
+        # '화성': '41590',
+        # '용인 기흥': '41463',
+        # '용인 수지': '41465',
+        # '용인 처인': '41461',
+        # '오산': '41370'
+        #
+        '수원 권선': '41113',
+        '수원 영통': '41117',
+        '수원 장안': '41111',
+        '수원 팔달': '41115',
+        '성남 분당': '41135',
+        '성남 수정': '41131',
+        '성남 중원': '41133',
+        '평택': '41220'
+        }
+    url = 'http://openapi.molit.go.kr/OpenAPI_ToolInstallPackage/service/rest/RTMSOBJSvc/getRTMSDataSvcAptTradeDev'
+    service_key = ''
+
+    # max_workers=1이면 기존처럼 순차 수집, 그 이상이면 초당 requests_per_second개 이하로 동시 수집
+    # manifest로 이전 수집 이력을 관리하여 재실행 시 누락/실패/최근 3개월만 수집
+    collector = AptTradeDataCollector(url, service_key, start_date, end_date, area_codes, sleep_time=0.1,
+                                      max_workers=8, requests_per_second=10,
+                                      manifest=CrawlManifest('DATA/org_crawling_data/manifest.sqlite'), recent_months=3)
+    collector.collect_apt_trade_data()
+    collector.merge_csv_files('DATA/org_crawling_data/area', 'DATA/org_crawling_data/total_apt_trade_data.csv')
+
+    # 새로 수집되거나 내용이 바뀐 (지역, 년월)만 월별 가격 지수에 다시 집계 (price_index.py)
+    price_index = PriceIndex.load()
+    if price_index.update(collector.manifest.get_content_hashes()):
+        print("월별 가격 지수를 저장했습니다:", price_index.save())
@@ -1,47 +1,112 @@
+import argparse
 import pandas as pd
 from datetime import datetime
-from category_encoders import MEstimateEncoder, OrdinalEncoder, TargetEncoder
+from category_encoding import CategoryEncoder, assign_folds
+from schema import PREPROCESSED_DTYPES, apply_schema
+from storage import iter_dataset, load_dataset, save_dataset, save_dataset_chunks
 
-# CSV 파일에서 데이터프레임 로드
-file_path = 'DATA/org_crawling_data/total_apt_trade_data.csv'
-df = pd.read_csv(file_path)
-
-# 필요한 열만 선택하여 복사
+# 수집 데이터에서 사용하는 열
 selected_columns = ['아파트', '법정동', '도로명', '지역', '거래금액', '전용면적', '건축년도', '층']
-df_selected = df[selected_columns].copy()
 
-# 거래금액 열에서 쉼표 제거하고 숫자형으로 변환한 후 4개의 0 추가(만원 단위)
-df_selected['거래금액'] = (df_selected['거래금액'].str.replace(',', '').astype(float) * 10000)
+# 인코딩할 범주형 열 (결과 열 이름 : '{열}_MEstimate', '{열}_Ordinal', '{열}_Target')
+encoded_columns = ['아파트', '도로명', '법정동', '지역']
+
+# out-of-fold 인코딩에 쓴 행별 폴드 번호를 저장하는 열 (교차 검증이 같은 폴드로 나누도록 함께 저장)
+# 저장 데이터는 지역 파티션 순으로 다시 읽히므로 행 위치로 assign_folds를 다시 계산하면 폴드가 맞지 않음
+fold_column = '폴드'
+
+
+def prepare_columns(df):
+    # 필요한 열만 선택하여 복사
+    df_selected = df[selected_columns].copy()
+
+    # 거래금액(만원, 저장 단계에서 쉼표 제거 완료)에 4개의 0 추가
+    df_selected['거래금액'] = df_selected['거래금액'].astype(float) * 10000
+
+    # 현재 연도 가져오기
+    current_year = datetime.now().year
+
+    # 년식 열 추가 및 Null 값 삭제, '건축년도' 열 삭제
+    df_selected['년식'] = current_year - df_selected['건축년도']
+    df_selected.dropna(inplace=True)
+    df_selected.drop(columns=['건축년도'], inplace=True)
+
+    # 열 순서 변경 후 작은 타입으로 변환 (schema.py)
+    df_selected = df_selected[['거래금액', '전용면적', '년식', '층', '아파트', '도로명', '법정동', '지역']]
+    return apply_schema(df_selected, PREPROCESSED_DTYPES)
+
+
+def build_encoder(n_folds=5):
+    # MEstimate(m=0.5), Ordinal, Target 인코딩을 한 번의 통계 계산으로 처리
+    # n_folds > 1이면 학습 데이터의 MEstimate/Target 값을 out-of-fold로 계산 (자기 행의 거래금액이 값에 섞이지 않음)
+    return CategoryEncoder(encoded_columns, m=0.5, n_folds=n_folds)
+
+
+def with_folds(df, folds):
+    # out-of-fold 인코딩을 했으면 행별 폴드 번호 열 추가
+    if folds is not None:
+        df[fold_column] = folds.astype('int16')
+    return df
+
 
-# 현재 연도 가져오기
-current_year = datetime.now().year
+def preprocess(df, encoder=None, n_folds=5):
+    # encoder가 이미 학습돼 있으면 저장된 통계를 그대로 적용하고, 아니면 이 데이터로 학습
+    df_selected = prepare_columns(df)
+    encoder = encoder if encoder is not None else build_encoder(n_folds)
+    folds = None
+    if encoder.total_count == 0:
+        folds = assign_folds(0, len(df_selected), encoder.n_folds) if encoder.n_folds > 1 else None
+        encoder.fit(df_selected, df_selected['거래금액'], folds)
+    return with_folds(pd.concat([df_selected, encoder.transform(df_selected, folds)], axis=1), folds)
 
-# 년식 열 추가 및 Null 값 삭제, '건축년도' 열 삭제
-df_selected['년식'] = current_year - df_selected['건축년도']
-df_selected.dropna(inplace=True)
-df_selected.drop(columns=['건축년도'], inplace=True)
 
-# 열 순서 변경
-df_selected = df_selected[['거래금액', '전용면적', '년식', '층', '아파트', '도로명', '법정동', '지역']]
+def preprocess_chunked(load_chunks, encoder=None, n_folds=5):
+    # 메모리보다 큰 데이터용 2단계 처리 : 1차 패스에서 인코딩 통계, 2차 패스에서 청크별 인코딩 후 반환
+    # load_chunks : 호출할 때마다 원본 데이터를 처음부터 청크 단위로 읽는 함수 (2번 호출)
+    # 폴드 번호는 전처리 후 행 위치로 정하므로 한 번에 처리한 결과와 같음
+    encoder = encoder if encoder is not None else build_encoder(n_folds)
+    fit = encoder.total_count == 0
+    use_folds = fit and encoder.n_folds > 1
+    if fit:
+        start = 0
+        for chunk in load_chunks():
+            chunk = prepare_columns(chunk)
+            folds = assign_folds(start, len(chunk), encoder.n_folds) if use_folds else None
+            encoder.partial_fit(chunk, chunk['거래금액'], folds)
+            start += len(chunk)
+    start = 0
+    for chunk in load_chunks():
+        chunk = prepare_columns(chunk)
+        folds = assign_folds(start, len(chunk), encoder.n_folds) if use_folds else None
+        start += len(chunk)
+        yield with_folds(pd.concat([chunk, encoder.transform(chunk, folds)], axis=1), folds)
 
-# MEstimateEncoder, OrdinalEncoder, TargetEncoder 적용
-encoders = {
-    "MEstimate": MEstimateEncoder(cols=['아파트', '도로명', '법정동', '지역'], m=0.5),
-    "Ordinal": OrdinalEncoder(cols=['아파트', '도로명', '법정동', '지역']),
-    "Target": TargetEncoder(cols=['아파트', '도로명', '법정동', '지역'])
-}
 
-for encoder_name, encoder in encoders.items():
-    df_encoded = encoder.fit_transform(df_selected, df_selected['거래금액'])
-    for column in ['아파트', '도로명', '법정동', '지역']:
-        new_column_name = f"{column}_{encoder_name}"
-        df_selected[new_column_name] = df_encoded[column]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='수집 데이터 전처리 및 범주형 인코딩')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='지정하면 전체를 메모리에 올리지 않고 N행씩 나눠 처리')
+    parser.add_argument('--folds', type=int, default=5,
+                        help='MEstimate/Target out-of-fold 인코딩 폴드 수 (0이면 전체 데이터로 인코딩)')
+    args = parser.parse_args()
 
-# 전처리된 DataFrame을 CSV 파일로 저장
-output_file_path = 'DATA/preprocessed_data/first_preprocessed_data_org.csv'
-df_selected.to_csv(output_file_path, index=False)
+    encoder = build_encoder(args.folds)
+    if args.chunk_size:
+        # 청크 단위로 읽고 인코딩해 바로 저장 (최대 메모리 사용량이 청크 크기에 비례)
+        chunks = preprocess_chunked(
+            lambda: iter_dataset('total_apt_trade_data', columns=selected_columns, chunk_size=args.chunk_size),
+            encoder)
+        output_file_path = save_dataset_chunks(chunks, 'first_preprocessed_data_org', export_csv=False)
+        print("전처리된 데이터를 저장했습니다:", output_file_path)
+    else:
+        # 수집 데이터에서 필요한 열만 로드 (Parquet가 없으면 CSV를 읽어 정리)
+        df_selected = preprocess(load_dataset('total_apt_trade_data', columns=selected_columns), encoder)
 
-print("전처리된 데이터를 저장했습니다:", output_file_path)
-print(df_selected.info())
+        # 전처리된 DataFrame을 Parquet로 저장 (export_csv=True면 기존 CSV도 함께 저장)
+        output_file_path = save_dataset(df_selected, 'first_preprocessed_data_org', export_csv=False)
 
+        print("전처리된 데이터를 저장했습니다:", output_file_path)
+        print(df_selected.info())
 
+    # 범주별 인코딩 통계 저장 (새 데이터에 다시 학습하지 않고 적용할 때 사용)
+    print("인코딩 통계를 저장했습니다:", encoder.save())
@@ -1,6 +1,8 @@
-import pandas as pd
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
+from storage import iter_dataset, load_dataset
+from streaming_stats import largest_k, smallest_k, summarize_chunks
 
 # 함수: 거래금액을 원하는 형식으로 표기하는 함수
 def format_price(price):
@@ -20,116 +22,144 @@ def format_price(price):
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-# Load the preprocessed data
-preprocessed_file_path = 'DATA/preprocessed_data/first_preprocessed_data_org.csv'
-df_preprocessed = pd.read_csv(preprocessed_file_path)
-
-# Access the '거래금액' column
-거래금액 = df_preprocessed['거래금액']
-
-# 거래금액을 오름차순으로 정렬
-거래금액_sorted = 거래금액.sort_values()
-
-# 거래금액을 10개의 구간으로 나누기
-bin_counts, bin_edges = np.histogram(거래금액_sorted, bins=10)
-
-# 각 구간의 범위와 데이터 개수 출력
-print("전체 데이터의 구간별 거래금액 분포")
-for i in range(len(bin_counts)):
-    start = format_price(bin_edges[i])
-    end = format_price(bin_edges[i + 1])
-    count = bin_counts[i]
-    print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
-
-# 상위 1000개 데이터 선택
-상위1000데이터 = 거래금액_sorted[-1000:]
-
-# 하위 1000개 데이터 선택
-하위1000데이터 = 거래금액_sorted[:1000]
-
-# 상위 1000개 데이터를 10개의 구간으로 나누기
-bin_counts_top_1000, bin_edges_top_1000 = np.histogram(상위1000데이터, bins=10)
-
-# 하위 1000개 데이터를 10개의 구간으로 나누기
-bin_counts_bottom_1000, bin_edges_bottom_1000 = np.histogram(하위1000데이터, bins=10)
-
-# 각 구간의 범위와 데이터 개수 출력
-print("\n상위 1000개 데이터의 구간별 거래금액 분포")
-for i in range(len(bin_counts_top_1000)):
-    start = format_price(bin_edges_top_1000[i])
-    end = format_price(bin_edges_top_1000[i + 1])
-    count = bin_counts_top_1000[i]
-    print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
-
-print("\n하위 1000개 데이터의 구간별 거래금액 분포")
-for i in range(len(bin_counts_bottom_1000)):
-    start = format_price(bin_edges_bottom_1000[i])
-    end = format_price(bin_edges_bottom_1000[i + 1])
-    count = bin_counts_bottom_1000[i]
-    print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
-
-# 막대 그래프 그리기
-plt.figure(figsize=(15, 6))
-
-# 하위 1000개의 데이터 그래프
-plt.subplot(1, 2, 1)
-bars_bottom = plt.bar(range(len(bin_counts_bottom_1000)), bin_counts_bottom_1000, tick_label=[f'{format_price(bin_edges_bottom_1000[i])} ~ {format_price(bin_edges_bottom_1000[i+1])}' for i in range(len(bin_counts_bottom_1000))])
-plt.title('하위 1000개의 데이터 분포')
-plt.xlabel('거래금액')
-plt.ylabel('데이터 개수')
-plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
-plt.grid(True)
-
-# 각 막대 위에 데이터 개수 표시
-for bar, count in zip(bars_bottom, bin_counts_bottom_1000):
-    plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
-
-# 상위 1000개의 데이터 그래프
-plt.subplot(1, 2, 2)
-bars_top = plt.bar(range(len(bin_counts_top_1000)), bin_counts_top_1000, tick_label=[f'{format_price(bin_edges_top_1000[i])} ~ {format_price(bin_edges_top_1000[i+1])}' for i in range(len(bin_counts_top_1000))])
-plt.title('상위 1000개의 데이터 분포')
-plt.xlabel('거래금액')
-plt.ylabel('데이터 개수')
-plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
-plt.grid(True)
-
-# 각 막대 위에 데이터 개수 표시
-for bar, count in zip(bars_top, bin_counts_top_1000):
-    plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
-
-plt.tight_layout()
-plt.savefig('DATA/image/04_price_top_bot_check/상하위1000개_막대.png')
-
-# 누적 막대 그래프 그리기
-plt.figure(figsize=(15, 6))
-
-# 하위 1000개의 데이터 그래프
-plt.subplot(1, 2, 1)
-cumulative_bottom = np.cumsum(bin_counts_bottom_1000)
-bars_bottom = plt.bar(range(len(bin_counts_bottom_1000)), cumulative_bottom, tick_label=[f'{format_price(bin_edges_bottom_1000[i])} ~ {format_price(bin_edges_bottom_1000[i+1])}' for i in range(len(bin_counts_bottom_1000))])
-plt.title('하위 1000개의 데이터 분포 (누적)')
-plt.xlabel('거래금액')
-plt.ylabel('데이터 개수')
-plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
-plt.grid(True)
-
-# 각 막대 위에 누적된 데이터 개수 표시
-for bar, count in zip(bars_bottom, cumulative_bottom):
-    plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(int(count)), ha='center', va='bottom')
-
-# 상위 1000개의 데이터 그래프 (역순)
-plt.subplot(1, 2, 2)
-cumulative_top_reverse = np.cumsum(bin_counts_top_1000[::-1])[::-1]  # 상위 데이터의 누적값을 역순으로 계산
-bars_top = plt.bar(range(len(bin_counts_top_1000)), cumulative_top_reverse, tick_label=[f'{format_price(bin_edges_top_1000[i])} ~ {format_price(bin_edges_top_1000[i+1])}' for i in range(len(bin_counts_top_1000))])
-plt.title('상위 1000개의 데이터 분포 (누적, 역순)')
-plt.xlabel('거래금액')
-plt.ylabel('데이터 개수')
-plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
-plt.grid(True)
-
-# 각 막대 위에 누적된 데이터 개수 표시
-for bar, count in zip(bars_top, cumulative_top_reverse):
-    plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(int(count)), ha='center', va='bottom')
-
-plt.tight_layout()
-plt.savefig('DATA/image/04_price_top_bot_check/상하위1000개_누적.png')
\ No newline at end of file
+
+def summarize_prices(df, top_n=1000, bins=10):
+    # 전체를 정렬하지 않고 구간별 개수와 상/하위 top_n개 계산 (np.partition으로 O(n) 선택)
+    거래금액 = df['거래금액'].to_numpy()
+    bin_counts, bin_edges = np.histogram(거래금액, bins=bins)
+    return {'bin_counts': bin_counts, 'bin_edges': bin_edges,
+            'top': largest_k(거래금액, top_n), 'bottom': smallest_k(거래금액, top_n)}
+
+
+def plot_price_distribution(df, output_dir='DATA/image/04_price_top_bot_check', top_n=1000, bins=10, summary=None):
+    # summary : 청크 단위로 미리 계산한 요약 (streaming_stats.summarize_chunks 결과), 없으면 df에서 계산
+    bar_file_path = f'{output_dir}/상하위{top_n}개_막대.png'
+    cumulative_file_path = f'{output_dir}/상하위{top_n}개_누적.png'
+
+    if summary is None:
+        summary = summarize_prices(df, top_n=top_n, bins=bins)
+
+    # 거래금액을 bins개의 구간으로 나눈 결과
+    bin_counts, bin_edges = summary['bin_counts'], summary['bin_edges']
+
+    # 각 구간의 범위와 데이터 개수 출력
+    print("전체 데이터의 구간별 거래금액 분포")
+    for i in range(len(bin_counts)):
+        start = format_price(bin_edges[i])
+        end = format_price(bin_edges[i + 1])
+        count = bin_counts[i]
+        print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
+
+    # 상위 1000개 데이터 선택
+    상위1000데이터 = summary['top']
+
+    # 하위 1000개 데이터 선택
+    하위1000데이터 = summary['bottom']
+
+    # 상위 1000개 데이터를 bins개의 구간으로 나누기
+    bin_counts_top_1000, bin_edges_top_1000 = np.histogram(상위1000데이터, bins=bins)
+
+    # 하위 1000개 데이터를 bins개의 구간으로 나누기
+    bin_counts_bottom_1000, bin_edges_bottom_1000 = np.histogram(하위1000데이터, bins=bins)
+
+    # 각 구간의 범위와 데이터 개수 출력
+    print(f"\n상위 {top_n}개 데이터의 구간별 거래금액 분포")
+    for i in range(len(bin_counts_top_1000)):
+        start = format_price(bin_edges_top_1000[i])
+        end = format_price(bin_edges_top_1000[i + 1])
+        count = bin_counts_top_1000[i]
+        print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
+
+    print(f"\n하위 {top_n}개 데이터의 구간별 거래금액 분포")
+    for i in range(len(bin_counts_bottom_1000)):
+        start = format_price(bin_edges_bottom_1000[i])
+        end = format_price(bin_edges_bottom_1000[i + 1])
+        count = bin_counts_bottom_1000[i]
+        print(f"구간 {i + 1}: {start} ~ {end}, 데이터 개수: {count}")
+
+    # 막대 그래프 그리기
+    plt.figure(figsize=(15, 6))
+
+    # 하위 1000개의 데이터 그래프
+    plt.subplot(1, 2, 1)
+    bars_bottom = plt.bar(range(len(bin_counts_bottom_1000)), bin_counts_bottom_1000, tick_label=[f'{format_price(bin_edges_bottom_1000[i])} ~ {format_price(bin_edges_bottom_1000[i+1])}' for i in range(len(bin_counts_bottom_1000))])
+    plt.title(f'하위 {top_n}개의 데이터 분포')
+    plt.xlabel('거래금액')
+    plt.ylabel('데이터 개수')
+    plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
+    plt.grid(True)
+
+    # 각 막대 위에 데이터 개수 표시
+    for bar, count in zip(bars_bottom, bin_counts_bottom_1000):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
+
+    # 상위 1000개의 데이터 그래프
+    plt.subplot(1, 2, 2)
+    bars_top = plt.bar(range(len(bin_counts_top_1000)), bin_counts_top_1000, tick_label=[f'{format_price(bin_edges_top_1000[i])} ~ {format_price(bin_edges_top_1000[i+1])}' for i in range(len(bin_counts_top_1000))])
+    plt.title(f'상위 {top_n}개의 데이터 분포')
+    plt.xlabel('거래금액')
+    plt.ylabel('데이터 개수')
+    plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
+    plt.grid(True)
+
+    # 각 막대 위에 데이터 개수 표시
+    for bar, count in zip(bars_top, bin_counts_top_1000):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
+
+    plt.tight_layout()
+    plt.savefig(bar_file_path)
+    plt.close()
+
+    # 누적 막대 그래프 그리기
+    plt.figure(figsize=(15, 6))
+
+    # 하위 1000개의 데이터 그래프
+    plt.subplot(1, 2, 1)
+    cumulative_bottom = np.cumsum(bin_counts_bottom_1000)
+    bars_bottom = plt.bar(range(len(bin_counts_bottom_1000)), cumulative_bottom, tick_label=[f'{format_price(bin_edges_bottom_1000[i])} ~ {format_price(bin_edges_bottom_1000[i+1])}' for i in range(len(bin_counts_bottom_1000))])
+    plt.title(f'하위 {top_n}개의 데이터 분포 (누적)')
+    plt.xlabel('거래금액')
+    plt.ylabel('데이터 개수')
+    plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
+    plt.grid(True)
+
+    # 각 막대 위에 누적된 데이터 개수 표시
+    for bar, count in zip(bars_bottom, cumulative_bottom):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(int(count)), ha='center', va='bottom')
+
+    # 상위 1000개의 데이터 그래프 (역순)
+    plt.subplot(1, 2, 2)
+    cumulative_top_reverse = np.cumsum(bin_counts_top_1000[::-1])[::-1]  # 상위 데이터의 누적값을 역순으로 계산
+    bars_top = plt.bar(range(len(bin_counts_top_1000)), cumulative_top_reverse, tick_label=[f'{format_price(bin_edges_top_1000[i])} ~ {format_price(bin_edges_top_1000[i+1])}' for i in range(len(bin_counts_top_1000))])
+    plt.title(f'상위 {top_n}개의 데이터 분포 (누적, 역순)')
+    plt.xlabel('거래금액')
+    plt.ylabel('데이터 개수')
+    plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
+    plt.grid(True)
+
+    # 각 막대 위에 누적된 데이터 개수 표시
+    for bar, count in zip(bars_top, cumulative_top_reverse):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(int(count)), ha='center', va='bottom')
+
+    plt.tight_layout()
+    plt.savefig(cumulative_file_path)
+    plt.close()
+    return [bar_file_path, cumulative_file_path]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='거래금액 상/하위 분포 확인')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='지정하면 전체를 메모리에 올리지 않고 N행씩 나눠 집계')
+    args = parser.parse_args()
+
+    if args.chunk_size:
+        # 청크 단위로 상/하위 1000개와 구간별 개수 집계
+        price_summary = summarize_chunks(
+            lambda: iter_dataset('first_preprocessed_data_org', columns=['거래금액'], chunk_size=args.chunk_size),
+            '거래금액', bins=10, top_n=1000)
+        plot_price_distribution(None, summary=price_summary)
+    else:
+        # Load the preprocessed data ('거래금액' 컬럼만)
+        df_preprocessed = load_dataset('first_preprocessed_data_org', columns=['거래금액'])
+        plot_price_distribution(df_preprocessed)
@@ -1,43 +1,68 @@
-import pandas as pd
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
-
-# CSV 파일에서 데이터프레임 로드
-file_path = 'DATA/preprocessed_data/first_preprocessed_data_org.csv'
-df = pd.read_csv(file_path)
+from storage import iter_dataset, load_dataset
+from streaming_stats import summarize_chunks
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-# 전용면적을 20개의 구간으로 나누기
-bin_counts, bin_edges = np.histogram(df['전용면적'], bins=20)
-
-# 각 구간의 범위와 데이터 개수 출력
-print("전체 데이터의 구간별 전용면적 분포")
-for i in range(len(bin_counts)):
-    start = bin_edges[i]
-    end = bin_edges[i + 1]
-    count = bin_counts[i]
-    print(f"구간 {i + 1}: {start:.2f} ~ {end:.2f} (제곱미터), 데이터 개수: {count}")
-
-# 막대 그래프 그리기
-plt.figure(figsize=(10, 6))
-bars = plt.bar(range(len(bin_counts)), bin_counts, tick_label=[f'{start:.2f} ~ {end:.2f}' for start, end in zip(bin_edges[:-1], bin_edges[1:])])
-plt.title('전용면적 구간별 데이터 개수')
-plt.xlabel('전용면적 (제곱미터)')
-plt.ylabel('데이터 개수')
-plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
-
-# 각 막대 위에 데이터 개수 표시
-for bar, count in zip(bars, bin_counts):
-    plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
-
-plt.tight_layout()
-
-# 그래프를 이미지로 저장
-output_file_path = 'DATA/image/05_area_check/전용면적_구간별_데이터개수.png'
-plt.savefig(output_file_path)
-
-# 결과 출력
-print("전용면적 구간별 데이터 개수 그래프를 저장했습니다:", output_file_path)
+
+def plot_area_distribution(df, output_file_path='DATA/image/05_area_check/전용면적_구간별_데이터개수.png', bins=20,
+                           summary=None):
+    # summary : 청크 단위로 미리 계산한 요약 (streaming_stats.summarize_chunks 결과), 없으면 df에서 계산
+    # 전용면적을 bins개의 구간으로 나누기
+    if summary is None:
+        bin_counts, bin_edges = np.histogram(df['전용면적'], bins=bins)
+    else:
+        bin_counts, bin_edges = summary['bin_counts'], summary['bin_edges']
+
+    # 각 구간의 범위와 데이터 개수 출력
+    print("전체 데이터의 구간별 전용면적 분포")
+    for i in range(len(bin_counts)):
+        start = bin_edges[i]
+        end = bin_edges[i + 1]
+        count = bin_counts[i]
+        print(f"구간 {i + 1}: {start:.2f} ~ {end:.2f} (제곱미터), 데이터 개수: {count}")
+
+    # 막대 그래프 그리기
+    plt.figure(figsize=(10, 6))
+    bars = plt.bar(range(len(bin_counts)), bin_counts, tick_label=[f'{start:.2f} ~ {end:.2f}' for start, end in zip(bin_edges[:-1], bin_edges[1:])])
+    plt.title('전용면적 구간별 데이터 개수')
+    plt.xlabel('전용면적 (제곱미터)')
+    plt.ylabel('데이터 개수')
+    plt.xticks(rotation=45, ha='right')  # x축 레이블 회전 및 정렬
+
+    # 각 막대 위에 데이터 개수 표시
+    for bar, count in zip(bars, bin_counts):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), str(count), ha='center', va='bottom')
+
+    plt.tight_layout()
+
+    # 그래프를 이미지로 저장
+    plt.savefig(output_file_path)
+    plt.close()
+
+    # 결과 출력
+    print("전용면적 구간별 데이터 개수 그래프를 저장했습니다:", output_file_path)
+    return [output_file_path]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='전용면적 구간별 분포 확인')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='지정하면 전체를 메모리에 올리지 않고 N행씩 나눠 집계')
+    args = parser.parse_args()
+
+    if args.chunk_size:
+        # 청크 단위로 구간별 개수와 사분위수(근사) 집계
+        area_summary = summarize_chunks(
+            lambda: iter_dataset('first_preprocessed_data_org', columns=['전용면적'], chunk_size=args.chunk_size),
+            '전용면적', bins=20)
+        print("전용면적 사분위수(근사):", ", ".join(f"{q:.0%} {value:.2f}" for q, value in area_summary['quantiles'].items()))
+        plot_area_distribution(None, summary=area_summary)
+    else:
+        # 전처리 데이터에서 '전용면적' 컬럼만 로드
+        df = load_dataset('first_preprocessed_data_org', columns=['전용면적'])
+        plot_area_distribution(df)
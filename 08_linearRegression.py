@@ -1,123 +1,195 @@
+import argparse
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
 import matplotlib.pyplot as plt
 import seaborn as sns
+from category_encoding import assign_folds
+from location_features import FEATURE_COLUMNS, KEY_COLUMNS, LocationFeatures
+from regression import RegressionMetrics, StreamingOLS
+from storage import iter_dataset, load_dataset
 
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-# 한글 폰트 설정
-plt.rcParams['font.family'] = 'Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] = False
-
-print("=====전처리전=====")
-# CSV 파일에서 데이터프레임 로드
-file_path = 'DATA/preprocessed_data/first_preprocessed_data_org.csv'
-df = pd.read_csv(file_path)
-
-# 음수 값을 가진 행 제거
-df = df[df['층'] >= 0]
-
-# 선택된 열만으로 새로운 데이터프레임 생성
+# 전처리 전 데이터에서 사용하는 열
 selected_columns = ['거래금액', '전용면적', '년식', '층', '아파트_Target', '도로명_Target', '법정동_Target', '지역_Target']
-df_selected = df[selected_columns]
-
-# 독립변수와 종속변수 분리
-X_selected = df_selected.drop(columns=['거래금액'])  # 독립변수
-y_selected = df_selected['거래금액']  # 종속변수
-
-# 훈련 세트와 테스트 세트로 데이터 분할
-X_train_selected, X_test_selected, y_train_selected, y_test_selected = train_test_split(X_selected, y_selected, test_size=0.2, random_state=42)
-
-# 선형 회귀 모델 생성
-model_selected = LinearRegression()
-
-# 모델 훈련
-model_selected.fit(X_train_selected, y_train_selected)
-
-# 테스트 세트를 사용하여 예측
-y_pred_selected = model_selected.predict(X_test_selected)
-
-# 모델 성능 평가
-mse_selected = mean_squared_error(y_test_selected, y_pred_selected)
-rmse_selected = np.sqrt(mse_selected)
-r2_selected = r2_score(y_test_selected, y_pred_selected)
-print("MSE (Selected):", mse_selected)
-print("R^2 Score (Selected):", r2_selected)
-print("RMSE (Selected):", rmse_selected)
-
-print('Y 절편 값 (Selected):', np.round(model_selected.intercept_, 3))
-print('회귀 계수 값 (Selected):', np.round(model_selected.coef_, 3))
-
-y_train_pred_selected = model_selected.predict(X_train_selected)
-y_test_pred_selected = model_selected.predict(X_test_selected)
-print('R^2 score (학습데이터) (Selected):', r2_score(y_train_selected, y_train_pred_selected))
-print('R^2 score (테스트데이터) (Selected):', r2_score(y_test_selected, y_test_pred_selected))
-
-print("=====전처리후=====")
-# CSV 파일 읽기
-file_path = 'DATA/preprocessed_data/final_preprocessed_data.csv'
-data = pd.read_csv(file_path)
-
-# 독립변수와 종속변수 분리
-X = data.drop(columns=['로그_거래금액'])  # 독립변수
-y = data['로그_거래금액']  # 종속변수
-
-# 훈련 세트와 테스트 세트로 데이터 분할
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# 선형 회귀 모델 생성
-model = LinearRegression()
-
-# 모델 훈련
-model.fit(X_train, y_train)
-
-# 테스트 세트를 사용하여 예측
-y_pred = model.predict(X_test)
-
-# 모델 성능 평가
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-r2 = r2_score(y_test, y_pred)
-print("MSE:", mse)
-print("R^2 Score:", r2)
-print("RMSE:", rmse)
-
-print('Y 절편 값:', np.round(model.intercept_, 3))
-print('회귀 계수 값:', np.round(model.coef_, 3))
-
-y_train_pred = model.predict(X_train)
-y_test_pred = model.predict(X_test)
-print('R^2 score (학습데이터):', r2_score(y_train, y_train_pred))
-print('R^2 score (테스트데이터):', r2_score(y_test, y_test_pred))
-
-# 데이터 샘플링
-sample_data = data.sample(frac=0.1, random_state=42)  # 10% 샘플링
-
-# 그래프 플로팅 및 저장
-fig, axs = plt.subplots(figsize=(18, 18), ncols=3, nrows=3)
-features = ['로그_전용면적', '로그_년식', '로그_층', '로그_아파트', '로그_도로명', '로그_법정동', '로그_지역']
-plot_color = ['r', 'g', 'b', 'y', 'c', 'm', 'k']
-
-# 투명도를 조정한 그래프 플로팅 및 저장
-fig, axs = plt.subplots(figsize=(18, 18), ncols=3, nrows=3)
-for i, f in enumerate(features):
-    row = int(i / 3)
-    col = i % 3
-    sns.regplot(x=f, y='로그_거래금액', data=data, ax=axs[row][col], color=plot_color[i], scatter_kws={'alpha':0.3})
-
-# 빈 서브플롯 삭제
-if len(features) < 9:
-    for j in range(len(features), 9):
-        fig.delaxes(axs.flat[j])
-
-plt.tight_layout()
-plt.savefig('DATA/image/08_linearRegression/가격상관_그래프.png')
-plt.show()
-
-plt.show()
\ No newline at end of file
+# 위치 특징을 붙일 때 사용하는 열 (선택된 열 + 09 단계 좌표로 만든 특징)
+location_columns = selected_columns + FEATURE_COLUMNS
+
+
+def evaluate_regression(X, y, suffix=''):
+    # 훈련 세트와 테스트 세트로 데이터 분할
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # 선형 회귀 모델 훈련 (X'X, X'y 누적 통계로 계산, sklearn LinearRegression과 같은 해)
+    model = StreamingOLS().fit(X_train, y_train)
+
+    # 테스트 세트를 사용하여 예측 후 성능 평가
+    metrics = RegressionMetrics().update(y_test, model.predict(X_test))
+    report_regression(model, metrics, suffix)
+    return model
+
+
+def report_regression(model, metrics, suffix=''):
+    mse = metrics.mse()
+    rmse = metrics.rmse()
+    r2 = metrics.r2()
+    print(f"MSE{suffix}:", mse)
+    print(f"R^2 Score{suffix}:", r2)
+    print(f"RMSE{suffix}:", rmse)
+
+    print(f'Y 절편 값{suffix}:', np.round(model.intercept_, 3))
+    print(f'회귀 계수 값{suffix}:', np.round(model.coef_, 3))
+
+    # 학습 데이터 R^2는 누적 통계로 계산 (학습 데이터를 다시 predict하지 않음)
+    print(f'R^2 score (학습데이터){suffix}:', model.training_score()[0])
+    print(f'R^2 score (테스트데이터){suffix}:', r2)
+
+
+def evaluate_chunked(load_chunks, target, prepare=None, suffix='', n_folds=5):
+    # 메모리보다 큰 데이터용 : 1차 패스에서 학습 통계 누적, 2차 패스에서 테스트 행 예측/평가
+    # 행 위치 해시로 n_folds개 중 0번 폴드(약 20%)를 테스트 세트로 사용 (청크 크기와 무관하게 같은 분할)
+    model = StreamingOLS()
+    metrics = RegressionMetrics()
+    for evaluate in [False, True]:
+        start = 0
+        for chunk in load_chunks():
+            test = assign_folds(start, len(chunk), n_folds) == 0
+            start += len(chunk)
+            if prepare is not None:
+                keep = prepare(chunk)
+                chunk, test = chunk[keep], test[keep]
+            X, y = chunk.drop(columns=[target]), chunk[target]
+            if evaluate:
+                metrics.update(y[test], model.predict(X[test]))
+            else:
+                model.partial_fit(X[~test], y[~test])
+    report_regression(model, metrics, suffix)
+    return model
+
+
+def evaluate_selected(df):
+    print("=====전처리전=====")
+    # 음수 값을 가진 행 제거
+    df = df[df['층'] >= 0]
+
+    # 선택된 열만으로 새로운 데이터프레임 생성
+    df_selected = df[selected_columns]
+
+    # 독립변수와 종속변수 분리
+    X_selected = df_selected.drop(columns=['거래금액'])  # 독립변수
+    y_selected = df_selected['거래금액']  # 종속변수
+    return evaluate_regression(X_selected, y_selected, suffix=' (Selected)')
+
+
+def evaluate_location(df, location):
+    print("=====위치 특징 추가=====")
+    # Selected와 같은 행/분할 사용
+    df = df[df['층'] >= 0]
+    train, test = train_test_split(df, test_size=0.2, random_state=42)
+
+    # 위치 가격 특징은 학습 세트 거래만으로 계산 (테스트 세트 가격이 학습 특징에 섞이지 않음)
+    location.fit(train)
+    train, test = [location.transform(part)[location_columns].dropna(subset=FEATURE_COLUMNS) for part in (train, test)]
+    model = StreamingOLS().fit(train.drop(columns=['거래금액']), train['거래금액'])
+    metrics = RegressionMetrics().update(test['거래금액'], model.predict(test.drop(columns=['거래금액'])))
+    report_regression(model, metrics, ' (Location)')
+    return model
+
+
+def evaluate_location_chunked(load_chunks, location, n_folds=5):
+    print("=====위치 특징 추가=====")
+    # 1차 패스 : evaluate_chunked와 같은 행 위치 해시 분할의 학습 폴드 거래만으로 위치 가격 특징 누적
+    location.reset()
+    start = 0
+    for chunk in load_chunks():
+        test = assign_folds(start, len(chunk), n_folds) == 0
+        start += len(chunk)
+        location.partial_fit(chunk[~test & (chunk['층'] >= 0).to_numpy()])
+    return evaluate_chunked(
+        lambda: (location.transform(chunk)[location_columns] for chunk in load_chunks()), '거래금액',
+        prepare=lambda chunk: (chunk['층'] >= 0) & chunk[FEATURE_COLUMNS].notna().all(axis=1), suffix=' (Location)',
+        n_folds=n_folds)
+
+
+def evaluate_final(data):
+    print("=====전처리후=====")
+    # 독립변수와 종속변수 분리
+    X = data.drop(columns=['로그_거래금액'])  # 독립변수
+    y = data['로그_거래금액']  # 종속변수
+    return evaluate_regression(X, y)
+
+
+def plot_regression(data, output_file_path='DATA/image/08_linearRegression/가격상관_그래프.png', max_points=None):
+    # 데이터 샘플링
+    sample_data = data.sample(frac=0.1, random_state=42)  # 10% 샘플링
+
+    # 점 개수 상한 (max_points개보다 많으면 다시 샘플링, 데이터가 커져도 그리는 시간이 일정)
+    if max_points and len(sample_data) > max_points:
+        sample_data = sample_data.sample(n=max_points, random_state=42)
+
+    features = ['로그_전용면적', '로그_년식', '로그_층', '로그_아파트', '로그_도로명', '로그_법정동', '로그_지역']
+    plot_color = ['r', 'g', 'b', 'y', 'c', 'm', 'k']
+
+    # 투명도를 조정한 그래프 플로팅 및 저장
+    fig, axs = plt.subplots(figsize=(18, 18), ncols=3, nrows=3)
+    for i, f in enumerate(features):
+        row = int(i / 3)
+        col = i % 3
+        sns.regplot(x=f, y='로그_거래금액', data=sample_data, ax=axs[row][col], color=plot_color[i], scatter_kws={'alpha':0.3})
+
+    # 빈 서브플롯 삭제
+    if len(features) < 9:
+        for j in range(len(features), 9):
+            fig.delaxes(axs.flat[j])
+
+    plt.tight_layout()
+    plt.savefig(output_file_path)
+    plt.close(fig)
+    return [output_file_path]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='선형회귀 성능 평가 및 요소별 가격 선형 상관 그래프 저장')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='지정하면 전체를 메모리에 올리지 않고 N행씩 나눠 학습/평가 (그래프는 저장하지 않음)')
+    parser.add_argument('--location-features', action='store_true',
+                        help='09 단계 좌표로 만든 위치 특징(location_features.py 캐시)을 추가한 모델도 평가')
+    args = parser.parse_args()
+    models = {}
+    if args.location_features:
+        # 캐시된 공간 결합이 없을 때만 새로 계산
+        location = LocationFeatures.load()
+
+    if args.chunk_size:
+        print("=====전처리전=====")
+        selected_model = evaluate_chunked(
+            lambda: iter_dataset('first_preprocessed_data_org', columns=selected_columns, chunk_size=args.chunk_size),
+            '거래금액', prepare=lambda chunk: chunk['층'] >= 0, suffix=' (Selected)')
+        if args.location_features:
+            models['location_regression'] = evaluate_location_chunked(
+                lambda: iter_dataset('first_preprocessed_data_org', columns=selected_columns + KEY_COLUMNS,
+                                     chunk_size=args.chunk_size), location)
+        print("=====전처리후=====")
+        final_model = evaluate_chunked(
+            lambda: iter_dataset('final_preprocessed_data', chunk_size=args.chunk_size), '로그_거래금액')
+    else:
+        # 전처리 데이터에서 필요한 열만 로드
+        if args.location_features:
+            selected_data = load_dataset('first_preprocessed_data_org', columns=selected_columns + KEY_COLUMNS)
+            selected_model = evaluate_selected(selected_data)
+            models['location_regression'] = evaluate_location(selected_data, location)
+        else:
+            selected_model = evaluate_selected(load_dataset('first_preprocessed_data_org', columns=selected_columns))
+
+        # 최종 전처리 데이터 읽기
+        data = load_dataset('final_preprocessed_data')
+        final_model = evaluate_final(data)
+
+        plot_regression(data)
+
+    # 누적 통계 저장 (새 달의 데이터는 StreamingOLS.load(...).partial_fit(...)으로 이어서 학습)
+    models.update({'selected_regression': selected_model, 'final_regression': final_model})
+    print("회귀 모델을 저장했습니다:", *[model.save(name) for name, model in models.items()])
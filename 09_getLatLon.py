@@ -1,39 +1,58 @@
 import os
 import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+from address_index import AddressIndex
+from crawl_metrics import CrawlMetrics
+from geocode_cache import GeocodeCache
+from rate_limiter import RateLimiter
+from storage import load_dataset
+from trade_utils import build_road_address
 
 
 class AddressGeocoder:
-    def __init__(self, csv_file_path, api_key):
+    # csv_file_path가 None이면 storage의 수집 데이터셋(Parquet)에서 읽음
+    # cache_path : 주소별 좌표 캐시(SQLite), 이미 조회한 주소는 API를 호출하지 않음
+    # max_workers : 동시에 요청할 주소 수 / max_retries, backoff : HTTP 실패 시 재시도 횟수와 대기 시간(초, 2배씩 증가)
+    # checkpoint_every : N개 주소마다 result.csv와 캐시를 저장 (중단 후 재실행 시 이어서 수집)
+    # 주소 요청마다 상태 코드, 결과 상태, 바이트 수, 지연 시간, 재시도 횟수를 실행 폴더의 requests.jsonl에 기록
+    def __init__(self, csv_file_path, api_key, cache_path='DATA/lat_lon_data/geocode_cache.sqlite',
+                 api_url='https://api.vworld.kr/req/address', max_workers=1, max_retries=3, backoff=1.0,
+                 checkpoint_every=500, requests_per_second=None):
         self.csv_file_path = csv_file_path
         self.api_key = api_key
         self.address_csv_path = 'DATA/lat_lon_data/address_data.csv'
         self.log_dir = 'DATA/lat_lon_data'
+        self.cache = GeocodeCache(cache_path)
+        self.api_url = api_url
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint_every = checkpoint_every
+        self.rate_limiter = RateLimiter(requests_per_second, capacity=max_workers) if requests_per_second else None
+        self.metrics = None
+
+        # 모든 스레드가 연결을 재사용하도록 하나의 세션을 공유
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def create_address_csv(self):
-        # CSV 파일을 pandas 데이터 프레임으로 불러오기
-        data = pd.read_csv(self.csv_file_path)
-
-        # 필요한 컬럼만 추출하여 새로운 데이터프레임 생성
+        # 필요한 컬럼만 불러와 새로운 데이터프레임 생성
         selected_columns = ['거래금액', '전용면적', '건축년도', '층', '아파트', '도로명', '도로명건물본번호코드', '도로명건물부번호코드', '년', '월', '일']
-        new_data = data[selected_columns].copy()
-
-        # NaN 값을 0으로 대체
-        new_data.loc[:, '도로명건물본번호코드'] = new_data['도로명건물본번호코드'].fillna(0)
-        new_data.loc[:, '도로명건물부번호코드'] = new_data['도로명건물부번호코드'].fillna(0)
-
-        # 새로운 컬럼 '도로명주소' 생성
-        def create_road_address(row):
-            road_name = row['도로명']
-            main_code = int(row['도로명건물본번호코드'])
-            sub_code = int(row['도로명건물부번호코드'])
-            if sub_code == 0:
-                return f"{road_name} {main_code}"
-            else:
-                return f"{road_name} {main_code}-{sub_code}"
+        if self.csv_file_path is None:
+            new_data = load_dataset('total_apt_trade_data', columns=selected_columns)
+        else:
+            new_data = pd.read_csv(self.csv_file_path, usecols=selected_columns)[selected_columns].copy()
 
-        new_data.loc[:, '도로명주소'] = new_data.apply(create_road_address, axis=1)
+        # 새로운 컬럼 '도로명주소' 생성 (본번/부번 NaN 값은 0으로 처리, 부번이 0이면 본번만 사용)
+        new_data['도로명주소'] = build_road_address(new_data['도로명'], new_data['도로명건물본번호코드'],
+                                                new_data['도로명건물부번호코드'])
 
         # 불필요한 컬럼 드랍
         new_data.drop(columns=['도로명', '도로명건물본번호코드', '도로명건물부번호코드'], inplace=True)
@@ -50,71 +69,171 @@ class AddressGeocoder:
         print(unique_address_data.head(10))
         return unique_address_data
 
-    def get_lat_lon(self, data_frame):
+    def request_lat_lon(self, address):
+        # 주소 하나의 좌표 요청, 반환값 : (상태, 위도, 경도, 메시지)
+        # 상태 : OK / NOT_FOUND(결과 없음) / ERROR(API 에러 또는 재시도 후에도 HTTP 실패)
+        params = {
+            "service": "address",
+            "request": "getcoord",
+            "crs": "epsg:4326",
+            "address": address,
+            "format": "json",
+            "type": "road",
+            "key": self.api_key
+        }
+        message = None
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            started_at = time.perf_counter()
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=10)
+            except requests.RequestException as e:
+                response = None
+                message = f"API Error: {e}"
+                continue
+            finally:
+                latency = time.perf_counter() - started_at
+            if response.status_code != 200:
+                message = f"API Error: {response.status_code}"
+                continue
+
+            # JSON이 아니거나(점검 페이지 등) 필드가 빠진 응답은 일시적 오류로 보고 재시도
+            try:
+                data = response.json()
+                api_status = data['response']['status']
+                if api_status == 'OK':
+                    point = data['response']['result']['point']
+                    lat, lon = point.get('y'), point.get('x')
+                    lat, lon = (float(lat), float(lon)) if lat is not None and lon is not None else (None, None)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                message = f"API Error: 잘못된 응답 ({type(e).__name__}: {e})"
+                continue
+            self.record_request(address, latency, response, api_status, attempt)
+            if api_status == 'OK':
+                if lat is not None:
+                    return 'OK', lat, lon, None
+                return 'NOT_FOUND', None, None, "API Error: 결과가 없습니다."
+            status = 'NOT_FOUND' if api_status == 'NOT_FOUND' else 'ERROR'
+            return status, None, None, f"API Error: {api_status}"
+        self.record_request(address, latency, response, None, self.max_retries)
+        return 'ERROR', None, None, message
+
+    def record_request(self, address, latency, response, api_status, retries):
+        # 주소 요청 한 건의 계측 이벤트 기록 (latency는 마지막 시도의 지연 시간, 결과 없음(NOT_FOUND)은 에러가 아님)
+        if self.metrics is not None:
+            found = api_status == 'OK'
+            self.metrics.record(latency, response.status_code if response is not None else None, api_status,
+                                len(response.content) if response is not None else 0, int(found), retries,
+                                error=api_status not in ('OK', 'NOT_FOUND'), 주소=address)
+
+    def find_unfinished_folder(self):
+        # log.txt 없이 result.csv만 있는 가장 최근 폴더 = 중간에 멈춘 실행
+        if not os.path.isdir(self.log_dir):
+            return None
+        folders = sorted(f.path for f in os.scandir(self.log_dir) if f.is_dir())
+        for folder in reversed(folders):
+            if os.path.exists(os.path.join(folder, 'result.csv')) and not os.path.exists(os.path.join(folder, 'log.txt')):
+                return folder
+        return None
+
+    def get_lat_lon(self, data_frame, resume=True):
         total_addresses = len(data_frame)
         error_count = 0
         error_addresses = []
 
-        # 현재 날짜와 시간을 사용하여 폴더 생성
-        current_datetime = datetime.datetime.now()
-        folder_name = current_datetime.strftime('%Y%m%d_%H%M%S')
-        folder_path = os.path.join(self.log_dir, folder_name)
-        os.makedirs(folder_path, exist_ok=True)
+        # 중단된 실행이 있으면 그 폴더에 이어서 저장, 없으면 현재 날짜와 시간을 사용하여 폴더 생성
+        folder_path = self.find_unfinished_folder() if resume else None
+        if folder_path is None:
+            current_datetime = datetime.datetime.now()
+            folder_name = current_datetime.strftime('%Y%m%d_%H%M%S')
+            folder_path = os.path.join(self.log_dir, folder_name)
+            os.makedirs(folder_path, exist_ok=True)
 
         # 결과를 CSV 파일로 저장할 경로 설정
         result_csv_path = os.path.join(folder_path, 'result.csv')
+        self.metrics = CrawlMetrics(os.path.join(folder_path, 'requests.jsonl'), 'vworld')
+
+        # 이전 체크포인트에서 이미 좌표를 얻은 주소
+        done_results = {}
+        if os.path.exists(result_csv_path):
+            checkpoint = pd.read_csv(result_csv_path, usecols=['도로명주소', '위도', '경도']).dropna()
+            done_results = {address: (lat, lon) for address, lat, lon in checkpoint.itertuples(index=False)}
+            print(f"{folder_path}에서 이어서 수집합니다. (완료된 주소 {len(done_results)}개)")
 
         # '위도'와 '경도' 열 추가
         data_frame['위도'] = None
         data_frame['경도'] = None
 
-        for index, row in data_frame.iterrows():
-            address = row['도로명주소']
-            apiurl = "https://api.vworld.kr/req/address?"
-            params = {
-                "service": "address",
-                "request": "getcoord",
-                "crs": "epsg:4326",
-                "address": address,
-                "format": "json",
-                "type": "road",
-                "key": self.api_key
-            }
-            response = requests.get(apiurl, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                if data['response']['status'] == 'OK':
-                    lon = data['response']['result']['point'].get('x')
-                    lat = data['response']['result']['point'].get('y')
-                    if lon is not None and lat is not None:
-                        # 기존 데이터프레임에 위도와 경도 열 추가
-                        data_frame.at[index, '위도'] = lat
-                        data_frame.at[index, '경도'] = lon
-                        print(f"[{index + 1}/{total_addresses}] 주소: {address}, 위도: {lat}, 경도: {lon}")
-                    else:
-                        print(f"[{index + 1}/{total_addresses}] API Error: 결과가 없습니다.")
-                        error_count += 1
-                        error_addresses.append(address)
+        # 체크포인트나 캐시에 있는 주소는 API 요청 없이 사용
+        self.cache.reset_stats()
+        cached_results = self.cache.get_many(data_frame['도로명주소'])
+        pending = []
+        for index, address in data_frame['도로명주소'].items():
+            cached = cached_results.get(GeocodeCache.normalize_address(address))
+            if address in done_results:
+                data_frame.at[index, '위도'], data_frame.at[index, '경도'] = done_results[address]
+            elif cached is not None:
+                status, lat, lon = cached
+                if status == 'OK':
+                    data_frame.at[index, '위도'] = lat
+                    data_frame.at[index, '경도'] = lon
                 else:
-                    print(f"[{index + 1}/{total_addresses}] API Error: {data['response']['status']}")
                     error_count += 1
                     error_addresses.append(address)
             else:
-                print(f"[{index + 1}/{total_addresses}] API Error: {response.status_code}")
-                error_count += 1
-                error_addresses.append(address)
+                pending.append((index, address))
+        print(f"요청할 주소 {len(pending)}개 / 전체 {total_addresses}개 ({self.cache.stats_line()})")
+
+        # 남은 주소를 max_workers개씩 동시에 요청하고, 결과 기록과 체크포인트 저장은 메인 스레드에서 처리
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.request_lat_lon, address): (index, address) for index, address in pending}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index, address = futures[future]
+                status, lat, lon, message = future.result()
+                if status == 'OK':
+                    # 기존 데이터프레임에 위도와 경도 열 추가
+                    data_frame.at[index, '위도'] = lat
+                    data_frame.at[index, '경도'] = lon
+                    print(f"[{index + 1}/{total_addresses}] 주소: {address}, 위도: {lat}, 경도: {lon}")
+                else:
+                    print(f"[{index + 1}/{total_addresses}] {message}")
+                    error_count += 1
+                    error_addresses.append(address)
+                # 결과 없음(NOT_FOUND)까지만 캐시하고 키 오류, HTTP 실패 등 일시적인 실패는 다음 실행에서 다시 요청
+                if status in ('OK', 'NOT_FOUND'):
+                    self.cache.put(address, status, lat, lon, commit=False)
+
+                if completed % self.checkpoint_every == 0:
+                    self.cache.commit()
+                    data_frame.to_csv(result_csv_path, index=False)
+                    print(f"체크포인트 저장: {completed}/{len(pending)}개 요청 완료 ({self.metrics.rolling_line()})")
+
+        self.cache.commit()
+        print(self.cache.stats_line())
+        print(f"요청 계측: {self.metrics.summary_line()}")
 
         # 결과를 DataFrame으로 변환하여 CSV 파일로 저장
         data_frame.to_csv(result_csv_path, index=False)
 
-        # 로그 파일에 기록
+        # 새로 얻은 좌표를 주소 사전에 추가
+        self.update_address_index(data_frame)
+
+        # 로그 파일에 기록 (log.txt가 있으면 완료된 실행으로 간주)
         self.log_result(total_addresses, error_count, error_addresses, result_csv_path)
+        self.metrics.close()
 
     def log_result(self, total_addresses, error_count, error_addresses, result_csv_path):
         # 결과를 로그 파일에 기록
         log_file_path = os.path.join(os.path.dirname(result_csv_path), 'log.txt')
-        with open(log_file_path, 'w') as log_file:
+        with open(log_file_path, 'w', encoding='utf-8') as log_file:
             log_file.write(f"최종결과: {total_addresses}개의 데이터 수집, {error_count}개의 에러 발생\n")
+            log_file.write(f"좌표 캐시: {self.cache.stats_line()}\n")
+            if self.metrics is not None:
+                log_file.write(f"요청 계측: {self.metrics.summary_line()}\n")
             log_file.write("에러 발생한 주소:\n")
             for address in error_addresses:
                 log_file.write(address + '\n')
@@ -148,29 +267,29 @@ class AddressGeocoder:
                 merged_df.to_csv(merged_csv_path, index=False)
                 print(f"병합된 결과가 {merged_csv_path} 파일로 저장되었습니다.")
                 print(f"총 {total_data_count}개의 데이터를 가져왔으며, 중복을 제거한 후 {len(merged_df)}개의 데이터가 남았습니다.")
+                self.update_address_index(merged_df)
             else:
                 print("병합할 데이터가 없습니다.")
         except Exception as e:
             print(f"오류 발생: {e}")
 
-    def merge_dataframes(self):
-        # 데이터 불러오기
-        total_data = pd.read_csv('DATA/lat_lon_data/total_lat_lon_data.csv')
-        address_data = pd.read_csv('DATA/lat_lon_data/address_data.csv')
-
-        # 중복된 도로명 주소를 기준으로 병합
-        merged_data = pd.merge(total_data, address_data, on='도로명주소', how='inner', suffixes=('_total', '_address'))
+    def update_address_index(self, data_frame):
+        # 주소 사전(도로명주소 -> id, 좌표)에 새 주소만 추가하고 좌표 갱신
+        address_index = AddressIndex.load()
+        added_count = address_index.update(data_frame['도로명주소'], data_frame['위도'], data_frame['경도'])
+        address_index.save()
+        print(f"주소 사전 갱신: 새 주소 {added_count}개 추가 (전체 {len(address_index)}개)")
+        return address_index
 
-        # 불필요한 열 삭제
-        merged_data.drop(columns=['거래금액_total', '전용면적_total', '건축년도_total', '층_total', '아파트_total'],
-                         inplace=True)
-
-        # 열 이름 변경
-        merged_data.rename(columns={'거래금액_address': '거래금액', '전용면적_address': '전용면적', '건축년도_address': '건축년도',
-                                    '층_address': '층', '아파트_address': '아파트'}, inplace=True)
+    def merge_dataframes(self):
+        # 주소 사전 불러오기 (사전이 아직 없으면 합쳐진 좌표 결과로 생성)
+        address_index = AddressIndex.load()
+        if len(address_index) == 0:
+            address_index = self.update_address_index(pd.read_csv('DATA/lat_lon_data/total_lat_lon_data.csv'))
+        address_data = pd.read_csv(self.address_csv_path)
 
-        # 결측치가 있는 행 삭제
-        merged_data.dropna(subset=['위도', '경도'], inplace=True)
+        # 도로명주소를 id로 조회해 위도/경도 열만 추가하고, 좌표가 없는 행은 삭제
+        merged_data = address_index.attach_coordinates(address_data)
 
         # 결과 출력
         print("=" * 50)
@@ -182,20 +301,22 @@ class AddressGeocoder:
 
 
 # 사용 예시
-csv_file_path = 'DATA/org_crawling_data/total_apt_trade_data.csv'
-api_key = ""
-geocoder = AddressGeocoder(csv_file_path, api_key)
+if __name__ == '__main__':
+    csv_file_path = None  # None이면 DATA/parquet/total_apt_trade_data 사용
+    api_key = ""
+    # 8개 주소씩 동시에 요청, 500개마다 체크포인트 저장 (중단 후 다시 실행하면 이어서 수집)
+    geocoder = AddressGeocoder(csv_file_path, api_key, max_workers=8, checkpoint_every=500)
 
-# 첫 번째 단계: CSV 파일에서 도로명 주소 생성하고 저장
-# geocoder.create_address_csv()
+    # 첫 번째 단계: CSV 파일에서 도로명 주소 생성하고 저장
+    # geocoder.create_address_csv()
 
-# 두 번째 단계: 중복값 제거
-# unique_data = geocoder.remove_duplicate_addresses()
+    # 두 번째 단계: 중복값 제거
+    # unique_data = geocoder.remove_duplicate_addresses()
 
-# 세 번째 단계: 위도 경도 가져오기
-# geocoder.get_lat_lon(unique_data)
+    # 세 번째 단계: 위도 경도 가져오기
+    # geocoder.get_lat_lon(unique_data)
 
-# 네 번째 단계: 전체 파일 합치기
-# geocoder.merge_result_csvs()
+    # 네 번째 단계: 전체 파일 합치기
+    # geocoder.merge_result_csvs()
 
-geocoder.merge_dataframes()
\ No newline at end of file
+    geocoder.merge_dataframes()
@@ -1,29 +1,113 @@
+import argparse
 import folium
+import numpy as np
 import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
 from folium.plugins import HeatMap
+from address_index import AddressIndex
+from spatial_aggregation import aggregate_cells, write_zoom_tiles
+from trade_utils import build_ymd_key, parse_price
 
-# CSV 파일 불러오기
-df = pd.read_csv("DATA/lat_lon_data/folium_data.csv")
 
-# 년, 월, 일 합친 날짜 컬럼 생성
-df['년월일'] = df['년'] * 10000 + df['월'] * 100 + df['일']
+class LazyHeatTiles(MacroElement):
+    # 지도 줌이 바뀔 때마다 해당 줌 레벨의 집계 파일({tile_dir}/{줌}.js)을 <script>로 불러와 히트맵 데이터 교체
+    # 범위 밖의 줌은 가장 가까운 줌 레벨 파일 사용, 한 번 불러온 파일은 다시 불러오지 않음
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var layer = {{ this.layer.get_name() }};
+            var requested = {};
+            window.heatTiles = window.heatTiles || {};
+            function currentZoom() {
+                return Math.max({{ this.min_zoom }}, Math.min({{ this.max_zoom }}, map.getZoom()));
+            }
+            function loadTiles() {
+                var zoom = currentZoom();
+                if (window.heatTiles[zoom]) {
+                    layer.setLatLngs(window.heatTiles[zoom]);
+                    return;
+                }
+                if (requested[zoom]) {
+                    return;
+                }
+                requested[zoom] = true;
+                var script = document.createElement('script');
+                script.src = {{ this.tile_dir|tojson }} + '/' + zoom + '.js';
+                script.onload = function() {
+                    if (currentZoom() === zoom) {
+                        layer.setLatLngs(window.heatTiles[zoom]);
+                    }
+                };
+                document.head.appendChild(script);
+            }
+            map.on('zoomend', loadTiles);
+            loadTiles();
+        })();
+        {% endmacro %}
+    """)
 
-# 2020년 이전 데이터 제거
-df = df[df['년월일'] >= 20230101]
+    def __init__(self, layer, tile_dir, min_zoom, max_zoom):
+        super().__init__()
+        self._name = 'LazyHeatTiles'
+        self.layer = layer
+        self.tile_dir = tile_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
 
-# 거래금액 열의 문자열 형식 수정 (쉼표 제거 및 숫자로 변환)
-df['거래금액'] = df['거래금액'].str.replace(',', '').astype(int)
 
-# Heatmap을 위한 데이터 포맷으로 변환
-heat_data = [[row['위도'], row['경도'], row['거래금액']] for index, row in df.iterrows()]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='거래금액 히트맵 지도 생성')
+    parser.add_argument('--mode', choices=['tiles', 'inline'], default='tiles',
+                        help='tiles : 줌 레벨별 집계 파일을 따로 저장하고 지도에서 필요할 때 불러옴 / '
+                             'inline : 한 줌 레벨로 집계한 점을 HTML에 포함')
+    parser.add_argument('--weight', choices=['price', 'count'], default='price',
+                        help='셀 가중치 (price : 거래금액 합계, count : 거래 건수)')
+    parser.add_argument('--since', type=int, default=20230101, help='이 날짜(년월일) 이후 거래만 사용')
+    parser.add_argument('--cell-px', type=int, default=8, help='집계 셀 크기 (화면 픽셀)')
+    parser.add_argument('--percentile', type=float, default=99,
+                        help='줌 레벨마다 셀 가중치를 이 백분위 값으로 나눠 0~1 강도로 맞춤 (100이면 최댓값)')
+    args = parser.parse_args()
 
-# Folium 지도 객체 생성
-m = folium.Map(location=[df['위도'].mean(), df['경도'].mean()], zoom_start=12)
+    # 거래 데이터 불러오기 (위도/경도는 주소 사전에서 조회, 사전이 없으면 09 단계에서 합친 CSV 사용)
+    address_index = AddressIndex.load()
+    if len(address_index):
+        df = pd.read_csv("DATA/lat_lon_data/address_data.csv", usecols=['거래금액', '년', '월', '일', '도로명주소'])
+    else:
+        df = pd.read_csv("DATA/lat_lon_data/folium_data.csv")
 
-# Heatmap 추가
-HeatMap(heat_data,
-        gradient={0.2: 'blue', 0.4: 'cyan', 0.6: 'lime', 0.8: 'yellow', 1: 'red'},
-        radius=15, blur=10, max_zoom=15, min_opacity=0.5).add_to(m)
+    # 년, 월, 일 합친 날짜 컬럼 생성
+    df['년월일'] = build_ymd_key(df['년'], df['월'], df['일'])
 
-# 지도를 HTML 파일로 저장
-m.save('DATA/folium/heatmap.html')
+    # 기준일 이전 데이터 제거
+    df = df[df['년월일'] >= args.since]
+    if len(address_index):
+        df = address_index.attach_coordinates(df)
+
+    # 거래금액 열의 문자열 형식 수정 (쉼표 제거 및 숫자로 변환, 이미 숫자면 그대로 사용)
+    df['거래금액'] = parse_price(df['거래금액'])
+    weights = df['거래금액'].to_numpy() if args.weight == 'price' else np.ones(len(df))
+
+    # Folium 지도 객체 생성
+    zoom_start, min_zoom, max_zoom = 12, 8, 15
+    m = folium.Map(location=[df['위도'].mean(), df['경도'].mean()], zoom_start=zoom_start)
+    # 점 강도는 0~1로 정규화해 넘기므로 Leaflet.heat의 max(기본 1.0)를 그대로 사용
+    heatmap_options = {'gradient': {0.2: 'blue', 0.4: 'cyan', 0.6: 'lime', 0.8: 'yellow', 1: 'red'},
+                       'radius': 15, 'blur': 10, 'max_zoom': max_zoom, 'min_opacity': 0.5}
+
+    if args.mode == 'tiles':
+        # 줌 레벨별 집계 파일 저장 후 빈 히트맵에 현재 줌 레벨 데이터만 불러오도록 연결
+        point_counts = write_zoom_tiles(df['위도'], df['경도'], weights, 'DATA/folium/heatmap_tiles',
+                                        range(min_zoom, max_zoom + 1), args.cell_px, args.percentile)
+        print(f"거래 {len(df)}건 -> 줌 레벨별 집계 점 개수: {point_counts}")
+        heat_layer = HeatMap([], **heatmap_options).add_to(m)
+        LazyHeatTiles(heat_layer, 'heatmap_tiles', min_zoom, max_zoom).add_to(m)
+    else:
+        # 시작 줌 레벨로 집계한 점만 HTML에 포함 (행 단위 반복 없이 배열에서 바로 변환)
+        cells = aggregate_cells(df['위도'], df['경도'], weights, zoom_start, args.cell_px, args.percentile)
+        print(f"거래 {len(df)}건 -> 집계 점 {len(cells)}개")
+        HeatMap(cells[['위도', '경도', '강도']].to_numpy().tolist(), **heatmap_options).add_to(m)
+
+    # 지도를 HTML 파일로 저장
+    m.save('DATA/folium/heatmap.html')
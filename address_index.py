@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from storage import dataset_exists, load_dataset, save_dataset
+
+
+class AddressIndex:
+    # 고유 도로명주소 -> 정수 id와 좌표(위도, 경도) 사전
+    # id는 주소가 추가된 순서대로 부여하고 바뀌지 않으므로 좌표 배열의 위치로 바로 사용
+    # 거래 데이터와의 결합은 문자열 merge 대신 주소 -> id 조회 후 좌표 배열에서 꺼내는 방식
+    def __init__(self, addresses=(), lat=(), lon=()):
+        self.addresses = pd.Index(list(addresses), dtype=object)
+        self.lat = np.asarray(lat, dtype='float64')
+        self.lon = np.asarray(lon, dtype='float64')
+
+    @classmethod
+    def load(cls):
+        # 저장된 사전이 없으면 빈 사전
+        if not dataset_exists('address_index'):
+            return cls()
+        df = load_dataset('address_index').sort_values('address_id')
+        return cls(df['도로명주소'], df['위도'], df['경도'])
+
+    def save(self):
+        return save_dataset(pd.DataFrame({'address_id': np.arange(len(self), dtype='int64'), '도로명주소': self.addresses,
+                                          '위도': self.lat, '경도': self.lon}), 'address_index')
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def lookup(self, addresses):
+        # 주소별 id 배열 (사전에 없는 주소는 -1), 중복 주소는 고유값만 조회
+        codes, uniques = pd.factorize(pd.Series(addresses, dtype=object))
+        unique_ids = self.addresses.get_indexer(uniques) if len(self) else np.full(len(uniques), -1)
+        return np.append(unique_ids, -1)[codes]
+
+    def update(self, addresses, lat, lon):
+        # 새 주소는 뒤에 추가하고, 이미 있는 주소는 좌표가 있는 경우에만 갱신 (같은 주소가 여러 번이면 마지막 좌표 사용)
+        # 반환값 : 새로 추가된 주소 수
+        results = pd.DataFrame({'도로명주소': pd.Series(addresses, dtype=object).to_numpy(),
+                                '위도': pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy(),
+                                '경도': pd.to_numeric(pd.Series(lon), errors='coerce').to_numpy()})
+        results = results.dropna(subset=['도로명주소'])
+        found = results.dropna(subset=['위도', '경도']).drop_duplicates('도로명주소', keep='last')
+        new_addresses = results['도로명주소'].drop_duplicates()
+        new_addresses = new_addresses[self.addresses.get_indexer(new_addresses) < 0] if len(self) else new_addresses
+
+        self.addresses = self.addresses.append(pd.Index(new_addresses.to_numpy(), dtype=object))
+        self.lat = np.append(self.lat, np.full(len(new_addresses), np.nan))
+        self.lon = np.append(self.lon, np.full(len(new_addresses), np.nan))
+        ids = self.addresses.get_indexer(found['도로명주소'])
+        self.lat[ids] = found['위도'].to_numpy()
+        self.lon[ids] = found['경도'].to_numpy()
+        return len(new_addresses)
+
+    def attach_coordinates(self, df, address_column='도로명주소', dropna=True):
+        # df에 위도/경도 열만 추가 (dropna=True면 좌표가 없는 행 제외)
+        ids = self.lookup(df[address_column])  # -1이면 맨 뒤에 붙인 NaN을 가리킴
+        result = df.copy()
+        result['위도'] = np.append(self.lat, np.nan)[ids]
+        result['경도'] = np.append(self.lon, np.nan)[ids]
+        if dropna:
+            result = result[result['위도'].notna() & result['경도'].notna()]
+        return result
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 저장소 최상위 폴더를 import 경로에 추가 (storage.py 사용)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from storage import DATASETS, clean_trade_columns, load_dataset, save_dataset
+
+AREAS = ['수원 권선', '수원 영통', '수원 장안', '수원 팔달', '성남 분당', '성남 수정', '성남 중원', '평택']
+
+
+def make_trade_data(row_count):
+    # 01_dataCrawling.py 결과와 같은 컬럼 구성의 합성 거래 데이터 (거래금액은 쉼표 문자열)
+    rng = np.random.default_rng(0)
+    apt = rng.integers(0, 3000, row_count)
+    price = rng.integers(5000, 200000, row_count)
+    return pd.DataFrame({
+        '거래금액': pd.Series(price).map('{:,}'.format), '전용면적': rng.uniform(20, 200, row_count).round(2),
+        '건축년도': rng.integers(1980, 2023, row_count), '층': rng.integers(1, 40, row_count),
+        '아파트': pd.Series(apt).map('아파트{}'.format), '법정동': pd.Series(apt % 60).map('동{}'.format),
+        '지번': pd.Series(apt).map(str), '년': rng.integers(2000, 2024, row_count), '월': rng.integers(1, 13, row_count),
+        '일': rng.integers(1, 29, row_count), '도로명': pd.Series(apt % 400).map('도로{}길'.format),
+        '도로명건물본번호코드': apt % 90, '도로명건물부번호코드': apt % 3, '법정동본번코드': apt % 500,
+        '법정동부번코드': 0, '법정동시군구코드': 41135, '법정동읍면동코드': 10100, '법정동지번코드': 1,
+        '지역': np.array(AREAS)[rng.integers(0, len(AREAS), row_count)],
+    })
+
+
+def measure(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def folder_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main(row_count=1_000_000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        df = make_trade_data(row_count)
+        dataset = DATASETS['total_apt_trade_data']
+        os.makedirs(os.path.dirname(dataset['csv_path']), exist_ok=True)
+        df.to_csv(dataset['csv_path'], index=False)
+        save_dataset(clean_trade_columns(df), 'total_apt_trade_data')
+
+        print(f"합성 거래 데이터 {row_count:,}행")
+        print(f"파일 크기  CSV {folder_size(dataset['csv_path']) / 2 ** 20:8.1f}MB  "
+              f"Parquet {folder_size(dataset['parquet_path']) / 2 ** 20:8.1f}MB")
+
+        cases = [
+            ('전체 컬럼', None, None),
+            ("'거래금액' 1개 컬럼", ['거래금액'], None),
+            ("'성남 분당' 2023년", ['거래금액', '전용면적'], [('지역', '=', '성남 분당'), ('년', '=', 2023)]),
+        ]
+        for name, columns, filters in cases:
+            def load_csv():
+                usecols = columns + [column for column, _, _ in filters] if filters else columns
+                data = clean_trade_columns(pd.read_csv(dataset['csv_path'], usecols=usecols))
+                for column, _, value in filters or []:
+                    data = data[data[column] == value]
+                return data
+
+            csv_time = measure(load_csv)
+            parquet_time = measure(lambda: load_dataset('total_apt_trade_data', columns=columns, filters=filters))
+            print(f"{name:<20} CSV {csv_time:7.3f}s  Parquet {parquet_time:7.3f}s  x{csv_time / parquet_time:.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# 저장소 최상위 폴더를 import 경로에 추가 (trade_utils.py 사용)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from trade_utils import build_road_address, build_ymd_key, parse_price
+
+
+def make_trade_data(row_count):
+    # 09_getLatLon.py / 10_folium.py 입력과 같은 컬럼의 합성 거래 데이터 (본번/부번 일부 NaN, 거래금액은 쉼표 문자열)
+    rng = np.random.default_rng(0)
+    apt = rng.integers(0, 20000, row_count)
+    main_code = pd.Series(apt % 900 + 1, dtype='float64')
+    main_code[rng.random(row_count) < 0.01] = np.nan
+    sub_code = pd.Series(apt % 7 // 4 * (apt % 13), dtype='float64')
+    sub_code[rng.random(row_count) < 0.05] = np.nan
+    return pd.DataFrame({
+        '거래금액': pd.Series(rng.integers(5000, 200000, row_count) // 10 * 10).map('{:,}'.format),
+        '도로명': pd.Series(apt % 4000).map('도로{}길'.format), '도로명건물본번호코드': main_code,
+        '도로명건물부번호코드': sub_code, '년': rng.integers(2000, 2024, row_count),
+        '월': rng.integers(1, 13, row_count), '일': rng.integers(1, 29, row_count),
+    })
+
+
+def road_address_before(df):
+    # 기존 09_getLatLon.py의 행 단위 apply 방식
+    df = df.copy()
+    df['도로명건물본번호코드'] = df['도로명건물본번호코드'].fillna(0)
+    df['도로명건물부번호코드'] = df['도로명건물부번호코드'].fillna(0)
+
+    def create_road_address(row):
+        road_name = row['도로명']
+        main_code = int(row['도로명건물본번호코드'])
+        sub_code = int(row['도로명건물부번호코드'])
+        if sub_code == 0:
+            return f"{road_name} {main_code}"
+        else:
+            return f"{road_name} {main_code}-{sub_code}"
+
+    return df.apply(create_road_address, axis=1)
+
+
+def ymd_key_before(df):
+    # 기존 10_folium.py의 컬럼 연산 방식 (int64 키)
+    return df['년'] * 10000 + df['월'] * 100 + df['일']
+
+
+def price_before(df):
+    # 기존 storage.py의 문자열 처리 방식 (모든 행의 문자열을 각각 변환)
+    return df['거래금액'].astype(str).str.replace(',', '').str.strip().astype('int64')
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(row_count=5_000_000):
+    df = make_trade_data(row_count)
+    print(f"합성 거래 데이터 {row_count:,}행")
+
+    cases = [
+        ('도로명주소', lambda: road_address_before(df),
+         lambda: build_road_address(df['도로명'], df['도로명건물본번호코드'], df['도로명건물부번호코드'])),
+        ('년월일 키', lambda: ymd_key_before(df), lambda: build_ymd_key(df['년'], df['월'], df['일'])),
+        ('거래금액', lambda: price_before(df), lambda: parse_price(df['거래금액'])),
+    ]
+    for name, before, after in cases:
+        expected, before_time = measure(before)
+        result, after_time = measure(after)
+        assert (np.asarray(expected) == np.asarray(result)).all(), f"{name} 결과가 다릅니다"
+        print(f"{name:<8} 기존 {row_count / before_time:>14,.0f}행/초 ({before_time:6.2f}s)  "
+              f"변경 {row_count / after_time:>14,.0f}행/초 ({after_time:6.2f}s)  x{before_time / after_time:.1f}  결과 동일")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
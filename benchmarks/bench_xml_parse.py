@@ -0,0 +1,114 @@
+import importlib
+import os
+import sys
+import tempfile
+import timeit
+import xml.etree.ElementTree as ET
+
+# 저장소 최상위 폴더를 import 경로에 추가 (01_dataCrawling.py 사용)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+crawling = importlib.import_module('01_dataCrawling')
+
+
+# 기준선 : iterparse 이전 수집기의 파싱 방식 (ET.fromstring으로 트리 전체를 만든 뒤 item마다 필드별 find를 두 번씩 호출)
+def parse_response(response):
+    try:
+        xml_content = response.content.decode('utf-8')
+        root = ET.fromstring(xml_content)
+        result_code = root.find('.//resultCode').text if root.find('.//resultCode') is not None else ''
+        result_msg = root.find('.//resultMsg').text
+        items = root.findall('.//item')
+        return result_code, result_msg, items
+    except ET.ParseError as e:
+        return None, f"데이터 파싱 에러: {e}", None
+
+
+def extract_data_from_items(items, area_name):
+    rows = []
+    for item in items:
+        row = {
+            '거래금액': item.find('.//거래금액').text.strip() if item.find('.//거래금액') is not None else '',
+            '전용면적': item.find('.//전용면적').text.strip() if item.find('.//전용면적') is not None else '',
+            '건축년도': item.find('.//건축년도').text.strip() if item.find('.//건축년도') is not None else '',
+            '층': item.find('.//층').text.strip() if item.find('.//층') is not None else '',
+            '아파트': item.find('.//아파트').text.strip() if item.find('.//아파트') is not None else '',
+            '법정동': item.find('.//법정동').text.strip() if item.find('.//법정동') is not None else '',
+            '지번': item.find('.//지번').text.strip() if item.find('.//지번') is not None else '',
+            '년': item.find('.//년').text.strip() if item.find('.//년') is not None else '',
+            '월': item.find('.//월').text.strip() if item.find('.//월') is not None else '',
+            '일': item.find('.//일').text.strip() if item.find('.//일') is not None else '',
+            '도로명': item.find('.//도로명').text.strip() if item.find('.//도로명') is not None else '',
+            '도로명건물본번호코드': item.find('.//도로명건물본번호코드').text.strip() if item.find('.//도로명건물본번호코드') is not None else '',
+            '도로명건물부번호코드': item.find('.//도로명건물부번호코드').text.strip() if item.find('.//도로명건물부번호코드') is not None else '',
+            '법정동본번코드': item.find('.//법정동본번코드').text.strip() if item.find('.//법정동본번코드') is not None else '',
+            '법정동부번코드': item.find('.//법정동부번코드').text.strip() if item.find('.//법정동부번코드') is not None else '',
+            '법정동시군구코드': item.find('.//법정동시군구코드').text.strip() if item.find('.//법정동시군구코드') is not None else '',
+            '법정동읍면동코드': item.find('.//법정동읍면동코드').text.strip() if item.find('.//법정동읍면동코드') is not None else '',
+            '법정동지번코드': item.find('.//법정동지번코드').text.strip() if item.find('.//법정동지번코드') is not None else '',
+            '지역': area_name  # 지역 컬럼 추가
+        }
+        rows.append(row)
+    return rows
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+
+def make_response(item_count=1000):
+    # 실제 국토교통부 API 응답과 같은 구조의 합성 XML 생성
+    items = []
+    for i in range(item_count):
+        values = {
+            '거래금액': f'    {10000 + i * 13:,}', '전용면적': f'{59 + i % 30}.84', '건축년도': str(1990 + i % 30),
+            '층': str(1 + i % 20), '아파트': f'아파트{i % 17}', '법정동': f' 동{i % 5}', '지번': str(100 + i),
+            '년': '2023', '월': '5', '일': str(1 + i % 28), '도로명': f'길{i % 9}',
+            '도로명건물본번호코드': f'{i % 50:05d}', '도로명건물부번호코드': f'{i % 3:05d}',
+            '법정동본번코드': '0001', '법정동부번코드': '0000', '법정동시군구코드': '41135',
+            '법정동읍면동코드': '10100', '법정동지번코드': '1', '거래유형': '중개거래'
+        }
+        items.append('<item>' + ''.join(f'<{key}>{value}</{key}>' for key, value in values.items()) + '</item>')
+    xml = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?><response><header><resultCode>00</resultCode>'
+           '<resultMsg>NORMAL SERVICE.</resultMsg></header><body><items>' + ''.join(items) +
+           f'</items><numOfRows>1000</numOfRows><pageNo>1</pageNo><totalCount>{item_count}</totalCount></body></response>')
+    return FakeResponse(xml.encode('utf-8'))
+
+
+def main(item_count=1000, repeat=5, number=10):
+    response = make_response(item_count)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)  # 수집기 생성 시 만들어지는 폴더를 임시 폴더에 생성
+        collector = crawling.AptTradeDataCollector('', '', None, None, {})
+
+        def baseline_extractor():
+            _, _, items = parse_response(response)
+            return extract_data_from_items(items, '성남 분당')
+
+        def stream_rows():
+            rows = []
+            collector.parse_response_stream(response.content, '성남 분당', rows=rows)
+            return rows
+
+        def stream_columns():
+            columns = {}
+            collector.parse_response_stream(response.content, '성남 분당', columns=columns)
+            return columns
+
+        # 두 방식의 결과가 같은지 먼저 확인
+        assert baseline_extractor() == stream_rows()
+        assert len(stream_columns()['거래금액']) == item_count
+
+        print(f"합성 응답 {item_count}개 item, {len(response.content) / 1024:.0f}KB")
+        baseline = None
+        for name, func in [('기존 (find x 36)', baseline_extractor), ('iterparse (행)', stream_rows),
+                           ('iterparse (컬럼)', stream_columns)]:
+            best = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+            baseline = baseline or best
+            print(f"{name:<20} {best * 1000:8.2f} ms/응답  {item_count / best:12,.0f} 행/초  x{baseline / best:.2f}")
+
+
+if __name__ == '__main__':
+    main()
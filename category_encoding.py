@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+from storage import dataset_exists, load_dataset, save_dataset
+
+# 결과 열 이름 : '{열}_{방식}', 이 순서대로 반환
+ENCODER_NAMES = ['MEstimate', 'Ordinal', 'Target']
+
+
+def assign_folds(start, count, n_folds, random_state=42):
+    # 행 위치(start부터 count개)로 폴드 번호를 정함 (청크로 나눠 읽어도 같은 행은 같은 폴드)
+    positions = np.arange(start, start + count, dtype=np.uint64) + np.uint64(random_state)
+    mixed = positions * np.uint64(0x9E3779B97F4A7C15)
+    mixed ^= mixed >> np.uint64(31)
+    return (mixed % np.uint64(n_folds)).astype('int64')
+
+
+class CategoryEncoder:
+    # 범주형 열을 한 번씩만 factorize하고 범주별 건수/합계/제곱합을 bincount로 모아
+    # Ordinal, MEstimate, Target 인코딩 값을 같은 통계에서 계산 (category_encoders 2.6.3 기본값과 같은 식)
+    # partial_fit을 여러 번 호출하면 청크 단위로 통계를 누적 (Ordinal 번호는 처음 나온 순서)
+    # n_folds > 1이면 폴드별 건수/합계도 함께 모아 학습 데이터에 out-of-fold 값을 계산할 수 있음
+    def __init__(self, columns, m=0.5, min_samples_leaf=20, smoothing=10, n_folds=0):
+        self.columns = list(columns)
+        self.m = m
+        self.min_samples_leaf = min_samples_leaf
+        self.smoothing = smoothing
+        self.n_folds = n_folds
+        self.categories = {column: pd.Index([], dtype=object) for column in self.columns}
+        self.counts = {column: np.zeros(0, dtype='int64') for column in self.columns}
+        self.sums = {column: np.zeros(0) for column in self.columns}
+        self.sums_sq = {column: np.zeros(0) for column in self.columns}
+        self.fold_counts = {column: np.zeros((n_folds, 0), dtype='int64') for column in self.columns}
+        self.fold_sums = {column: np.zeros((n_folds, 0)) for column in self.columns}
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.fold_total_counts = np.zeros(n_folds, dtype='int64')
+        self.fold_total_sums = np.zeros(n_folds)
+
+    def partial_fit(self, df, y, folds=None):
+        # folds : 행별 폴드 번호 (n_folds > 1일 때 필요, assign_folds로 생성)
+        y = np.asarray(y, dtype='float64')
+        if self.n_folds > 1 and folds is None:
+            raise ValueError("n_folds > 1이면 행별 폴드 번호(folds)가 필요합니다")
+        for column in self.columns:
+            codes, uniques = pd.factorize(df[column])
+            valid = codes >= 0
+            chunk_codes = codes[valid]
+            size = len(uniques)
+            chunk_counts = np.bincount(chunk_codes, minlength=size)
+            chunk_sums = np.bincount(chunk_codes, weights=y[valid], minlength=size)
+            chunk_sums_sq = np.bincount(chunk_codes, weights=y[valid] ** 2, minlength=size)
+
+            # 처음 보는 범주는 뒤에 추가하고, 전체 범주 위치에 청크 통계를 더함
+            positions = self.categories[column].get_indexer(uniques)
+            new = positions < 0
+            if new.any():
+                new_count = new.sum()
+                positions[new] = len(self.categories[column]) + np.arange(new_count)
+                self.categories[column] = self.categories[column].append(pd.Index(uniques[new], dtype=object))
+                self.counts[column] = np.append(self.counts[column], np.zeros(new_count, dtype='int64'))
+                self.sums[column] = np.append(self.sums[column], np.zeros(new_count))
+                self.sums_sq[column] = np.append(self.sums_sq[column], np.zeros(new_count))
+                if self.n_folds > 1:
+                    self.fold_counts[column] = np.pad(self.fold_counts[column], ((0, 0), (0, new_count)))
+                    self.fold_sums[column] = np.pad(self.fold_sums[column], ((0, 0), (0, new_count)))
+            self.counts[column][positions] += chunk_counts
+            self.sums[column][positions] += chunk_sums
+            self.sums_sq[column][positions] += chunk_sums_sq
+
+            if self.n_folds > 1:
+                # (폴드, 범주)를 하나의 키로 묶어 모든 폴드의 통계를 bincount 한 번으로 계산
+                keys = np.asarray(folds)[valid] * size + chunk_codes
+                length = self.n_folds * size
+                self.fold_counts[column][:, positions] += np.bincount(keys, minlength=length).reshape(self.n_folds, size)
+                self.fold_sums[column][:, positions] += np.bincount(keys, weights=y[valid], minlength=length).reshape(
+                    self.n_folds, size)
+        self.total_count += len(y)
+        self.total_sum += y.sum()
+        if self.n_folds > 1:
+            self.fold_total_counts += np.bincount(folds, minlength=self.n_folds)
+            self.fold_total_sums += np.bincount(folds, weights=y, minlength=self.n_folds)
+        return self
+
+    def fit(self, df, y, folds=None):
+        return self.partial_fit(df, y, folds)
+
+    def prior(self):
+        return self.total_sum / self.total_count
+
+    def encode(self, sums, counts, prior, all_unique=False):
+        # 합계/건수로 MEstimate, Target 값 계산 (건수가 0인 범주는 prior)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = sums / counts
+
+            # MEstimate : (합계 + prior * m) / (건수 + m), 모든 값이 고유한 열은 prior
+            m_estimate = (sums + prior * self.m) / (counts + self.m)
+            if all_unique:
+                m_estimate = np.broadcast_to(prior, m_estimate.shape).astype('float64')
+
+            # Target : 건수에 따라 prior와 범주 평균을 가중 평균
+            smoove = 1 / (1 + np.exp(-(counts - self.min_samples_leaf) / self.smoothing))
+            target = prior * (1 - smoove) + mean * smoove
+        empty = counts == 0
+        return np.where(empty, prior, m_estimate), np.where(empty, prior, target)
+
+    def table(self, column):
+        # 범주별 통계와 인코딩 값 (전체 데이터 기준)
+        count = self.counts[column]
+        mean = self.sums[column] / count
+        m_estimate, target = self.encode(self.sums[column], count, self.prior(), len(count) == self.total_count)
+        return pd.DataFrame({'count': count, 'sum': self.sums[column], 'sum_sq': self.sums_sq[column],
+                             'std': np.sqrt(np.maximum(self.sums_sq[column] / count - mean ** 2, 0)),
+                             'MEstimate': m_estimate, 'Ordinal': np.arange(1, len(count) + 1), 'Target': target},
+                            index=self.categories[column])
+
+    def transform(self, df, folds=None):
+        # 인코딩 열만 float32로 반환 (학습에 없던 범주는 Ordinal -1, MEstimate/Target은 prior)
+        # folds를 주면 학습 데이터의 각 행을 자기 폴드를 뺀 나머지 폴드 통계로 인코딩 (out-of-fold)
+        if folds is not None and self.n_folds <= 1:
+            raise ValueError("out-of-fold 인코딩은 n_folds > 1로 학습한 경우에만 가능합니다")
+        prior = self.prior()
+        unknown = {'MEstimate': prior, 'Ordinal': -1, 'Target': prior}
+        positions = {column: self.categories[column].get_indexer(df[column]) for column in self.columns}
+        values = {}
+        for column in self.columns:
+            table = self.table(column)
+            values[(column, 'Ordinal')] = np.append(table['Ordinal'].to_numpy(), -1)[positions[column]]
+            if folds is None:
+                for encoder_name in ['MEstimate', 'Target']:
+                    # 위치 -1(모르는 범주)은 맨 뒤에 붙인 기본값을 가리킴
+                    encoded = np.append(table[encoder_name].to_numpy(), unknown[encoder_name])
+                    values[(column, encoder_name)] = encoded[positions[column]]
+            else:
+                values[(column, 'MEstimate')], values[(column, 'Target')] = self.encode_out_of_fold(
+                    column, positions[column], np.asarray(folds))
+        return pd.DataFrame({f"{column}_{encoder_name}": values[(column, encoder_name)].astype('float32')
+                             for encoder_name in ENCODER_NAMES for column in self.columns}, index=df.index)
+
+    def encode_out_of_fold(self, column, positions, folds):
+        # 나머지 폴드 통계 = 전체 통계 - 자기 폴드 통계 (폴드마다 다시 학습하지 않음)
+        known = positions >= 0
+        safe_positions = np.where(known, positions, 0)
+        counts = np.where(known, self.counts[column][safe_positions] - self.fold_counts[column][folds, safe_positions], 0)
+        sums = np.where(known, self.sums[column][safe_positions] - self.fold_sums[column][folds, safe_positions], 0)
+        out_counts = self.total_count - self.fold_total_counts
+        fold_priors = (self.total_sum - self.fold_total_sums) / out_counts
+        # 폴드별로 남은 범주 수가 남은 행 수와 같으면 (모든 값이 고유) MEstimate는 prior
+        all_unique = ((self.counts[column] - self.fold_counts[column]) > 0).sum(axis=1) == out_counts
+        m_estimate, target = self.encode(sums, counts, fold_priors[folds])
+        m_estimate = np.where(all_unique[folds], fold_priors[folds], m_estimate)
+        return m_estimate, target
+
+    def fit_transform(self, df, y, folds=None):
+        return self.fit(df, y, folds).transform(df, folds)
+
+    def save(self, name='encoding_stats'):
+        # 범주별 건수/합계/제곱합만 저장 (인코딩 값은 불러올 때 다시 계산, 폴드별 통계는 저장하지 않음)
+        stats = pd.concat([pd.DataFrame({'열': column, '번호': np.arange(len(self.categories[column]), dtype='int64'),
+                                         '범주': self.categories[column].astype(str), 'count': self.counts[column],
+                                         'sum': self.sums[column], 'sum_sq': self.sums_sq[column]})
+                           for column in self.columns], ignore_index=True)
+        return save_dataset(stats, name)
+
+    @classmethod
+    def load(cls, name='encoding_stats', **params):
+        # 저장된 통계로 다시 학습하지 않고 인코더 생성 (모든 행은 열마다 범주 하나에 속하므로 전체 건수/합계도 복원됨)
+        if not dataset_exists(name):
+            raise FileNotFoundError(f"저장된 인코딩 통계가 없습니다: {name}")
+        stats = load_dataset(name)
+        columns = list(dict.fromkeys(stats['열']))
+        encoder = cls(columns, **params)
+        for column in columns:
+            column_stats = stats[stats['열'] == column].sort_values('번호')
+            encoder.categories[column] = pd.Index(column_stats['범주'].to_numpy(), dtype=object)
+            encoder.counts[column] = column_stats['count'].to_numpy(dtype='int64')
+            encoder.sums[column] = column_stats['sum'].to_numpy(dtype='float64')
+            encoder.sums_sq[column] = column_stats['sum_sq'].to_numpy(dtype='float64')
+        first = columns[0]
+        encoder.total_count = int(encoder.counts[first].sum())
+        encoder.total_sum = float(encoder.sums[first].sum())
+        return encoder
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+
+class CrawlManifest:
+    # (지역코드, 거래년월)별 수집 이력을 저장하는 SQLite 매니페스트
+    # status : ok(정상 수집) / incomplete(일부 페이지 누락) / failed(요청 실패)
+    def __init__(self, manifest_path='DATA/org_crawling_data/manifest.sqlite'):
+        self.manifest_path = manifest_path
+        manifest_dir = os.path.dirname(manifest_path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS months (
+                    area_code TEXT NOT NULL,
+                    deal_ymd TEXT NOT NULL,
+                    area_name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    total_count INTEGER NOT NULL,
+                    content_hash TEXT,
+                    run_folder TEXT,
+                    PRIMARY KEY (area_code, deal_ymd)
+                )
+            """)
+
+    def connect(self):
+        return sqlite3.connect(self.manifest_path)
+
+    @staticmethod
+    def compute_content_hash(rows):
+        # 행 순서와 무관하게 같은 내용이면 같은 해시가 나오도록 정렬 후 계산
+        serialized = sorted(json.dumps(row, ensure_ascii=False, sort_keys=True) for row in rows)
+        return hashlib.sha256("\n".join(serialized).encode('utf-8')).hexdigest()
+
+    def get_entries(self, area_code):
+        with self.connect() as conn:
+            cursor = conn.execute("SELECT deal_ymd, status, content_hash FROM months WHERE area_code = ?", (area_code,))
+            return {deal_ymd: (status, content_hash) for deal_ymd, status, content_hash in cursor}
+
+    def get_months_to_fetch(self, area_code, year_months, recent_months=3, today=None):
+        # 수집 이력이 없거나, 실패/누락이 있었거나, 최근 recent_months개월(신고 정정 가능 기간)에 속하는 달만 반환
+        today = today or datetime.now()
+        recent_index = today.year * 12 + today.month - recent_months
+        entries = self.get_entries(area_code)
+        months_to_fetch = []
+        for year_month in year_months:
+            entry = entries.get(year_month)
+            month_index = int(year_month[:4]) * 12 + int(year_month[4:])
+            if entry is None or entry[0] != 'ok' or month_index > recent_index:
+                months_to_fetch.append(year_month)
+        return months_to_fetch
+
+    def record(self, area_code, area_name, deal_ymd, status, row_count, total_count, content_hash, run_folder):
+        # 이미 정상 수집된 달은 재수집이 실패해도 기존 기록(기존 실행 폴더의 데이터)을 유지
+        with self.connect() as conn:
+            conn.execute("""
+                INSERT INTO months
+                (area_code, deal_ymd, area_name, status, fetched_at, row_count, total_count, content_hash, run_folder)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (area_code, deal_ymd) DO UPDATE SET
+                    area_name = excluded.area_name, status = excluded.status, fetched_at = excluded.fetched_at,
+                    row_count = excluded.row_count, total_count = excluded.total_count,
+                    content_hash = excluded.content_hash, run_folder = excluded.run_folder
+                WHERE excluded.status = 'ok' OR months.status != 'ok'
+            """, (area_code, deal_ymd, area_name, status, datetime.now().isoformat(timespec='seconds'),
+                  row_count, total_count, content_hash, run_folder))
+
+    def get_latest_runs(self):
+        # (지역명, 거래년월 정수) -> 가장 최근에 정상 수집한 실행 폴더명
+        with self.connect() as conn:
+            cursor = conn.execute("SELECT area_name, deal_ymd, run_folder FROM months WHERE status = 'ok'")
+            return {(area_name, int(deal_ymd)): run_folder for area_name, deal_ymd, run_folder in cursor}
+
+    def get_content_hashes(self):
+        # (지역명, 거래년월 정수) -> 정상 수집한 데이터의 내용 해시 (다시 수집해도 내용이 같으면 같은 값)
+        with self.connect() as conn:
+            cursor = conn.execute("SELECT area_name, deal_ymd, content_hash FROM months WHERE status = 'ok'")
+            return {(area_name, int(deal_ymd)): content_hash for area_name, deal_ymd, content_hash in cursor}
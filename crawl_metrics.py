@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 수집 요청 계측 : 요청 한 건마다 JSON 한 줄(이벤트)을 파일에 기록하고,
+# 최근 window초 동안의 초당 요청 수/에러율 이동 카운터와 종료 시 지연 시간 백분위 요약을 제공
+# 여러 스레드에서 동시에 record를 호출해도 되도록 잠금 사용 (01 동시 수집, 09 동시 좌표 요청)
+PERCENTILES = (50, 90, 99)
+
+
+class CrawlMetrics:
+    # path : 이벤트 파일(JSON Lines) 경로, None이면 파일 없이 메모리에서만 집계 / source : 이벤트의 API 이름(molit, vworld)
+    def __init__(self, path=None, source='', window=60):
+        self.path = path
+        self.source = source
+        self.window = window
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.recent = deque()  # (시각, 에러 여부)
+        self.latencies = []
+        self.request_count = 0
+        self.error_count = 0
+        self.retry_count = 0
+        self.byte_count = 0
+        self.row_count = 0
+        self.file = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.file = open(path, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, latency, status=None, result_code=None, size=0, rows=0, retries=0, error=False, **fields):
+        # 요청 한 건 기록 / latency : 초, status : HTTP 상태 코드, result_code : API 결과 코드, size : 응답 바이트 수
+        # fields : 지역, 년월, 주소 등 요청을 구분하는 값 (그대로 이벤트에 포함)
+        now = time.monotonic()
+        event = {'time': datetime.now().isoformat(timespec='milliseconds'), 'source': self.source, **fields,
+                 'status': status, 'result_code': result_code, 'bytes': size, 'latency_ms': round(latency * 1000, 2),
+                 'retries': retries, 'rows': rows, 'error': bool(error)}
+        with self.lock:
+            self.request_count += 1
+            self.error_count += bool(error)
+            self.retry_count += retries
+            self.byte_count += size
+            self.row_count += rows
+            self.latencies.append(latency)
+            self.recent.append((now, bool(error)))
+            self.trim(now)
+            if self.file is not None:
+                self.file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def trim(self, now):
+        # window초보다 오래된 요청은 이동 카운터에서 제외 (잠금 안에서 호출)
+        while self.recent and self.recent[0][0] < now - self.window:
+            self.recent.popleft()
+
+    def rolling(self):
+        # 최근 window초 (실행 시간이 더 짧으면 실행 시간) 기준 초당 요청 수, 에러율
+        now = time.monotonic()
+        with self.lock:
+            self.trim(now)
+            count = len(self.recent)
+            errors = sum(error for _, error in self.recent)
+        span = max(min(self.window, now - self.started_at), 1e-9)
+        return {'requests_per_sec': count / span, 'error_rate': errors / count if count else 0.0}
+
+    def rolling_line(self):
+        rolling = self.rolling()
+        return (f"최근 {self.window}초: 초당 {rolling['requests_per_sec']:.2f}건, "
+                f"에러율 {rolling['error_rate'] * 100:.1f}%")
+
+    def summary(self):
+        # 실행 전체 요약 (지연 시간 백분위는 ms)
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            summary = {'source': self.source, 'requests': self.request_count, 'errors': self.error_count,
+                       'error_rate': self.error_count / self.request_count if self.request_count else 0.0,
+                       'retries': self.retry_count, 'bytes': self.byte_count, 'rows': self.row_count,
+                       'elapsed_sec': round(time.monotonic() - self.started_at, 3)}
+        summary['requests_per_sec'] = summary['requests'] / summary['elapsed_sec'] if summary['elapsed_sec'] else 0.0
+        for percentile in PERCENTILES:
+            summary[f'latency_p{percentile}_ms'] = float(np.percentile(latencies, percentile)) if len(latencies) else None
+        summary['latency_max_ms'] = float(latencies.max()) if len(latencies) else None
+        return summary
+
+    def summary_line(self):
+        summary = self.summary()
+        if not summary['requests']:
+            return "요청 없음"
+        percentiles = ', '.join(f"p{percentile} {summary[f'latency_p{percentile}_ms']:.0f}ms" for percentile in PERCENTILES)
+        return (f"요청 {summary['requests']}건 (에러 {summary['errors']}건, {summary['error_rate'] * 100:.1f}%, "
+                f"재시도 {summary['retries']}회), 초당 {summary['requests_per_sec']:.2f}건, "
+                f"{summary['bytes'] / 1024 / 1024:.1f}MB, 행 {summary['rows']}개 / 지연 시간 {percentiles}, "
+                f"max {summary['latency_max_ms']:.0f}ms")
+
+    def close(self):
+        # 요약을 마지막 이벤트('event': 'summary')로 남기고 파일 닫기
+        if self.file is not None:
+            summary = self.summary()
+            with self.lock:
+                self.file.write(json.dumps({'event': 'summary', **summary}, ensure_ascii=False) + '\n')
+                self.file.close()
+                self.file = None
+
+
+def load_events(path):
+    # 이벤트 파일을 DataFrame으로 (요약 줄 제외)
+    # pd.read_json은 형을 추정해 result_code '00' -> 0.0, 년월 '202401' -> 정수로 바꾸므로 json으로 읽어 기록한 값 그대로 사용
+    with open(path, encoding='utf-8') as file:
+        events = pd.DataFrame([event for event in map(json.loads, filter(str.strip, file)) if 'event' not in event])
+    events['time'] = pd.to_datetime(events['time'], format='ISO8601')
+    return events
+
+
+def summarize_events(events, by=None, freq=None):
+    # by : 묶을 열 (예: 지역), freq : 시간 간격 (예: '1min') / 반환값 : 그룹별 요청 수, 에러율, 지연 시간 백분위
+    keys = ([by] if by else []) + ([pd.Grouper(key='time', freq=freq)] if freq else [])
+    groups = events.groupby(keys, observed=True, dropna=False) if keys else events.groupby(np.zeros(len(events), dtype=int))
+    result = groups.agg(requests=('latency_ms', 'size'), error_rate=('error', 'mean'), retries=('retries', 'sum'),
+                        rows=('rows', 'sum'))
+    for percentile in PERCENTILES:
+        result[f'latency_p{percentile}_ms'] = groups['latency_ms'].quantile(percentile / 100)
+    return result[result['requests'] > 0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='수집 요청 이벤트 파일(JSON Lines) 요약')
+    parser.add_argument('path', help='예: DATA/org_crawling_data/area/20240101_120000/20240101_120000_requests.jsonl')
+    parser.add_argument('--by', help='묶을 열 (예: 지역, 년월, status, result_code)')
+    parser.add_argument('--freq', help='시간 간격별 추이 (예: 1min, 10s) - API가 느려진 시점 확인용')
+    args = parser.parse_args()
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(summarize_events(load_events(args.path), args.by, args.freq).round(2))
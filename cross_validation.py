@@ -0,0 +1,143 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from category_encoding import ENCODER_NAMES
+from regression import RegressionMetrics, StreamingOLS
+from storage import dataset_columns, load_dataset
+
+# 인코딩 방식 x 변환 x 회귀 모델 조합을 K-fold 교차 검증으로 비교
+# 특징 행렬은 한 번만 만들어 memmap 파일(MATRIX_PATH)로 저장하고, 작업 프로세스는 파일을 열어 필요한 행만 읽음
+# (조합/폴드마다 DataFrame을 pickle로 넘기지 않음)
+MATRIX_PATH = 'DATA/model/cv_features.npy'
+RESULT_PATH = 'DATA/model/cv_results.csv'
+
+base_columns = ['전용면적', '년식', '층']
+encoded_columns = ['아파트', '도로명', '법정동', '지역']
+target_column = '거래금액'
+
+# 특징 행렬에 저장하는 열 (기본 열 + 인코딩 열 전체 + 거래금액)
+matrix_columns = base_columns + [f"{column}_{encoder_name}" for encoder_name in ENCODER_NAMES
+                                 for column in encoded_columns] + [target_column]
+
+# 02 단계가 저장한 out-of-fold 인코딩 폴드 번호 열
+fold_column = '폴드'
+
+TRANSFORMS = ['raw', 'log']
+REGRESSORS = ['ols', 'ridge', 'hgb']
+
+
+def build_regressor(name):
+    # ols/ridge는 regression.py의 누적 통계 회귀, hgb는 sklearn 그래디언트 부스팅 (비선형 비교용)
+    if name == 'ols':
+        return StreamingOLS()
+    if name == 'ridge':
+        return StreamingOLS(alpha=1.0)
+    if name == 'hgb':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(random_state=42)
+    raise ValueError(f"지원하지 않는 회귀 모델입니다: {name}")
+
+
+def build_feature_matrix(df, matrix_path=MATRIX_PATH):
+    # 모든 조합에서 쓰는 열(matrix_columns)을 float64 행렬 하나로 저장
+    # 행은 폴드 번호 순으로 정렬해 저장하므로 폴드 k의 행은 bounds[k]:bounds[k + 1] 구간 (검증 세트를 복사 없이 슬라이스)
+    # 폴드 번호는 02 단계가 저장한 폴드 열을 그대로 사용 (학습 행의 _Target/_MEstimate 값에 검증 폴드의 거래금액이 섞이지 않음)
+    if fold_column not in df.columns:
+        raise ValueError(f"전처리 데이터에 폴드 열({fold_column})이 없습니다. "
+                         "02_dataPreprocessing.py를 --folds 2 이상으로 다시 실행하세요.")
+    df = df[df['층'] >= 0]
+    folds = df[fold_column].to_numpy(dtype='int64')
+    n_folds = int(folds.max()) + 1
+    order = np.argsort(folds, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(folds, minlength=n_folds))])
+
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+    matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype='float64', shape=(len(df), len(matrix_columns)))
+    for i, column in enumerate(matrix_columns):
+        matrix[:, i] = df[column].to_numpy(dtype='float64')[order]
+    matrix.flush()
+    del matrix
+    return bounds
+
+
+def select_columns(encoder_name):
+    # 인코딩 방식별 특징 열 위치 (기본 열 + '{열}_{방식}' 4개)
+    names = base_columns + [f"{column}_{encoder_name}" for column in encoded_columns]
+    return [matrix_columns.index(name) for name in names]
+
+
+def evaluate_fold(matrix_path, feature_positions, target_position, bounds, fold, transform, regressor_name):
+    # 작업 프로세스에서 memmap으로 연 행렬에서 학습/검증 행만 읽어 학습 후 원래 거래금액 단위로 평가
+    matrix = np.load(matrix_path, mmap_mode='r')
+    start, end = bounds[fold], bounds[fold + 1]
+    valid = matrix[start:end]
+    train = np.concatenate([matrix[:start], matrix[end:]])
+    X_train, y_train = train[:, feature_positions], train[:, target_position]
+    X_valid, y_valid = valid[:, feature_positions], valid[:, target_position]
+    if transform == 'log':
+        # 07 단계와 같은 로그 변환 (0이 있을 수 있는 특징은 log1p), 예측값은 exp로 되돌려 평가
+        X_train, X_valid, y_train = np.log1p(X_train), np.log1p(X_valid), np.log(y_train)
+
+    started_at = time.perf_counter()
+    model = build_regressor(regressor_name).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started_at
+    prediction = model.predict(X_valid)
+    if transform == 'log':
+        prediction = np.exp(prediction)
+    metrics = RegressionMetrics().update(y_valid, prediction)
+    return metrics.r2(), metrics.rmse(), fit_seconds
+
+
+def run_cross_validation(df, encoders=ENCODER_NAMES, transforms=TRANSFORMS, regressors=REGRESSORS,
+                         max_workers=None, matrix_path=MATRIX_PATH):
+    # 폴드 수는 02 단계 out-of-fold 인코딩 폴드 수와 같음
+    # 반환값 : 조합별 평균/표준편차 R^2, RMSE와 학습 시간, RMSE 오름차순 순위
+    bounds = build_feature_matrix(df, matrix_path)
+    n_folds = len(bounds) - 1
+    target_position = matrix_columns.index(target_column)
+    tasks = list(itertools.product(encoders, transforms, regressors, range(n_folds)))
+    scores = {}
+    started_at = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(evaluate_fold, matrix_path, select_columns(encoder_name), target_position,
+                                   bounds, fold, transform, regressor_name): (encoder_name, transform, regressor_name)
+                   for encoder_name, transform, regressor_name, fold in tasks}
+        for future in as_completed(futures):
+            scores.setdefault(futures[future], []).append(future.result())
+    print(f"교차 검증 {len(tasks)}개 작업 완료 ({time.perf_counter() - started_at:.1f}초)")
+
+    rows = []
+    for (encoder_name, transform, regressor_name), fold_scores in scores.items():
+        r2, rmse, fit_seconds = np.array(fold_scores).T
+        rows.append({'인코딩': encoder_name, '변환': transform, '모델': regressor_name,
+                     'R2_평균': r2.mean(), 'R2_표준편차': r2.std(), 'RMSE_평균': rmse.mean(), 'RMSE_표준편차': rmse.std(),
+                     '학습시간_초': fit_seconds.sum()})
+    results = pd.DataFrame(rows).sort_values('RMSE_평균', ignore_index=True)
+    results.index = results.index + 1
+    results.index.name = '순위'
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='인코딩 방식 x 변환 x 회귀 모델 조합 K-fold 교차 검증')
+    parser.add_argument('--encoders', nargs='+', default=ENCODER_NAMES, choices=ENCODER_NAMES)
+    parser.add_argument('--transforms', nargs='+', default=TRANSFORMS, choices=TRANSFORMS)
+    parser.add_argument('--regressors', nargs='+', default=REGRESSORS, choices=REGRESSORS)
+    parser.add_argument('--workers', type=int, default=None, help='사용할 프로세스 수')
+    args = parser.parse_args()
+
+    # 폴드 열이 없으면(02 단계 --folds 0) build_feature_matrix에서 다시 실행하라는 에러를 냄
+    columns = matrix_columns + [column for column in [fold_column]
+                                if column in dataset_columns('first_preprocessed_data_org')]
+    cv_results = run_cross_validation(load_dataset('first_preprocessed_data_org', columns=columns),
+                                      args.encoders, args.transforms, args.regressors, args.workers)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(cv_results)
+    cv_results.to_csv(RESULT_PATH, encoding='utf-8-sig')
+    print("교차 검증 결과를 저장했습니다:", RESULT_PATH)
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import time
+
+
+class GeocodeCache:
+    # 정규화한 도로명주소별 좌표 조회 결과를 저장하는 SQLite 캐시
+    # status : OK(좌표 있음) / NOT_FOUND(API가 결과 없음으로 응답) -> 각각 다른 유효기간(TTL) 적용
+    # HTTP 에러처럼 일시적인 실패는 캐시하지 않음
+    def __init__(self, cache_path='DATA/lat_lon_data/geocode_cache.sqlite', positive_ttl_days=365, negative_ttl_days=30):
+        self.cache_path = cache_path
+        self.positive_ttl = positive_ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                address TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                status TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def normalize_address(address):
+        # 앞뒤/중복 공백 제거 ('중앙로  12 ' -> '중앙로 12')
+        return ' '.join(str(address).split())
+
+    def get_many(self, addresses):
+        # 유효기간이 남은 결과만 반환 : {정규화 주소: (status, lat, lon)}, 적중/미적중 건수도 집계
+        normalized = [self.normalize_address(address) for address in addresses]
+        keys = list(set(normalized))
+        now = time.time()
+        results = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor = self.conn.execute(
+                f"SELECT address, status, lat, lon FROM geocodes WHERE expires_at > ? AND address IN ({','.join('?' * len(chunk))})",
+                [now] + chunk)
+            for address, status, lat, lon in cursor:
+                results[address] = (status, lat, lon)
+        hit_count = sum(address in results for address in normalized)
+        self.hits += hit_count
+        self.misses += len(normalized) - hit_count
+        return results
+
+    def get(self, address):
+        return self.get_many([address]).get(self.normalize_address(address))
+
+    def put(self, address, status, lat=None, lon=None, commit=True):
+        now = time.time()
+        ttl = self.positive_ttl if status == 'OK' else self.negative_ttl
+        self.conn.execute("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                          (self.normalize_address(address), lat, lon, status, now, now + ttl))
+        if commit:
+            self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_line(self):
+        return f"캐시 적중 {self.hits}건 / 미적중 {self.misses}건 (적중률 {self.hit_rate() * 100:.1f}%)"
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,162 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from address_index import AddressIndex
+from spatial_index import project
+from storage import dataset_exists, load_dataset, save_dataset
+from trade_utils import build_road_address, parse_price
+
+# 09 단계 좌표로 만드는 위치 특징
+# - 주변거래밀도 : 반경 안 거래 건수의 가우시안 커널 밀도 (건/㎢)
+# - 주변㎡당가격 : 거리 가중(가우시안) 평균 ㎡당 가격 (자기 주소의 거래는 제외)
+# - 격자_㎡당가격 : grid_m 격자의 M-추정 ㎡당 가격 (자기 주소의 거래는 제외)
+# 공간 결합(반경 안 주소 쌍과 거리, 주소별 격자 번호)은 주소 id 기준으로 한 번 계산해 캐시하고 (location_addresses, location_pairs)
+# 가격/건수 합계는 fit(partial_fit)에 넘긴 거래(학습 세트)만으로 bincount -> 테스트 거래의 가격이 학습 특징에 섞이지 않음
+# 02 단계 이후 데이터에는 도로명주소가 없으므로 (아파트, 도로명, 법정동, 지역) 단지 키 -> 주소 id 표(location_feature_keys)로 결합
+KEY_COLUMNS = ['아파트', '도로명', '법정동', '지역']
+TRADE_COLUMNS = KEY_COLUMNS + ['도로명건물본번호코드', '도로명건물부번호코드', '거래금액', '전용면적']
+FEATURE_COLUMNS = ['주변거래밀도', '주변㎡당가격', '격자_㎡당가격']
+
+
+def build_spatial_join(address_index, radius_m=1500, grid_m=1000):
+    # 좌표가 있는 주소의 격자 번호와 반경 radius_m 안의 주소 쌍 (자기 자신 쌍 제외, 행 위치 기준)
+    located = np.flatnonzero(np.isfinite(address_index.lat) & np.isfinite(address_index.lon))
+    xy = project(address_index.lat[located], address_index.lon[located], np.mean(address_index.lat[located]))
+    tree = cKDTree(xy)
+    pairs = tree.sparse_distance_matrix(tree, radius_m, output_type='ndarray')
+    pairs = pairs[pairs['i'] != pairs['j']]
+
+    cell_x = np.floor(xy[:, 0] / grid_m).astype('int64')
+    cell_y = np.floor(xy[:, 1] / grid_m).astype('int64')
+    cells, _ = pd.factorize(pd.MultiIndex.from_arrays([cell_x, cell_y]))
+    addresses = pd.DataFrame({'address_id': located.astype('int64'), '도로명주소': address_index.addresses[located],
+                              '격자': cells.astype('int64')})
+    return addresses, pd.DataFrame({'i': pairs['i'].astype('int64'), 'j': pairs['j'].astype('int64'), '거리': pairs['v']})
+
+
+def build_feature_keys(trades):
+    # 단지 키 -> 주소 id (한 단지에 주소가 여러 개면 거래가 가장 많은 주소)
+    keys = trades[KEY_COLUMNS + ['address_id']]
+    keys = keys[keys['address_id'] >= 0]
+    sizes = keys.groupby(KEY_COLUMNS + ['address_id'], observed=True).size().rename('건수').reset_index()
+    sizes = sizes.sort_values('건수', ascending=False, kind='stable').drop_duplicates(KEY_COLUMNS)
+    return sizes[KEY_COLUMNS + ['address_id']].reset_index(drop=True)
+
+
+class LocationFeatures:
+    # addresses : address_id, 격자 / pairs : i, j (addresses 행 위치), 거리 / feature_keys : 단지 키 -> address_id
+    def __init__(self, addresses, pairs, feature_keys, bandwidth_m=500, m=10):
+        self.addresses = addresses
+        self.pairs = pairs
+        self.feature_keys = feature_keys
+        self.bandwidth_m = bandwidth_m
+        self.m = m
+        self.cells = addresses['격자'].to_numpy(dtype='int64')
+        self.i = pairs['i'].to_numpy(dtype='int64')
+        self.j = pairs['j'].to_numpy(dtype='int64')
+        self.weight = np.exp(-0.5 * (pairs['거리'].to_numpy(dtype='float64') / bandwidth_m) ** 2)
+
+        # 단지 키 -> 행 위치 (좌표가 없는 주소의 단지는 -1)
+        address_ids = addresses['address_id'].to_numpy(dtype='int64')
+        key_ids = feature_keys['address_id'].to_numpy(dtype='int64')
+        position_of = np.full(max(address_ids.max(initial=-1), key_ids.max(initial=-1)) + 1, -1)
+        position_of[address_ids] = np.arange(len(addresses))
+        self.key_index = pd.MultiIndex.from_frame(feature_keys[KEY_COLUMNS].astype(str))
+        self.key_positions = np.append(position_of[key_ids], -1)
+        self.reset()
+
+    @classmethod
+    def build(cls, radius_m=1500, grid_m=1000, **params):
+        # 주소 사전과 수집 데이터의 단지 키로 공간 결합/단지 키 표를 만들어 저장
+        address_index = AddressIndex.load()
+        if not len(address_index):
+            raise FileNotFoundError("주소 사전이 없습니다. 09_getLatLon.py를 먼저 실행하세요.")
+        trades = load_dataset('total_apt_trade_data', columns=TRADE_COLUMNS[:6])
+        trades['address_id'] = address_index.lookup(
+            build_road_address(trades['도로명'], trades['도로명건물본번호코드'], trades['도로명건물부번호코드']))
+        addresses, pairs = build_spatial_join(address_index, radius_m, grid_m)
+        feature_keys = build_feature_keys(trades)
+        save_dataset(addresses, 'location_addresses')
+        save_dataset(pairs, 'location_pairs')
+        save_dataset(feature_keys, 'location_feature_keys')
+        return cls(addresses, pairs, feature_keys, **params)
+
+    @classmethod
+    def load(cls, **params):
+        # 캐시된 공간 결합이 있으면 그대로 사용 (주소 사전이 바뀌면 python location_features.py로 다시 생성)
+        if all(dataset_exists(name) for name in ['location_addresses', 'location_pairs', 'location_feature_keys']):
+            return cls(load_dataset('location_addresses'), load_dataset('location_pairs'),
+                       load_dataset('location_feature_keys'), **params)
+        return cls.build(**params)
+
+    def reset(self):
+        self.counts = np.zeros(len(self.addresses))
+        self.sums = np.zeros(len(self.addresses))
+        self.values = None
+
+    def positions(self, df):
+        # df 행마다 주소 행 위치 (모르는 단지 또는 좌표가 없는 주소는 -1)
+        return self.key_positions[self.key_index.get_indexer(pd.MultiIndex.from_frame(df[KEY_COLUMNS].astype(str)))]
+
+    def partial_fit(self, df, price_column='거래금액'):
+        # 학습 거래의 주소별 건수, ㎡당 가격 합계 누적
+        positions = self.positions(df)
+        per_m2 = df[price_column].to_numpy(dtype='float64') / df['전용면적'].to_numpy(dtype='float64')
+        valid = (positions >= 0) & np.isfinite(per_m2)
+        self.counts += np.bincount(positions[valid], minlength=len(self.addresses))
+        self.sums += np.bincount(positions[valid], weights=per_m2[valid], minlength=len(self.addresses))
+        self.values = None
+        return self
+
+    def fit(self, df, price_column='거래금액'):
+        self.reset()
+        return self.partial_fit(df, price_column)
+
+    def compute(self):
+        # 누적한 학습 거래로 주소별 특징 계산 (커널 합은 주소 쌍 bincount, 격자 합은 격자 bincount)
+        size = len(self.addresses)
+        global_mean = self.sums.sum() / self.counts.sum() if self.counts.sum() else np.nan
+        kernel_counts = np.bincount(self.i, weights=self.weight * self.counts[self.j], minlength=size)
+        kernel_sums = np.bincount(self.i, weights=self.weight * self.sums[self.j], minlength=size)
+        density = (kernel_counts + self.counts) / (2 * np.pi * (self.bandwidth_m / 1000) ** 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            local_mean = np.where(kernel_counts > 0, kernel_sums / kernel_counts, global_mean)
+
+        # 격자 합계에서 자기 주소 몫을 뺀 뒤 전체 평균 쪽으로 m건만큼 수축
+        cell_counts = np.bincount(self.cells, weights=self.counts, minlength=size)[self.cells] - self.counts
+        cell_sums = np.bincount(self.cells, weights=self.sums, minlength=size)[self.cells] - self.sums
+        grid_mean = (cell_sums + self.m * global_mean) / (cell_counts + self.m)
+        return {'주변거래밀도': density, '주변㎡당가격': local_mean, '격자_㎡당가격': grid_mean}
+
+    def transform(self, df, columns=FEATURE_COLUMNS):
+        # df의 단지 키로 특징 열 추가 (좌표가 없는 단지는 NaN)
+        if self.values is None:
+            self.values = self.compute()
+        positions = self.positions(df)  # -1이면 맨 뒤에 붙인 NaN을 가리킴
+        result = df.copy()
+        for column in columns:
+            result[column] = np.append(self.values[column], np.nan)[positions]
+        return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='좌표 기반 위치 특징용 공간 결합 생성 (주소 id별 캐시)')
+    parser.add_argument('--bandwidth', type=float, default=500, help='가우시안 커널 폭 (m)')
+    parser.add_argument('--radius', type=float, default=1500, help='커널 합에 포함할 최대 거리 (m)')
+    parser.add_argument('--grid', type=float, default=1000, help='격자 크기 (m)')
+    parser.add_argument('--m', type=float, default=10, help='격자 인코딩 수축 강도 (거래 건수)')
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    location = LocationFeatures.build(radius_m=args.radius, grid_m=args.grid, bandwidth_m=args.bandwidth, m=args.m)
+    print(f"주소 {len(location.addresses)}곳, 주소 쌍 {len(location.pairs)}개, 단지 {len(location.feature_keys)}개 "
+          f"공간 결합 생성 완료 ({time.perf_counter() - started_at:.1f}초)")
+
+    # 전체 수집 데이터 기준 특징 분포 (확인용, 08 단계는 학습 세트만으로 다시 계산)
+    trade_data = load_dataset('total_apt_trade_data', columns=KEY_COLUMNS + ['거래금액', '전용면적'])
+    trade_data['거래금액'] = parse_price(trade_data['거래금액'])
+    print(location.fit(trade_data[trade_data['전용면적'] > 0]).transform(location.feature_keys)[FEATURE_COLUMNS].describe())
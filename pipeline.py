@@ -0,0 +1,288 @@
+import argparse
+import ast
+import hashlib
+import importlib
+import inspect
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import matplotlib
+matplotlib.use('Agg')  # 화면 없이 이미지 파일만 저장
+import matplotlib.pyplot as plt
+
+import category_encoding
+import regression
+import schema
+import storage
+import trade_utils
+from storage import DATASETS, load_dataset, save_dataset
+
+# 02~08 단계 스크립트 (파일명이 숫자로 시작하므로 importlib로 불러옴)
+preprocessing = importlib.import_module('02_dataPreprocessing')
+analysis_first = importlib.import_module('03_dataAnalysisFirst')
+price_check = importlib.import_module('04_price_top_bot_check')
+area_check = importlib.import_module('05_area_check')
+transformation = importlib.import_module('06_dataTransformation')
+data_result = importlib.import_module('07_dataResult')
+linear_regression = importlib.import_module('08_linearRegression')
+
+CACHE_DIR = 'DATA/pipeline_cache'
+
+
+# ---------------------------------------------------------------------------
+# 단계별 실행 함수 (프로세스 풀에서 실행할 수 있도록 모듈 최상위에 정의)
+# ---------------------------------------------------------------------------
+def load_raw_data():
+    return load_dataset('total_apt_trade_data', columns=preprocessing.selected_columns)
+
+
+def run_preprocessing(raw_data, n_folds=5, export_csv=False):
+    encoder = preprocessing.build_encoder(n_folds)
+    df = preprocessing.preprocess(raw_data, encoder)
+    save_dataset(df, 'first_preprocessed_data_org', export_csv=export_csv)
+    encoder.save()
+    return df
+
+
+def run_correlation_heatmap(df):
+    return analysis_first.plot_correlation_heatmap(df[analysis_first.numeric_columns])
+
+
+def run_price_check(df, top_n=1000, bins=10):
+    return price_check.plot_price_distribution(df[['거래금액']], top_n=top_n, bins=bins)
+
+
+def run_area_check(df, bins=20):
+    return area_check.plot_area_distribution(df[['전용면적']], bins=bins)
+
+
+def run_transformation(df):
+    return transformation.plot_transformation(df[['거래금액', '전용면적']])
+
+
+def run_final_data(df, trim_bottom=50, trim_top=100, export_csv=False):
+    df_selected, df_selected_trimmed = data_result.build_final_data(df, trim_bottom=trim_bottom, trim_top=trim_top)
+    save_dataset(df_selected_trimmed, 'final_preprocessed_data', export_csv=export_csv)
+    return df_selected, df_selected_trimmed
+
+
+def run_final_heatmap(final_data):
+    return data_result.plot_final_heatmap(*final_data)
+
+
+def run_regression(final_data):
+    df_selected, df_selected_trimmed = final_data
+    selected_model = linear_regression.evaluate_selected(df_selected)
+    final_model = linear_regression.evaluate_final(df_selected_trimmed)
+    return selected_model, final_model
+
+
+def save_regression(models):
+    # 캐시에서 불러온 경우에도 모델 파일을 다시 씀 (DATA/model/*.json을 지워도 price_service.py가 불러올 수 있도록)
+    selected_model, final_model = models
+    return [selected_model.save('selected_regression'), final_model.save('final_regression')]
+
+
+def run_regression_plot(final_data, max_points=10000):
+    return linear_regression.plot_regression(final_data[1], max_points=max_points)
+
+
+class Stage:
+    # name : 단계 이름 / func : 실행 함수 / deps : 입력으로 받을 이전 단계 이름
+    # modules : 코드가 바뀌면 캐시를 무효화할 스크립트 / parallel : 프로세스 풀에서 실행 여부
+    # cache : 결과를 디스크에 캐시할지 여부 / outputs_are_files : 결과가 이미지 파일 경로 목록인지 여부
+    # save : 결과를 실행하거나 캐시에서 불러온 뒤 메인 프로세스에서 호출해 파일로 내보내는 함수
+    def __init__(self, name, func, deps=(), modules=(), params=None, parallel=False, cache=True,
+                 outputs_are_files=False, save=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.modules = list(modules)
+        self.params = dict(params or {})
+        self.parallel = parallel
+        self.cache = cache
+        self.outputs_are_files = outputs_are_files
+        self.save = save
+
+
+def build_stages():
+    # 02~08 단계 의존 관계 (03/04/05/06 차트와 07 히트맵, 08 회귀는 서로 독립이므로 병렬 실행)
+    return [
+        # 저장/불러오기(storage)와 타입 변환(schema, trade_utils) 코드가 바뀌어도 이후 단계 캐시가 무효화되도록 modules에 포함
+        Stage('raw', load_raw_data, modules=[storage, schema, trade_utils], cache=False),
+        Stage('preprocess', run_preprocessing, ['raw'], [preprocessing, category_encoding, schema, storage],
+              {'n_folds': 5, 'export_csv': False}),
+        Stage('correlation_heatmap', run_correlation_heatmap, ['preprocess'], [analysis_first],
+              parallel=True, outputs_are_files=True),
+        Stage('price_check', run_price_check, ['preprocess'], [price_check], {'top_n': 1000, 'bins': 10},
+              parallel=True, outputs_are_files=True),
+        Stage('area_check', run_area_check, ['preprocess'], [area_check], {'bins': 20},
+              parallel=True, outputs_are_files=True),
+        Stage('transformation', run_transformation, ['preprocess'], [transformation],
+              parallel=True, outputs_are_files=True),
+        Stage('final_data', run_final_data, ['preprocess'], [data_result, storage],
+              {'trim_bottom': 50, 'trim_top': 100, 'export_csv': False}),
+        Stage('final_heatmap', run_final_heatmap, ['final_data'], [data_result], parallel=True, outputs_are_files=True),
+        Stage('regression', run_regression, ['final_data'], [linear_regression, regression], parallel=True,
+              save=save_regression),
+        Stage('regression_plot', run_regression_plot, ['final_data'], [linear_regression], {'max_points': 10000},
+              parallel=True, outputs_are_files=True),
+    ]
+
+
+def fingerprint_dataset(name):
+    # 입력 데이터셋 파일의 경로/크기/수정 시각으로 만든 해시 (데이터를 다시 읽지 않고 변경 여부 확인)
+    dataset = DATASETS[name]
+    entries = []
+    for path in [dataset['parquet_path'], dataset['csv_path']]:
+        if os.path.isfile(path):
+            entries.append((path, os.path.getsize(path), os.path.getmtime(path)))
+        for root, _, names in os.walk(path):
+            for file_name in sorted(names):
+                file_path = os.path.join(root, file_name)
+                entries.append((file_path, os.path.getsize(file_path), os.path.getmtime(file_path)))
+    return hashlib.sha256(repr(sorted(entries)).encode('utf-8')).hexdigest()
+
+
+def compute_stage_keys(stages):
+    # 단계 키 = 이전 단계 키 + 파라미터 + 실행 코드의 해시 (입력 데이터 자체는 해시하지 않음)
+    keys = {}
+    for stage in stages:
+        hasher = hashlib.sha256(stage.name.encode('utf-8'))
+        hasher.update(inspect.getsource(stage.func).encode('utf-8'))
+        for module in stage.modules:
+            hasher.update(inspect.getsource(module).encode('utf-8'))
+        hasher.update(repr(sorted(stage.params.items())).encode('utf-8'))
+        if not stage.deps:
+            hasher.update(fingerprint_dataset('total_apt_trade_data').encode('utf-8'))
+        for dep in stage.deps:
+            hasher.update(keys[dep].encode('utf-8'))
+        keys[stage.name] = hasher.hexdigest()[:16]
+    return keys
+
+
+def get_cache_path(stage, key):
+    return os.path.join(CACHE_DIR, f"{stage.name}-{key}.pkl")
+
+
+def load_cached(stage, key):
+    # 캐시가 없거나, 이미지 결과인데 파일이 지워졌으면 None
+    cache_path = get_cache_path(stage, key)
+    if not stage.cache or not os.path.exists(cache_path):
+        return None
+    with open(cache_path, 'rb') as cache_file:
+        value = pickle.load(cache_file)
+    if stage.outputs_are_files and not all(os.path.exists(path) for path in value):
+        return None
+    return value
+
+
+def save_cached(stage, key, value):
+    if not stage.cache:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # 같은 단계의 이전 캐시는 삭제
+    for file_name in os.listdir(CACHE_DIR):
+        if file_name.startswith(f"{stage.name}-") and file_name != os.path.basename(get_cache_path(stage, key)):
+            os.remove(os.path.join(CACHE_DIR, file_name))
+    with open(get_cache_path(stage, key), 'wb') as cache_file:
+        pickle.dump(value, cache_file)
+
+
+def execute_stage(func, args, params):
+    value = func(*args, **params)
+    plt.close('all')
+    return value
+
+
+def run_pipeline(params=None, force=False, max_workers=None, targets=None):
+    # params : {'단계 이름': {'파라미터': 값}}으로 기본 파라미터를 덮어씀
+    # targets : 결과가 필요한 단계 이름 목록 (None이면 전체, force는 이 단계들만 다시 실행)
+    stages = build_stages()
+    for stage_name, stage_params in (params or {}).items():
+        next(stage for stage in stages if stage.name == stage_name).params.update(stage_params)
+    stage_map = {stage.name: stage for stage in stages}
+    targets = set(targets or stage_map)
+    unknown = targets - set(stage_map)
+    if unknown:
+        raise ValueError(f"알 수 없는 단계입니다: {sorted(unknown)}")
+    keys = compute_stage_keys(stages)
+
+    # targets와 그 입력 단계만 대상으로, 캐시가 없는 단계와 그 단계가 입력으로 쓰는 캐시 없는 단계만 실행
+    scope = set(targets)
+    for stage in reversed(stages):
+        if stage.name in scope:
+            scope.update(stage.deps)
+    stages = [stage for stage in stages if stage.name in scope]
+    values = {}
+    needed = set()
+    for stage in stages:
+        cached = None if force and stage.name in targets else load_cached(stage, keys[stage.name])
+        if cached is not None:
+            values[stage.name] = cached
+        elif stage.cache and stage.name in targets:
+            needed.add(stage.name)
+    for stage in reversed(stages):
+        if stage.name in needed:
+            needed.update(dep for dep in stage.deps if dep not in values)
+    for stage in stages:
+        if stage.name in targets and stage.name not in needed and stage.name in values:
+            print(f"[{stage.name}] 캐시 사용 ({keys[stage.name]})")
+
+    pending = [stage for stage in stages if stage.name in needed]
+    running = {}
+    started_at = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [stage for stage in pending if all(dep in values for dep in stage.deps)]
+            for stage in ready:
+                pending.remove(stage)
+                args = [values[dep] for dep in stage.deps]
+                started_at[stage.name] = time.perf_counter()
+                if stage.parallel:
+                    running[executor.submit(execute_stage, stage.func, args, stage.params)] = stage
+                else:
+                    values[stage.name] = execute_stage(stage.func, args, stage.params)
+                    save_cached(stage, keys[stage.name], values[stage.name])
+                    print(f"[{stage.name}] 실행 완료 ({time.perf_counter() - started_at[stage.name]:.1f}초)")
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    values[stage.name] = future.result()
+                    save_cached(stage, keys[stage.name], values[stage.name])
+                    print(f"[{stage.name}] 실행 완료 ({time.perf_counter() - started_at[stage.name]:.1f}초)")
+            elif pending and not ready:
+                raise RuntimeError(f"실행할 수 없는 단계가 있습니다: {[stage.name for stage in pending]}")
+
+    # 내보내는 파일은 캐시 사용 여부와 관계없이 항상 씀
+    for stage in stages:
+        if stage.save is not None and stage.name in targets and stage.name in values:
+            print(f"[{stage.name}] 저장:", *stage.save(values[stage.name]))
+    return {name: values[name] for name in stage_map if name in values}
+
+
+def parse_params(param_args):
+    # '단계.파라미터=값' 형식의 인자를 {'단계': {'파라미터': 값}}으로 변환
+    params = {}
+    for param_arg in param_args:
+        name, value = param_arg.split('=', 1)
+        stage_name, param_name = name.split('.', 1)
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            pass
+        params.setdefault(stage_name, {})[param_name] = value
+    return params
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='02~08 단계를 한 프로세스에서 의존 관계 순서대로 실행')
+    parser.add_argument('stages', nargs='*', help='결과가 필요한 단계 이름 (생략하면 전체, 입력 단계는 캐시가 없을 때만 실행)')
+    parser.add_argument('--param', action='append', default=[], help='단계 파라미터 변경 (예: price_check.top_n=500)')
+    parser.add_argument('--force', action='store_true', help='캐시를 무시하고 지정한 단계(생략하면 모든 단계) 다시 실행')
+    parser.add_argument('--workers', type=int, default=None, help='병렬 단계에 사용할 프로세스 수')
+    args = parser.parse_args()
+    run_pipeline(parse_params(args.param), force=args.force, max_workers=args.workers, targets=args.stages)
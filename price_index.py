@@ -0,0 +1,190 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import dataset_exists, load_dataset, save_dataset
+
+# 월별 가격 지수 : 지역 / 법정동 / 아파트 단위로 월마다 거래 건수, 평균 거래금액, ㎡당 중위/평균 가격을 미리 집계
+# 추이 조회는 원본 거래 데이터를 다시 읽지 않고 집계 결과(price_index 데이터셋)에서 해당 키의 행만 꺼냄
+# 갱신은 (지역, 년월) 단위 : 매니페스트의 내용 해시가 바뀐 달만 원본에서 다시 집계해 교체 (중위값은 합칠 수 없으므로 달 전체를 다시 계산)
+LEVELS = {'지역': ['지역'], '법정동': ['지역', '법정동'], '아파트': ['지역', '법정동', '아파트']}
+KEY_COLUMNS = ['지역', '법정동', '아파트']
+TRADE_COLUMNS = ['거래금액', '전용면적', '년', '월', '지역', '법정동', '아파트']
+
+
+def rollup(trades, level):
+    # trades : 거래금액(만원), 전용면적, 년, 월, 키 열 / 반환값 : 키 + 년월별 집계 (키, 년월 오름차순)
+    keys = LEVELS[level]
+    trades = trades.dropna(subset=keys + ['거래금액', '전용면적', '년', '월'])
+    trades = trades[trades['전용면적'] > 0]
+    year_month = trades['년'].to_numpy(dtype='int64') * 100 + trades['월'].to_numpy(dtype='int64')
+    groups = trades[keys].assign(년월=year_month)
+    codes = groups.groupby(keys + ['년월'], observed=True, sort=True).ngroup().to_numpy()
+    price = trades['거래금액'].to_numpy(dtype='float64')
+    per_m2 = price / trades['전용면적'].to_numpy(dtype='float64')
+
+    # 그룹 번호, ㎡당 가격 순으로 한 번 정렬한 뒤 그룹마다 가운데 값 선택 (그룹별 정렬 반복 없음)
+    order = np.lexsort((per_m2, codes))
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    sorted_per_m2 = per_m2[order]
+    median = (sorted_per_m2[starts + (counts - 1) // 2] + sorted_per_m2[starts + counts // 2]) / 2
+
+    result = groups.iloc[order[starts]].reset_index(drop=True)
+    # 단위에 없는 키 열은 빈 문자열 (지역 단위 행의 법정동/아파트 등)
+    for column in KEY_COLUMNS:
+        if column not in result.columns:
+            result[column] = ''
+    result['년월'] = result['년월'].astype('int32')
+    result['건수'] = counts
+    result['평균거래금액'] = np.bincount(codes, weights=price) / counts
+    result['㎡당중위가격'] = median
+    result['㎡당평균가격'] = np.bincount(codes, weights=per_m2) / counts
+    result.insert(0, '단위', level)
+    return result[['단위'] + KEY_COLUMNS + ['년월', '건수', '평균거래금액', '㎡당중위가격', '㎡당평균가격']]
+
+
+def rollup_all(trades):
+    return pd.concat([rollup(trades, level) for level in LEVELS], ignore_index=True)
+
+
+class PriceIndex:
+    # cube : rollup_all 결과 / sources : 집계에 사용한 (지역, 년월)별 매니페스트 내용 해시
+    def __init__(self, cube=None, sources=None):
+        self.cube = cube if cube is not None else rollup_all(pd.DataFrame(columns=TRADE_COLUMNS))
+        self.sources = sources if sources is not None else pd.DataFrame({'지역': pd.Series(dtype=object),
+                                                                         '년월': pd.Series(dtype='int32'),
+                                                                         'content_hash': pd.Series(dtype=object)})
+        self.build_lookup()
+
+    def build_lookup(self):
+        # 단위별 키 -> 행 위치 배열 (조회할 때 전체 행을 비교하지 않고 사전에서 바로 찾음)
+        self.tables = {}
+        self.lookup = {}
+        for level, keys in LEVELS.items():
+            table = self.cube[self.cube['단위'] == level].sort_values(keys + ['년월']).reset_index(drop=True)
+            table[keys] = table[keys].astype(str)
+            self.tables[level] = table
+            self.lookup[level] = table.groupby(keys, sort=False).indices if len(table) else {}
+
+    @classmethod
+    def load(cls):
+        # 저장된 집계가 없으면 빈 지수
+        if not dataset_exists('price_index'):
+            return cls()
+        cube = load_dataset('price_index')
+        cube['단위'] = cube['단위'].astype(str)
+        sources = load_dataset('price_index_sources') if dataset_exists('price_index_sources') else None
+        return cls(cube, sources)
+
+    def save(self):
+        save_dataset(self.sources, 'price_index_sources')
+        return save_dataset(self.cube, 'price_index')
+
+    def update(self, content_hashes=None):
+        # content_hashes : CrawlManifest.get_content_hashes() 결과, 없거나 처음 만드는 경우 전체 다시 집계
+        # 반환값 : 다시 집계한 (지역, 년월) 수 (전체 집계는 -1)
+        previous = dict(zip(zip(self.sources['지역'], self.sources['년월'].astype(int)), self.sources['content_hash']))
+        if not content_hashes or not len(self.cube):
+            self.cube = rollup_all(load_dataset('total_apt_trade_data', columns=TRADE_COLUMNS))
+            changed = -1
+        else:
+            months = [month for month, content_hash in content_hashes.items() if previous.get(month) != content_hash]
+            if not months:
+                return 0
+            # 바뀐 달이 속한 지역/년 파티션만 읽은 뒤 (지역, 년월)이 일치하는 행만 사용
+            areas = sorted({area for area, _ in months})
+            years = sorted({year_month // 100 for _, year_month in months})
+            trades = load_dataset('total_apt_trade_data', columns=TRADE_COLUMNS,
+                                  filters=[('지역', 'in', areas), ('년', 'in', years)])
+            changed_keys = pd.MultiIndex.from_tuples(months)
+            trade_keys = pd.MultiIndex.from_arrays([trades['지역'].astype(str),
+                                                    trades['년'].astype('int64') * 100 + trades['월'].astype('int64')])
+            trades = trades[trade_keys.isin(changed_keys)]
+            cube_keys = pd.MultiIndex.from_arrays([self.cube['지역'].astype(str), self.cube['년월'].astype('int64')])
+            self.cube = pd.concat([self.cube[~cube_keys.isin(changed_keys)], rollup_all(trades)], ignore_index=True)
+            changed = len(months)
+        if content_hashes:
+            self.sources = pd.DataFrame({'지역': [area for area, _ in content_hashes],
+                                         '년월': np.array([year_month for _, year_month in content_hashes], dtype='int32'),
+                                         'content_hash': list(content_hashes.values())})
+        self.build_lookup()
+        return changed
+
+    def trend(self, region, dong=None, apt=None, since=None, until=None):
+        # 지역(+법정동, +아파트)의 월별 집계 / since, until : 년(2010) 또는 년월(201001)
+        level = '아파트' if apt is not None else '법정동' if dong is not None else '지역'
+        key = tuple(str(value) for value in [region, dong, apt][:len(LEVELS[level])])
+        positions = self.lookup[level].get(key if len(key) > 1 else key[0])
+        if positions is None:
+            return self.tables[level].iloc[0:0]
+        table = self.tables[level].iloc[positions]
+        year_month = table['년월'].to_numpy()
+        start = 0 if since is None else since * 100 + 1 if since < 10000 else since
+        end = 999999 if until is None else until * 100 + 12 if until < 10000 else until
+        # 키 안에서는 년월 오름차순이므로 이분 탐색으로 기간 선택
+        return table.iloc[np.searchsorted(year_month, start):np.searchsorted(year_month, end, side='right')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='월별 가격 지수 집계/갱신 및 추이 조회')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help='수집 데이터 전체로 다시 집계')
+    subparsers.add_parser('update', help='매니페스트 기준 새로 수집되거나 바뀐 달만 다시 집계')
+    trend_parser = subparsers.add_parser('trend', help='월별 추이 조회 (예: trend "성남 분당" --since 2010)')
+    trend_parser.add_argument('region')
+    trend_parser.add_argument('--dong')
+    trend_parser.add_argument('--apt')
+    trend_parser.add_argument('--since', type=int)
+    trend_parser.add_argument('--until', type=int)
+    trend_parser.add_argument('--plot', action='store_true', help='㎡당 중위가격 추이 그래프 저장')
+    args = parser.parse_args()
+
+    if args.command in ('build', 'update'):
+        from crawl_manifest import CrawlManifest
+        manifest_path = 'DATA/org_crawling_data/manifest.sqlite'
+        hashes = CrawlManifest(manifest_path).get_content_hashes() if os.path.exists(manifest_path) else None
+        price_index = PriceIndex() if args.command == 'build' else PriceIndex.load()
+        changed_count = price_index.update(hashes)
+        if changed_count:
+            print("월별 가격 지수를 저장했습니다:", price_index.save(),
+                  "(전체 집계)" if changed_count < 0 else f"(다시 집계한 지역/월 {changed_count}개)")
+        else:
+            print("새로 수집되거나 바뀐 달이 없습니다.")
+    else:
+        price_index = PriceIndex.load()
+        started_at = time.perf_counter()
+        trend = price_index.trend(args.region, args.dong, args.apt, args.since, args.until)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(trend.drop(columns=['단위']))
+        print(f"조회 시간: {elapsed_ms:.2f}ms")
+
+        if args.plot and len(trend):
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+
+            # 한글 폰트 설정
+            plt.rcParams['font.family'] = 'Malgun Gothic'
+            plt.rcParams['axes.unicode_minus'] = False
+
+            title = ' '.join(str(value) for value in [args.region, args.dong, args.apt] if value is not None)
+            output_file_path = f'DATA/image/price_index/{title}_㎡당중위가격.png'
+            os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+            dates = pd.to_datetime(trend['년월'].astype(str), format='%Y%m')
+            plt.figure(figsize=(12, 5))
+            plt.plot(dates, trend['㎡당중위가격'], marker='.', label='㎡당 중위가격')
+            plt.plot(dates, trend['㎡당평균가격'], alpha=0.5, label='㎡당 평균가격')
+            plt.title(f'{title} ㎡당 가격 추이 (만원)')
+            plt.xlabel('거래년월')
+            plt.ylabel('㎡당 가격 (만원)')
+            plt.grid(True)
+            plt.legend()
+            plt.tight_layout()
+            plt.savefig(output_file_path)
+            plt.close()
+            print("추이 그래프를 저장했습니다:", output_file_path)
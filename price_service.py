@@ -0,0 +1,181 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from category_encoding import CategoryEncoder
+from regression import StreamingOLS
+
+# 아파트 거래금액 예측 서비스 (로컬 HTTP 서버 또는 CLI)
+# 시작할 때 회귀 모델(08 단계 final_regression)과 범주별 인코딩 통계(02 단계 encoding_stats)를 한 번만 불러오고
+# 요청은 한 건이든 여러 건이든 DataFrame 하나로 묶어 배열 단위로 인코딩/예측
+numeric_fields = ['전용면적', '층']
+category_fields = ['아파트', '도로명', '법정동', '지역']
+
+
+class LatencyRecorder:
+    # 최근 max_samples개 요청의 처리 시간(초)으로 p50/p99 계산
+    def __init__(self, max_samples=10000):
+        self.samples = deque(maxlen=max_samples)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self.lock:
+            samples = np.array(self.samples)
+            count = self.count
+        if len(samples) == 0:
+            return {'count': count}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {'count': count, 'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3), 'max_ms': round(samples.max() * 1000, 3)}
+
+
+class PriceService:
+    def __init__(self, model_name='final_regression', encoding_name='encoding_stats'):
+        self.model = StreamingOLS.load(model_name)
+        encoder = CategoryEncoder.load(encoding_name)
+
+        # 범주 -> Target 인코딩 값 배열 (맨 뒤는 학습에 없던 범주에 쓰는 prior), 요청마다 인코딩 표를 다시 만들지 않음
+        self.categories = {column: encoder.categories[column] for column in category_fields}
+        self.target_values = {column: np.append(encoder.table(column)['Target'].to_numpy(), encoder.prior()).astype('float32')
+                              for column in category_fields}
+        self.latency = LatencyRecorder()
+
+    def build_features(self, df):
+        # 07 단계와 같은 로그 특징 (년식/층은 0 이하가 되지 않도록 1 이상으로 제한)
+        missing = [field for field in numeric_fields + category_fields if field not in df.columns]
+        if '년식' not in df.columns and '건축년도' not in df.columns:
+            missing.append('년식 또는 건축년도')
+        if missing:
+            raise ValueError(f"필수 항목이 없습니다: {', '.join(missing)}")
+
+        # 숫자가 아니거나 NaN/inf인 값, 0 이하 전용면적은 로그에서 NaN이 되므로 항목 이름과 행 번호를 담아 거절
+        age_field = '년식' if '년식' in df.columns else '건축년도'
+        numbers = {field: pd.to_numeric(df[field], errors='coerce').to_numpy(dtype='float64')
+                   for field in numeric_fields + [age_field]}
+        invalid = [f"{field}(행 {', '.join(map(str, np.flatnonzero(~np.isfinite(values))[:5]))})"
+                   for field, values in numbers.items() if not np.isfinite(values).all()]
+        if invalid:
+            raise ValueError(f"숫자가 아니거나 유한하지 않은 항목이 있습니다: {', '.join(invalid)}")
+        if (numbers['전용면적'] <= 0).any():
+            rows = ', '.join(map(str, np.flatnonzero(numbers['전용면적'] <= 0)[:5]))
+            raise ValueError(f"전용면적은 0보다 커야 합니다: 전용면적(행 {rows})")
+        age = numbers['년식'] if age_field == '년식' else datetime.now().year - numbers['건축년도']
+        features = {'로그_전용면적': np.log(numbers['전용면적']),
+                    '로그_년식': np.log(np.maximum(age, 1)),
+                    '로그_층': np.log(np.maximum(numbers['층'], 1))}
+        unknown = np.zeros(len(df), dtype=bool)
+        for column in category_fields:
+            positions = self.categories[column].get_indexer(df[column].astype(str))
+            unknown |= positions < 0
+            features[f"로그_{column}"] = np.log(self.target_values[column][positions])
+        return pd.DataFrame(features)[self.model.features], unknown
+
+    def predict(self, records):
+        # records : dict 한 건 또는 dict 목록 / 반환값 : 입력 순서대로 {'예상거래금액': 원, '미등록범주': 학습에 없던 범주 포함 여부}
+        started_at = time.perf_counter()
+        single = isinstance(records, dict)
+        df = pd.DataFrame([records] if single else list(records))
+        if len(df) == 0:
+            return []
+        features, unknown = self.build_features(df)
+        prices = np.exp(self.model.predict(features))
+        results = [{'예상거래금액': round(float(price)), '미등록범주': bool(flag)} for price, flag in zip(prices, unknown)]
+        self.latency.record(time.perf_counter() - started_at)
+        return results[0] if single else results
+
+
+def make_handler(service):
+    class PriceRequestHandler(BaseHTTPRequestHandler):
+        # POST /predict : JSON 객체 한 건 또는 배열 / GET /stats : 처리 시간 p50/p99 / GET /health
+        def send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self.send_json(200, service.latency.summary())
+            elif self.path == '/health':
+                self.send_json(200, {'status': 'ok'})
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self.send_json(404, {'error': 'not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+                if not isinstance(body, (dict, list)):
+                    raise ValueError("요청 본문은 JSON 객체 또는 배열이어야 합니다")
+                self.send_json(200, service.predict(body))
+            except (ValueError, TypeError) as error:
+                self.send_json(400, {'error': str(error)})
+
+        def log_message(self, format, *args):
+            # 요청마다 출력하지 않음 (처리 시간은 /stats로 확인)
+            pass
+
+    return PriceRequestHandler
+
+
+def read_records(input_path):
+    # .csv는 행마다 한 건, 그 외는 JSON 배열 또는 JSON Lines
+    if input_path.endswith('.csv'):
+        return pd.read_csv(input_path, encoding='utf-8-sig').to_dict('records')
+    with open(input_path, encoding='utf-8') as input_file:
+        text = input_file.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='아파트 거래금액 예측 서비스')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help='로컬 HTTP 서버 실행 (POST /predict, GET /stats)')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    predict_parser = subparsers.add_parser('predict', help='JSON 한 건 또는 파일의 여러 건 예측')
+    predict_parser.add_argument('record', nargs='?', help='JSON 객체 (예: \'{"전용면적": 84.9, "년식": 10, ...}\')')
+    predict_parser.add_argument('--input', help='JSON 배열 / JSON Lines / CSV 파일')
+    predict_parser.add_argument('--batch-size', type=int, default=1000, help='파일 입력을 나눠 처리할 건수')
+    args = parser.parse_args()
+
+    price_service = PriceService()
+    if args.command == 'serve':
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(price_service))
+        print(f"예측 서비스 시작: http://{args.host}:{args.port}/predict")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print("처리 시간:", price_service.latency.summary())
+    elif args.input:
+        input_records = read_records(args.input)
+        for start in range(0, len(input_records), args.batch_size):
+            for result in price_service.predict(input_records[start:start + args.batch_size]):
+                print(json.dumps(result, ensure_ascii=False))
+        print("처리 시간:", price_service.latency.summary(), file=sys.stderr)
+    elif args.record:
+        print(json.dumps(price_service.predict(json.loads(args.record)), ensure_ascii=False))
+    else:
+        parser.error("record 또는 --input이 필요합니다")
@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class RateLimiter:
+    # 토큰 버킷 방식의 요청 제한기
+    # rate : 초당 허용 요청 수 / capacity : 순간적으로 몰아서 보낼 수 있는 최대 요청 수
+    # daily_limit : 하루 최대 요청 수 (국토교통부 API 개발계정 트래픽 제한), None이면 제한 없음
+    def __init__(self, rate, capacity=1, daily_limit=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.daily_limit = daily_limit
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # 토큰을 하나 얻을 때까지 대기, 일일 한도를 넘으면 False 반환
+        while True:
+            with self.lock:
+                if self.daily_limit is not None and self.request_count >= self.daily_limit:
+                    return False
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.request_count += 1
+                    return True
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
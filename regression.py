@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+
+# 선형 회귀(OLS)를 X'X, X'y 누적 통계로 계산
+# 청크마다 partial_fit으로 통계만 더하므로 메모리보다 큰 데이터도 학습할 수 있고,
+# 새 달의 데이터가 들어오면 저장된 통계에 더하기만 하면 됨 (이전 데이터로 다시 학습하지 않음)
+MODEL_DIR = 'DATA/model'
+
+
+class StreamingOLS:
+    # sklearn LinearRegression(fit_intercept=True)과 같은 해 (중심화한 X'X로 최소제곱 해 계산)
+    # 큰 값(원 단위 거래금액 등)에서 제곱합의 정밀도가 떨어지지 않도록 첫 청크의 평균(shift)을 빼고 누적
+    # alpha > 0이면 릿지 회귀 (sklearn Ridge와 같은 해, 절편은 규제하지 않음)
+    def __init__(self, features=None, alpha=0.0):
+        self.features = list(features) if features is not None else None
+        self.alpha = alpha
+        self.n = 0
+        self.shift_x = None
+        self.shift_y = 0.0
+        self.sum_x = None
+        self.sum_y = 0.0
+        self.xtx = None
+        self.xty = None
+        self.yty = 0.0
+        self.coef_ = None
+        self.intercept_ = None
+
+    def partial_fit(self, X, y):
+        if self.features is None and hasattr(X, 'columns'):
+            self.features = list(X.columns)
+        target = getattr(y, 'name', None) or 'y'
+        X = np.asarray(X, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        if len(y) == 0:
+            return self
+        # NaN/inf가 한 번 누적되면 X'X 전체가 NaN이 되어 solve에서 원인을 알 수 없는 LinAlgError가 나므로 청크마다 확인
+        finite = np.isfinite(X)
+        if not finite.all():
+            column = int(np.flatnonzero(~finite.all(axis=0))[0])
+            name = self.features[column] if self.features is not None else f"{column}번째 열"
+            raise ValueError(f"유한하지 않은 값(NaN/inf)이 있는 특징 열입니다: {name} ({int((~finite[:, column]).sum())}행)")
+        if not np.isfinite(y).all():
+            raise ValueError(f"유한하지 않은 값(NaN/inf)이 있는 목표 열입니다: {target} ({int((~np.isfinite(y)).sum())}행)")
+        if self.shift_x is None:
+            self.shift_x = X.mean(axis=0)
+            self.shift_y = float(y.mean())
+            self.sum_x = np.zeros(X.shape[1])
+            self.xtx = np.zeros((X.shape[1], X.shape[1]))
+            self.xty = np.zeros(X.shape[1])
+        X = X - self.shift_x
+        y = y - self.shift_y
+        self.n += len(y)
+        self.sum_x += X.sum(axis=0)
+        self.sum_y += y.sum()
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+        self.yty += y @ y
+        return self.solve()
+
+    def fit(self, X, y):
+        self.__init__(self.features, self.alpha)
+        return self.partial_fit(X, y)
+
+    def centered(self):
+        # 평균을 뺀 X'X, X'y, y'y (shift 기준 통계에서 평균과의 차이만 보정)
+        mean_x = self.sum_x / self.n
+        mean_y = self.sum_y / self.n
+        sxx = self.xtx - self.n * np.outer(mean_x, mean_x)
+        sxy = self.xty - self.n * mean_x * mean_y
+        syy = self.yty - self.n * mean_y ** 2
+        return mean_x + self.shift_x, mean_y + self.shift_y, sxx, sxy, syy
+
+    def solve(self):
+        # 열마다 표준편차로 나눈 상관 행렬로 풀어서 열 크기 차이(전용면적 ~1e2, Target ~1e8)로 인한 조건수 악화 방지
+        mean_x, mean_y, sxx, sxy, _ = self.centered()
+        scale = np.sqrt(np.diag(sxx))
+        scale[scale == 0] = 1.0
+        scaled = sxx / np.outer(scale, scale) + np.diag(self.alpha / scale ** 2)
+        self.coef_ = np.linalg.lstsq(scaled, sxy / scale, rcond=None)[0] / scale
+        self.intercept_ = float(mean_y - mean_x @ self.coef_)
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype='float64') @ self.coef_ + self.intercept_
+
+    def training_score(self):
+        # 학습 데이터의 R^2, RMSE를 누적 통계로 계산 (학습 데이터를 다시 predict하지 않음)
+        _, _, sxx, sxy, syy = self.centered()
+        sse = max(syy - 2 * self.coef_ @ sxy + self.coef_ @ sxx @ self.coef_, 0.0)
+        return 1 - sse / syy, np.sqrt(sse / self.n)
+
+    def save(self, name):
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        model_path = os.path.join(MODEL_DIR, f"{name}.json")
+        state = {'features': self.features, 'alpha': self.alpha, 'n': self.n, 'shift_x': self.shift_x.tolist(), 'shift_y': self.shift_y,
+                 'sum_x': self.sum_x.tolist(), 'sum_y': self.sum_y, 'xtx': self.xtx.tolist(),
+                 'xty': self.xty.tolist(), 'yty': self.yty}
+        with open(model_path, 'w', encoding='utf-8') as model_file:
+            json.dump(state, model_file, ensure_ascii=False)
+        return model_path
+
+    @classmethod
+    def load(cls, name):
+        # 저장된 누적 통계로 모델 복원 (이어서 partial_fit 가능)
+        model_path = os.path.join(MODEL_DIR, f"{name}.json")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"저장된 회귀 모델이 없습니다: {model_path}")
+        with open(model_path, encoding='utf-8') as model_file:
+            state = json.load(model_file)
+        model = cls(state['features'], state.get('alpha', 0.0))
+        model.n = state['n']
+        model.shift_x = np.array(state['shift_x'])
+        model.shift_y = state['shift_y']
+        model.sum_x = np.array(state['sum_x'])
+        model.sum_y = state['sum_y']
+        model.xtx = np.array(state['xtx'])
+        model.xty = np.array(state['xty'])
+        model.yty = state['yty']
+        return model.solve()
+
+
+class RegressionMetrics:
+    # 예측값과 실제값을 청크 단위로 받아 MSE, RMSE, R^2 계산 (sklearn mean_squared_error, r2_score와 같은 식)
+    def __init__(self):
+        self.n = 0
+        self.sse = 0.0
+        self.shift = None
+        self.sum_y = 0.0
+        self.sum_y_sq = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype='float64')
+        if len(y_true) == 0:
+            return self
+        if self.shift is None:
+            self.shift = float(y_true.mean())
+        residual = y_true - np.asarray(y_pred, dtype='float64')
+        shifted = y_true - self.shift
+        self.n += len(y_true)
+        self.sse += residual @ residual
+        self.sum_y += shifted.sum()
+        self.sum_y_sq += shifted @ shifted
+        return self
+
+    def mse(self):
+        return self.sse / self.n
+
+    def rmse(self):
+        return np.sqrt(self.mse())
+
+    def r2(self):
+        return 1 - self.sse / (self.sum_y_sq - self.sum_y ** 2 / self.n)
@@ -0,0 +1,35 @@
+import argparse
+
+from pipeline import build_stages, run_pipeline
+
+# 03~08 단계 그림을 한 번에 다시 그리는 스크립트 (pipeline.py의 그림 단계만 실행하는 얇은 진입점)
+# 그림 단계와 입력 단계의 캐시/키는 pipeline.py와 같은 DATA/pipeline_cache를 사용하므로,
+# 코드/파라미터/입력 데이터셋이 그대로이고 이미지가 남아 있으면 건너뜀
+FIGURES = [stage.name for stage in build_stages() if stage.outputs_are_files]
+
+# 산점도/회귀선 그림에 그리는 최대 점 개수 (regplot은 점 개수에 비례해 느려짐)
+MAX_POINTS = 10000
+
+
+def render_all(names=None, max_points=MAX_POINTS, force=False, max_workers=None):
+    # names : 다시 그릴 그림 이름 목록 (None이면 전체) / 반환값 : {그림 이름: 이미지 경로 목록}
+    names = names or FIGURES
+    unknown = sorted(set(names) - set(FIGURES))
+    if unknown:
+        raise ValueError(f"알 수 없는 그림입니다: {unknown} (가능한 이름: {FIGURES})")
+    values = run_pipeline({'regression_plot': {'max_points': max_points}}, force=force, max_workers=max_workers,
+                          targets=names)
+    files = {name: values[name] for name in names}
+    for name, paths in files.items():
+        print(f"[{name}] {', '.join(paths)}")
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='03~08 단계 그림을 병렬로 다시 그림 (pipeline.py 캐시가 있으면 건너뜀)')
+    parser.add_argument('names', nargs='*', help=f"다시 그릴 그림 이름 (생략하면 전체: {', '.join(FIGURES)})")
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS, help='산점도/회귀선 그림의 최대 점 개수')
+    parser.add_argument('--force', action='store_true', help='캐시를 무시하고 지정한 그림만 다시 그림 (입력 단계는 캐시 사용)')
+    parser.add_argument('--workers', type=int, default=None, help='사용할 프로세스 수')
+    args = parser.parse_args()
+    render_all(args.names, max_points=args.max_points, force=args.force, max_workers=args.workers)
@@ -0,0 +1,105 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import lsqr
+
+from storage import load_dataset, save_dataset
+
+# 반복 매매 지수 (Bailey-Muth-Nourse) : 같은 세대(동일 단지/면적/층)가 두 번 거래된 쌍의 가격 변화로 월별 지수 추정
+# log(나중 가격 / 이전 가격) = b[나중 달] - b[이전 달] + 오차, 기준 달 b = 0 -> 지수 = 100 * exp(b)
+# 세대 키는 열마다 factorize한 정수 코드를 합쳐 만들고, 쌍은 (세대, 거래 시점)으로 한 번 정렬한 뒤 인접한 행으로 구성
+UNIT_COLUMNS = ['지역', '법정동', '지번', '아파트', '전용면적', '층']
+TRADE_COLUMNS = UNIT_COLUMNS + ['거래금액', '년', '월', '일']
+
+
+def unit_keys(trades, columns=UNIT_COLUMNS):
+    # 열마다 정수 코드로 바꾼 뒤 (지금까지의 키 * (범주 수 + 1) + 코드)를 다시 factorize (값이 커지지 않게 매번 0부터 재번호)
+    key = np.zeros(len(trades), dtype='int64')
+    for column in columns:
+        codes, uniques = pd.factorize(trades[column])
+        key = pd.factorize(key * (len(uniques) + 1) + codes + 1)[0].astype('int64')
+    return key
+
+
+def build_pairs(trades, base_year=2000):
+    # 세대별로 연속된 두 거래를 하나의 쌍으로 (같은 달 안의 재거래는 제외)
+    # 반환값 : 지역, 세대, 이전/나중 기간(base_year 1월부터의 개월 수), 이전/나중 거래금액
+    trades = trades.dropna(subset=TRADE_COLUMNS)
+    trades = trades[(trades['거래금액'] > 0) & (trades['년'] >= base_year)]
+    unit = unit_keys(trades)
+    period = (trades['년'].to_numpy(dtype='int64') - base_year) * 12 + trades['월'].to_numpy(dtype='int64') - 1
+    order = np.lexsort((trades['일'].to_numpy(dtype='int64'), period, unit))
+    unit, period = unit[order], period[order]
+    price = trades['거래금액'].to_numpy(dtype='float64')[order]
+    region = trades['지역'].to_numpy()[order]
+
+    same_unit = (unit[1:] == unit[:-1]) & (period[1:] > period[:-1])
+    first = np.flatnonzero(same_unit)
+    second = first + 1
+    return pd.DataFrame({'지역': region[first], '세대': unit[first], '이전기간': period[first], '나중기간': period[second],
+                         '이전거래금액': price[first], '나중거래금액': price[second]})
+
+
+def estimate_index(pairs, n_periods, max_log_return=None):
+    # 희소 설계 행렬 (쌍마다 이전 달 -1, 나중 달 +1)을 lsqr로 풀어 월별 log 지수 추정
+    # 쌍이 하나도 없는 달은 NaN, 기준 달은 쌍이 있는 첫 달 (지수 100)
+    log_return = np.log(pairs['나중거래금액'].to_numpy() / pairs['이전거래금액'].to_numpy())
+    first = pairs['이전기간'].to_numpy()
+    second = pairs['나중기간'].to_numpy()
+    if max_log_return is not None:
+        # 입력 오류로 보이는 급등락 쌍 제외
+        keep = np.abs(log_return) <= max_log_return
+        log_return, first, second = log_return[keep], first[keep], second[keep]
+    pair_counts = np.bincount(first, minlength=n_periods) + np.bincount(second, minlength=n_periods)
+    index = np.full(n_periods, np.nan)
+    if len(log_return) == 0:
+        return index, pair_counts
+
+    # 쌍이 있는 달만 열로 사용하고 기준 달(첫 열)은 제외 (b[기준 달] = 0)
+    used = np.flatnonzero(pair_counts)
+    column_of = np.full(n_periods, -1)
+    column_of[used] = np.arange(len(used))
+    rows = np.arange(len(log_return))
+    design = sparse.csr_matrix((np.repeat([-1.0, 1.0], len(rows)),
+                                (np.tile(rows, 2), np.concatenate([column_of[first], column_of[second]]))),
+                               shape=(len(rows), len(used)))[:, 1:]
+
+    log_index = lsqr(design, log_return, atol=1e-10, btol=1e-10, iter_lim=10 * len(used))[0]
+    index[used] = 100 * np.exp(np.concatenate([[0.0], log_index]))
+    return index, pair_counts
+
+
+def repeat_sales_index(trades, base_year=2000, max_log_return=None):
+    # 지역별 월별 반복 매매 지수 / 반환값 : 지역, 년월, 지수, 쌍수 (해당 달이 이전/나중 거래인 쌍의 수)
+    pairs = build_pairs(trades, base_year)
+    n_periods = int(max(pairs['나중기간'].max(), 0)) + 1 if len(pairs) else 0
+    months = np.arange(n_periods)
+    year_month = ((base_year + months // 12) * 100 + months % 12 + 1).astype('int32')
+    results = []
+    for region, region_pairs in pairs.groupby('지역', sort=True, observed=True):
+        index, pair_counts = estimate_index(region_pairs, n_periods, max_log_return)
+        results.append(pd.DataFrame({'지역': region, '년월': year_month, '지수': index, '쌍수': pair_counts}))
+    if not results:
+        return pd.DataFrame(columns=['지역', '년월', '지수', '쌍수'])
+    result = pd.concat(results, ignore_index=True)
+    return result[result['쌍수'] > 0].reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='지역별 월별 반복 매매 지수 계산')
+    parser.add_argument('--base-year', type=int, default=2000, help='기간 번호의 기준 년도 (이 년도 이전 거래는 제외)')
+    parser.add_argument('--max-log-return', type=float, default=None,
+                        help='|log(나중 가격 / 이전 가격)|이 이 값보다 큰 쌍 제외 (예: 1.0)')
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    trade_data = load_dataset('total_apt_trade_data', columns=TRADE_COLUMNS,
+                              filters=[('년', '>=', args.base_year)])
+    sales_index = repeat_sales_index(trade_data, args.base_year, args.max_log_return)
+    output_path = save_dataset(sales_index, 'repeat_sales_index')
+    print(f"거래 {len(trade_data)}건으로 반복 매매 지수 계산 완료 ({time.perf_counter() - started_at:.1f}초)")
+    print(sales_index.groupby('지역', observed=True).tail(1).to_string(index=False))
+    print("반복 매매 지수를 저장했습니다:", output_path)
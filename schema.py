@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# 반복이 많은 문자열 컬럼은 category로 저장 (고유값만 한 번 저장하고 행마다 정수 코드 사용)
+CATEGORY_COLUMNS = ['아파트', '도로명', '법정동', '지역']
+
+# 수집 데이터 : 거래금액은 만원 단위라 int32로 충분
+TRADE_DTYPES = {
+    '거래금액': 'int32', '전용면적': 'float32', '건축년도': 'int16', '층': 'int16', '년': 'int16', '월': 'int8',
+    '일': 'int8', '도로명건물본번호코드': 'int32', '도로명건물부번호코드': 'int32', '법정동본번코드': 'int32',
+    '법정동부번코드': 'int32', '법정동시군구코드': 'int32', '법정동읍면동코드': 'int32', '법정동지번코드': 'int32',
+}
+
+# 전처리 데이터 : 거래금액은 원 단위(최대 수백억)라 int32 범위를 넘으므로 float64 유지
+PREPROCESSED_DTYPES = {'거래금액': 'float64', '전용면적': 'float32', '년식': 'int16', '층': 'int16', '폴드': 'int16'}
+
+DATASET_DTYPES = {
+    'total_apt_trade_data': TRADE_DTYPES,
+    'first_preprocessed_data_org': PREPROCESSED_DTYPES,
+}
+
+
+def apply_schema(df, dtypes, category_columns=CATEGORY_COLUMNS):
+    # 스키마에 있는 컬럼만 변환 (정수 컬럼에 결측값이 있으면 float32, 범위를 넘는 값이 있으면 원래 타입 유지)
+    df = df.copy()
+    for column, dtype in dtypes.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        series = df[column]
+        if np.issubdtype(np.dtype(dtype), np.integer):
+            if series.isna().any():
+                dtype = 'float32'
+            elif not pd.api.types.is_numeric_dtype(series) or series.min() < np.iinfo(dtype).min \
+                    or series.max() > np.iinfo(dtype).max:
+                continue
+        df[column] = series.astype(dtype)
+    for column in category_columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def report_memory(name, before_mb, df):
+    after_mb = memory_usage_mb(df)
+    saved = (1 - after_mb / before_mb) * 100 if before_mb else 0.0
+    print(f"[{name}] 메모리 사용량 {before_mb:.1f}MB -> {after_mb:.1f}MB ({saved:.0f}% 감소)")
+    return after_mb
+
+
+def widen(df):
+    # 비교용 : category/축소 타입을 기존처럼 object 문자열과 64비트 숫자로 되돌림
+    wide = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            wide[column] = 'object'
+        elif np.issubdtype(dtype, np.integer):
+            wide[column] = 'int64'
+        elif np.issubdtype(dtype, np.floating):
+            wide[column] = 'float64'
+    return df.astype(wide)
+
+
+if __name__ == '__main__':
+    # 저장된 데이터셋마다 기존 타입 대비 메모리 사용량 출력
+    from storage import dataset_exists, load_dataset
+
+    for dataset_name in ['total_apt_trade_data', 'first_preprocessed_data_org', 'final_preprocessed_data']:
+        if dataset_exists(dataset_name):
+            data = load_dataset(dataset_name)
+            report_memory(dataset_name, memory_usage_mb(widen(data)), data)
@@ -0,0 +1,59 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# 거래 좌표를 지도 줌 레벨별 격자 셀로 묶어 셀마다 점 하나(가중치 합)로 줄임
+# 셀 크기는 웹 메르카토르 좌표에서 cell_px 픽셀이므로 줌 레벨마다 화면에 보이는 밀도는 원본 점과 같고,
+# 점 개수는 거래 건수가 아니라 셀 수에 비례 (기간이 길어져도 지도 파일 크기가 거의 늘지 않음)
+TILE_SIZE = 256
+
+
+def normalize_weights(weights, percentile=99):
+    # Leaflet.heat는 점 강도를 max(기본 1.0)로 나눠 색을 정하므로 셀 가중치를 0~1로 맞춤
+    # 최댓값 대신 percentile 백분위로 나누고 1에서 자름 (대단지 셀 몇 개 때문에 나머지가 모두 옅어지지 않도록)
+    weights = np.asarray(weights, dtype='float64')
+    scale = np.percentile(weights, percentile) if len(weights) else 0.0
+    return np.clip(weights / scale, 0, 1) if scale > 0 else np.ones(len(weights))
+
+
+def to_mercator(lat, lon):
+    # 위도/경도 -> 0~1 범위의 웹 메르카토르 좌표 (Leaflet 타일과 같은 좌표계)
+    lat_rad = np.radians(np.clip(np.asarray(lat, dtype='float64'), -85.05112878, 85.05112878))
+    x = (np.asarray(lon, dtype='float64') + 180) / 360
+    y = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / np.pi) / 2
+    return x, y
+
+
+def aggregate_cells(lat, lon, weights, zoom, cell_px=8, percentile=99):
+    # 줌 레벨 zoom에서 cell_px 픽셀 크기의 셀로 묶음 (셀 위치는 셀에 속한 점들의 평균 좌표)
+    # 반환값 : 위도, 경도, 건수, 가중치 합, 강도(이 줌 레벨 안에서 normalize_weights로 0~1) DataFrame
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    weights = np.asarray(weights, dtype='float64')
+    x, y = to_mercator(lat, lon)
+    scale = TILE_SIZE * 2 ** zoom / cell_px
+    cell_x = np.floor(x * scale).astype('int64')
+    cell_y = np.floor(y * scale).astype('int64')
+    codes, _ = pd.factorize(cell_x * (int(scale) + 1) + cell_y)
+    counts = np.bincount(codes)
+    cell_weights = np.bincount(codes, weights=weights)
+    return pd.DataFrame({'위도': np.bincount(codes, weights=lat) / counts, '경도': np.bincount(codes, weights=lon) / counts,
+                         '건수': counts, '가중치': cell_weights, '강도': normalize_weights(cell_weights, percentile)})
+
+
+def write_zoom_tiles(lat, lon, weights, output_dir, zooms=range(8, 16), cell_px=8, percentile=99):
+    # 줌 레벨마다 '{output_dir}/{줌}.js' 파일 하나에 집계한 점 [위도, 경도, 강도] 저장
+    # 줌 레벨마다 셀 크기가 달라 가중치 합의 범위도 다르므로 강도는 줌 레벨별로 정규화
+    # JSON이 아니라 스크립트로 저장하는 이유 : 지도 HTML을 로컬 파일(file://)로 열어도 <script>로는 불러올 수 있음
+    os.makedirs(output_dir, exist_ok=True)
+    point_counts = {}
+    for zoom in zooms:
+        cells = aggregate_cells(lat, lon, weights, zoom, cell_px, percentile)
+        points = np.column_stack([cells['위도'].round(5), cells['경도'].round(5), cells['강도'].round(4)]).tolist()
+        with open(os.path.join(output_dir, f"{zoom}.js"), 'w', encoding='utf-8') as tile_file:
+            tile_file.write(f"window.heatTiles = window.heatTiles || {{}};\nwindow.heatTiles[{zoom}] = "
+                            f"{json.dumps(points, separators=(',', ':'))};\n")
+        point_counts[zoom] = len(points)
+    return point_counts
@@ -0,0 +1,202 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from address_index import AddressIndex
+from storage import dataset_exists, load_dataset, save_dataset
+from trade_utils import parse_price
+
+# 좌표가 있는 거래의 비교 사례(가까운 위치 + 비슷한 면적/연식 + 최근 거래) 검색
+# 위치(고유 좌표)마다 KD-tree 점 하나, 거래는 (위치, 거래월) 순으로 정렬해 두고
+# 질의 점 -> 반경 안의 위치(KD-tree) -> 위치별 기간 구간(정렬된 키에서 이분 탐색) 순서로 후보를 배열 단위로 모음
+EARTH_RADIUS_M = 6371008.8
+PERIOD_SPAN = 12 * 10000  # 위치 키 간격 (절대 월 번호 = 년 * 12 + 월 - 1 보다 큰 값)
+TRADE_COLUMNS = ['위도', '경도', '거래금액', '전용면적', '건축년도', '년', '월', '일', '층', '아파트', '도로명주소']
+
+
+def project(lat, lon, lat0):
+    # 기준 위도 lat0의 등장방형 투영 (미터 단위 평면 좌표, 수십 km 범위에서 거리 오차 0.1% 이하)
+    lat_rad = np.radians(np.asarray(lat, dtype='float64'))
+    lon_rad = np.radians(np.asarray(lon, dtype='float64'))
+    return np.column_stack([EARTH_RADIUS_M * np.cos(np.radians(lat0)) * lon_rad, EARTH_RADIUS_M * lat_rad])
+
+
+def expand_ranges(starts, counts):
+    # [starts[i], starts[i] + counts[i]) 구간들을 이어 붙인 위치 배열 (반복문 없이)
+    total = counts.sum()
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total)
+
+
+class SpatialIndex:
+    def __init__(self, trades, lat0=None):
+        trades = trades.dropna(subset=['위도', '경도', '거래금액', '전용면적', '년', '월'])
+        trades = trades[trades['전용면적'] > 0]
+        self.lat0 = float(trades['위도'].mean()) if lat0 is None else lat0
+
+        # 같은 좌표의 거래는 같은 위치로 묶음
+        location, uniques = pd.factorize(pd.MultiIndex.from_arrays([trades['위도'], trades['경도']]))
+        period = trades['년'].to_numpy(dtype='int64') * 12 + trades['월'].to_numpy(dtype='int64') - 1
+        day = trades['일'].fillna(1).to_numpy(dtype='int64') if '일' in trades.columns else np.zeros(len(trades), 'int64')
+        order = np.lexsort((day, period, location))
+        self.trades = trades.iloc[order].reset_index(drop=True)
+        self.location = location[order].astype('int64')
+        self.period = period[order]
+        self.keys = self.location * PERIOD_SPAN + self.period
+        self.area = self.trades['전용면적'].to_numpy(dtype='float64')
+        self.built = self.trades['건축년도'].to_numpy(dtype='float64')
+        self.price_per_m2 = self.trades['거래금액'].to_numpy(dtype='float64') / self.area
+
+        # KD-tree는 고유 위치 수(단지 수 수준)만큼이라 불러올 때 다시 만들어도 수 ms
+        self.xy = project(uniques.get_level_values(0), uniques.get_level_values(1), self.lat0)
+        self.tree = cKDTree(self.xy)
+
+    @classmethod
+    def build(cls):
+        # 09 단계 결과(주소 사전 + 거래별 도로명주소)로 좌표가 있는 거래 목록 생성
+        address_index = AddressIndex.load()
+        if len(address_index):
+            df = pd.read_csv('DATA/lat_lon_data/address_data.csv',
+                             usecols=[column for column in TRADE_COLUMNS if column not in ('위도', '경도')])
+            df = address_index.attach_coordinates(df)
+        else:
+            df = pd.read_csv('DATA/lat_lon_data/folium_data.csv')
+        df['거래금액'] = parse_price(df['거래금액'])
+        return cls(df[[column for column in TRADE_COLUMNS if column in df.columns]])
+
+    @classmethod
+    def load(cls):
+        if not dataset_exists('spatial_index'):
+            raise FileNotFoundError("저장된 공간 색인이 없습니다: python spatial_index.py build")
+        return cls(load_dataset('spatial_index'))
+
+    def save(self):
+        # 정렬된 거래 목록만 저장 (불러올 때 이미 정렬돼 있어 정렬/KD-tree 생성이 빠름)
+        return save_dataset(self.trades, 'spatial_index')
+
+    def candidates(self, xy, periods, radius_m, months):
+        # 질의마다 반경 radius_m 안의 위치에서 [periods - months, periods) 기간의 거래 (같은 달 거래는 제외)
+        # 반환값 : (질의 번호, 거래 번호, 거리) 배열
+        neighbours = self.tree.query_ball_point(xy, radius_m)
+        lengths = np.fromiter(map(len, neighbours), dtype='int64', count=len(neighbours))
+        if lengths.sum() == 0:
+            empty = np.zeros(0, dtype='int64')
+            return empty, empty, np.zeros(0)
+        query_rows = np.repeat(np.arange(len(xy)), lengths)
+        locations = np.concatenate(neighbours).astype('int64')
+        starts = np.searchsorted(self.keys, locations * PERIOD_SPAN + periods[query_rows] - months)
+        ends = np.searchsorted(self.keys, locations * PERIOD_SPAN + periods[query_rows])
+        counts = ends - starts
+        # 거리는 (질의, 위치) 쌍마다 한 번만 계산한 뒤 거래 수만큼 반복
+        distance = np.hypot(*(self.xy[locations] - xy[query_rows]).T)
+        return np.repeat(query_rows, counts), expand_ranges(starts, counts), np.repeat(distance, counts)
+
+    def comparables(self, lat, lon, area, built_year=None, year_month=None, radius_m=500, k=10, area_band=0.15,
+                    age_band=None, months=24):
+        # 질의(배열 가능)마다 비교 사례 최대 k개 : 반경 radius_m 안, 면적 차이 area_band(비율) 이내,
+        # 건축년도 차이 age_band년 이내(지정 시), 질의 년월 이전 months개월 안의 거래
+        # 유사도 점수 = 거리/반경 + |log 면적비|/area_band + 경과 개월/months (작을수록 비슷함)
+        # year_month가 없으면 마지막 거래월 다음 달 기준 / 반환값 : (질의 번호, 거래 번호, 거리, 점수), 질의별 점수 오름차순
+        lat, lon, area = np.atleast_1d(lat), np.atleast_1d(lon), np.atleast_1d(area).astype('float64')
+        xy = project(lat, lon, self.lat0)
+        if year_month is None:
+            periods = np.full(len(xy), self.period.max() + 1 if len(self.period) else 0)
+        else:
+            year_month = np.broadcast_to(np.atleast_1d(year_month), len(xy)).astype('int64')
+            periods = (year_month // 100) * 12 + year_month % 100 - 1
+        rows, trade_rows, distance = self.candidates(xy, periods, radius_m, months)
+
+        log_area_ratio = np.abs(np.log(self.area[trade_rows] / area[rows]))
+        keep = log_area_ratio <= np.log1p(area_band)
+        if age_band is not None and built_year is not None:
+            built_year = np.broadcast_to(np.atleast_1d(built_year), len(xy)).astype('float64')
+            keep &= np.abs(self.built[trade_rows] - built_year[rows]) <= age_band
+        rows, trade_rows, distance = rows[keep], trade_rows[keep], distance[keep]
+        score = (distance / radius_m + log_area_ratio[keep] / np.log1p(area_band)
+                 + (periods[rows] - self.period[trade_rows]) / months)
+
+        # 질의별 점수 순 정렬 후 앞에서 k개 (그룹 시작 위치를 빼서 질의 안의 순위 계산)
+        # 점수는 0~3 범위이므로 질의 번호 * 4 + 점수 하나로 정렬 (lexsort보다 빠름)
+        order = np.argsort(rows * 4 + score, kind='stable')
+        rows, trade_rows, distance, score = rows[order], trade_rows[order], distance[order], score[order]
+        group_starts = np.searchsorted(rows, rows)
+        top = np.arange(len(rows)) - group_starts < k
+        return rows[top], trade_rows[top], distance[top], score[top]
+
+    def nearby(self, lat, lon, area, **params):
+        # 한 건 질의 결과를 거래 정보와 함께 DataFrame으로 반환
+        _, trade_rows, distance, score = self.comparables(lat, lon, area, **params)
+        result = self.trades.iloc[trade_rows].copy()
+        result['거리_m'] = distance.round(1)
+        result['유사도점수'] = score
+        return result.reset_index(drop=True)
+
+    def comparable_features(self, df, chunk_size=20000, **params):
+        # 데이터셋 전체 행의 비교 사례 특징 (해당 거래 이전 거래만 사용하므로 자기 자신/미래 거래는 포함되지 않음)
+        # df : 위도, 경도, 전용면적, 년, 월 (+ 건축년도) / 반환값 : 비교사례수, 비교사례_㎡당평균가격, 비교사례_평균거리
+        counts = np.zeros(len(df), dtype='int64')
+        price_sums = np.zeros(len(df))
+        distance_sums = np.zeros(len(df))
+        year_month = df['년'].to_numpy(dtype='int64') * 100 + df['월'].to_numpy(dtype='int64')
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            built_year = chunk['건축년도'].to_numpy(dtype='float64') if '건축년도' in chunk.columns else None
+            rows, trade_rows, distance, _ = self.comparables(
+                chunk['위도'].to_numpy(), chunk['경도'].to_numpy(), chunk['전용면적'].to_numpy(), built_year,
+                year_month[start:start + chunk_size], **params)
+            size = len(chunk)
+            counts[start:start + size] = np.bincount(rows, minlength=size)
+            price_sums[start:start + size] = np.bincount(rows, weights=self.price_per_m2[trade_rows], minlength=size)
+            distance_sums[start:start + size] = np.bincount(rows, weights=distance, minlength=size)
+        with np.errstate(invalid='ignore'):
+            return pd.DataFrame({'비교사례수': counts, '비교사례_㎡당평균가격': price_sums / counts,
+                                 '비교사례_평균거리': distance_sums / counts}, index=df.index)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='좌표가 있는 거래의 비교 사례 검색')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help='주소 사전과 거래 데이터로 공간 색인 생성/저장')
+    query_parser = subparsers.add_parser('query', help='주소 한 곳의 비교 사례 조회')
+    query_parser.add_argument('address', help='도로명주소 (주소 사전에 있는 주소)')
+    query_parser.add_argument('--area', type=float, required=True, help='전용면적')
+    query_parser.add_argument('--built-year', type=int, help='건축년도')
+    query_parser.add_argument('--age-band', type=int, help='건축년도 차이 허용 범위 (년)')
+    features_parser = subparsers.add_parser('features', help='전체 거래의 비교 사례 특징 계산/저장')
+    for sub_parser in [query_parser, features_parser]:
+        sub_parser.add_argument('--radius', type=float, default=500, help='검색 반경 (m)')
+        sub_parser.add_argument('-k', type=int, default=10, help='최대 비교 사례 수')
+        sub_parser.add_argument('--area-band', type=float, default=0.15, help='면적 차이 허용 비율')
+        sub_parser.add_argument('--months', type=int, default=24, help='최근 몇 개월 거래를 사용할지')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started_at = time.perf_counter()
+        spatial_index = SpatialIndex.build()
+        print(f"거래 {len(spatial_index.trades)}건, 위치 {len(spatial_index.xy)}곳 ({time.perf_counter() - started_at:.1f}초)")
+        print("공간 색인을 저장했습니다:", spatial_index.save())
+    else:
+        spatial_index = SpatialIndex.load()
+        params = {'radius_m': args.radius, 'k': args.k, 'area_band': args.area_band, 'months': args.months}
+        if args.command == 'query':
+            address = AddressIndex.load().attach_coordinates(pd.DataFrame({'도로명주소': [args.address]}))
+            if address.empty:
+                raise SystemExit(f"좌표가 없는 주소입니다: {args.address}")
+            lat, lon = address['위도'].iloc[0], address['경도'].iloc[0]
+            started_at = time.perf_counter()
+            spatial_index.comparables(lat, lon, args.area, args.built_year, age_band=args.age_band, **params)
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            with pd.option_context('display.max_columns', None, 'display.width', 200):
+                print(spatial_index.nearby(lat, lon, args.area, built_year=args.built_year, age_band=args.age_band,
+                                           **params))
+            print(f"조회 시간: {elapsed_ms:.3f}ms")
+        else:
+            started_at = time.perf_counter()
+            features = spatial_index.comparable_features(spatial_index.trades, **params)
+            comparable_sales = pd.concat([spatial_index.trades, features], axis=1)
+            print(f"거래 {len(comparable_sales)}건 비교 사례 특징 계산 완료 ({time.perf_counter() - started_at:.1f}초)")
+            print(features.describe())
+            print("비교 사례 특징을 저장했습니다:", save_dataset(comparable_sales, 'comparable_sales'))
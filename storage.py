@@ -0,0 +1,238 @@
+import gc
+import json
+import operator
+import os
+import shutil
+
+import pandas as pd
+
+from schema import DATASET_DTYPES, TRADE_DTYPES, apply_schema
+from trade_utils import parse_price
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    # pyarrow가 없으면 기존처럼 CSV로만 저장/로드
+    PARQUET_AVAILABLE = False
+
+# 단계별 데이터셋 : 기존 CSV 경로, Parquet 폴더 경로, 파티션 컬럼
+DATASETS = {
+    'total_apt_trade_data': {
+        'csv_path': 'DATA/org_crawling_data/total_apt_trade_data.csv',
+        'parquet_path': 'DATA/parquet/total_apt_trade_data',
+        'partition_cols': ['지역', '년'],
+    },
+    'first_preprocessed_data_org': {
+        'csv_path': 'DATA/preprocessed_data/first_preprocessed_data_org.csv',
+        'parquet_path': 'DATA/parquet/first_preprocessed_data_org',
+        'partition_cols': ['지역'],
+    },
+    'final_preprocessed_data': {
+        'csv_path': 'DATA/preprocessed_data/final_preprocessed_data.csv',
+        'parquet_path': 'DATA/parquet/final_preprocessed_data',
+        'partition_cols': [],
+    },
+    'encoding_stats': {
+        'csv_path': 'DATA/preprocessed_data/encoding_stats.csv',
+        'parquet_path': 'DATA/parquet/encoding_stats',
+        'partition_cols': [],
+    },
+    'address_index': {
+        'csv_path': 'DATA/lat_lon_data/address_index.csv',
+        'parquet_path': 'DATA/parquet/address_index',
+        'partition_cols': [],
+    },
+    'price_index': {
+        'csv_path': 'DATA/price_index/price_index.csv',
+        'parquet_path': 'DATA/parquet/price_index',
+        'partition_cols': ['단위'],
+    },
+    'price_index_sources': {
+        'csv_path': 'DATA/price_index/price_index_sources.csv',
+        'parquet_path': 'DATA/parquet/price_index_sources',
+        'partition_cols': [],
+    },
+    'repeat_sales_index': {
+        'csv_path': 'DATA/price_index/repeat_sales_index.csv',
+        'parquet_path': 'DATA/parquet/repeat_sales_index',
+        'partition_cols': [],
+    },
+    'spatial_index': {
+        'csv_path': 'DATA/lat_lon_data/spatial_index.csv',
+        'parquet_path': 'DATA/parquet/spatial_index',
+        'partition_cols': [],
+    },
+    'comparable_sales': {
+        'csv_path': 'DATA/lat_lon_data/comparable_sales.csv',
+        'parquet_path': 'DATA/parquet/comparable_sales',
+        'partition_cols': [],
+    },
+    'location_addresses': {
+        'csv_path': 'DATA/lat_lon_data/location_addresses.csv',
+        'parquet_path': 'DATA/parquet/location_addresses',
+        'partition_cols': [],
+    },
+    'location_pairs': {
+        'csv_path': 'DATA/lat_lon_data/location_pairs.csv',
+        'parquet_path': 'DATA/parquet/location_pairs',
+        'partition_cols': [],
+    },
+    'location_feature_keys': {
+        'csv_path': 'DATA/lat_lon_data/location_feature_keys.csv',
+        'parquet_path': 'DATA/parquet/location_feature_keys',
+        'partition_cols': [],
+    },
+}
+
+# 원본 수집 데이터 중 숫자로 저장할 컬럼 (거래금액은 쉼표 제거 후 만원 단위 정수)
+NUMERIC_TRADE_COLUMNS = ['전용면적', '건축년도', '층', '년', '월', '일', '도로명건물본번호코드', '도로명건물부번호코드',
+                         '법정동본번코드', '법정동부번코드', '법정동시군구코드', '법정동읍면동코드', '법정동지번코드']
+# 문자열로 저장할 컬럼 (여러 실행의 CSV를 합치면 숫자/문자가 섞일 수 있음)
+TEXT_TRADE_COLUMNS = ['아파트', '법정동', '지번', '도로명', '지역']
+
+SCHEMA_FILENAME = '_schema.json'
+ROW_GROUP_SIZE = 1_000_000
+
+# CSV로 읽을 때 pyarrow filters 형식을 그대로 적용하기 위한 연산자
+FILTER_OPERATORS = {'=': operator.eq, '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+                    '>': operator.gt, '>=': operator.ge}
+
+
+def clean_trade_columns(df):
+    # 수집 원본의 문자열 컬럼을 타입에 맞게 한 번만 정리 (이후 단계에서는 다시 정리하지 않음)
+    df = df.copy()
+    if '거래금액' in df.columns:
+        df['거래금액'] = parse_price(df['거래금액'])
+    for column in NUMERIC_TRADE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    for column in TEXT_TRADE_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    # 반복이 많은 문자열은 category, 숫자는 작은 타입으로 변환 (schema.py)
+    return apply_schema(df, TRADE_DTYPES)
+
+
+def clean_columns(df, name):
+    # CSV로 읽은 데이터셋을 Parquet로 저장했을 때와 같은 타입으로 정리
+    if name == 'total_apt_trade_data':
+        return clean_trade_columns(df)
+    if name in DATASET_DTYPES:
+        return apply_schema(df, DATASET_DTYPES[name])
+    return df
+
+
+def save_dataset(df, name, export_csv=False):
+    # Parquet(zstd 압축, 파티션 분할)으로 저장, export_csv=True면 기존 CSV 경로에도 저장
+    return save_dataset_chunks([df], name, export_csv=export_csv)
+
+
+def save_dataset_chunks(chunks, name, export_csv=False):
+    # 데이터프레임 청크를 차례로 받아 save_dataset과 같은 형식으로 저장 (전체 데이터를 메모리에 모으지 않음)
+    dataset = DATASETS[name]
+    write_csv = export_csv or not PARQUET_AVAILABLE
+    if write_csv:
+        os.makedirs(os.path.dirname(dataset['csv_path']), exist_ok=True)
+    parquet_path = dataset['parquet_path']
+    if PARQUET_AVAILABLE:
+        # 이전 파티션 파일이 남지 않도록 폴더를 비우고 다시 저장
+        if os.path.exists(parquet_path):
+            shutil.rmtree(parquet_path)
+        os.makedirs(parquet_path)
+
+    columns = dtypes = arrow_schema = None
+    for chunk_index, df in enumerate(chunks):
+        if write_csv:
+            df.to_csv(dataset['csv_path'], index=False, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0)
+        if columns is None:
+            columns = list(df.columns)
+            dtypes = {column: str(dtype) for column, dtype in df.dtypes.items()}
+        if not PARQUET_AVAILABLE or df.empty:
+            continue
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # 청크마다 타입이 달라지지 않도록 첫 청크의 스키마로 맞춤
+        arrow_schema = arrow_schema or table.schema
+        # 행 그룹이 잘게 쪼개지면 읽기가 느려지므로 파티션마다 하나의 큰 행 그룹으로 저장
+        pq.write_to_dataset(table.cast(arrow_schema), parquet_path,
+                            partition_cols=dataset['partition_cols'] or None,
+                            basename_template=f"part-{chunk_index}-{{i}}.parquet", compression='zstd',
+                            min_rows_per_group=ROW_GROUP_SIZE, max_rows_per_group=ROW_GROUP_SIZE)
+        # write_to_dataset이 남긴 순환 참조를 메인 스레드에서 정리
+        # (pyarrow 작업 스레드에서 GC가 일어나면 종료 시 'terminate called without an active exception'으로 중단됨)
+        gc.collect()
+    if not PARQUET_AVAILABLE:
+        return dataset['csv_path']
+
+    # 파티션 컬럼은 읽을 때 category로 바뀌고 맨 뒤로 가므로 원래 순서와 타입을 따로 기록
+    with open(os.path.join(parquet_path, SCHEMA_FILENAME), 'w', encoding='utf-8') as schema_file:
+        json.dump({'columns': columns, 'dtypes': dtypes}, schema_file, ensure_ascii=False)
+    return parquet_path
+
+
+def read_schema(parquet_path):
+    with open(os.path.join(parquet_path, SCHEMA_FILENAME), encoding='utf-8') as schema_file:
+        return json.load(schema_file)
+
+
+def dataset_exists(name):
+    dataset = DATASETS[name]
+    return os.path.exists(os.path.join(dataset['parquet_path'], SCHEMA_FILENAME)) or os.path.exists(dataset['csv_path'])
+
+
+def dataset_columns(name):
+    # 저장된 데이터셋의 열 이름 (데이터는 읽지 않음)
+    dataset = DATASETS[name]
+    if PARQUET_AVAILABLE and os.path.exists(os.path.join(dataset['parquet_path'], SCHEMA_FILENAME)):
+        return read_schema(dataset['parquet_path'])['columns']
+    return list(pd.read_csv(dataset['csv_path'], nrows=0).columns)
+
+
+def load_dataset(name, columns=None, filters=None):
+    # 필요한 컬럼만 읽음, filters는 pyarrow 형식 (예: [('지역', '=', '성남 분당')])
+    dataset = DATASETS[name]
+    parquet_path = dataset['parquet_path']
+    if not PARQUET_AVAILABLE or not os.path.exists(os.path.join(parquet_path, SCHEMA_FILENAME)):
+        # Parquet가 아직 없으면 기존 CSV를 읽어 같은 형태로 정리
+        filter_columns = [column for column, _, _ in filters or []]
+        usecols = list(dict.fromkeys(columns + filter_columns)) if columns else None
+        df = pd.read_csv(dataset['csv_path'], usecols=usecols)
+        df = clean_columns(df, name)
+        for column, op, value in filters or []:
+            df = df[df[column].isin(value) if op == 'in' else FILTER_OPERATORS[op](df[column], value)]
+        return df[columns].reset_index(drop=True) if columns else df.reset_index(drop=True)
+
+    schema = read_schema(parquet_path)
+    if not any(file_name.endswith('.parquet') for _, _, file_names in os.walk(parquet_path) for file_name in file_names):
+        # 빈 데이터프레임을 저장한 경우 (Parquet 파일 없이 스키마만 있음)
+        return pd.DataFrame({column: pd.Series(dtype=schema['dtypes'][column]) for column in columns or schema['columns']})
+    table = pq.read_table(parquet_path, columns=columns, filters=filters)
+    df = table.to_pandas()
+    for column in dataset['partition_cols']:
+        if column in df.columns:
+            df[column] = df[column].astype(schema['dtypes'][column])
+    return df[columns or schema['columns']]
+
+
+def iter_dataset(name, columns=None, chunk_size=ROW_GROUP_SIZE):
+    # 데이터셋을 최대 chunk_size 행씩 나눠 읽음 (메모리보다 큰 데이터 처리용)
+    dataset = DATASETS[name]
+    parquet_path = dataset['parquet_path']
+    if not PARQUET_AVAILABLE or not os.path.exists(os.path.join(parquet_path, SCHEMA_FILENAME)):
+        for df in pd.read_csv(dataset['csv_path'], usecols=columns, chunksize=chunk_size):
+            df = clean_columns(df, name)
+            yield df[columns] if columns else df
+        return
+
+    schema = read_schema(parquet_path)
+    parquet_dataset = ds.dataset(parquet_path, format='parquet', partitioning='hive')
+    for batch in parquet_dataset.to_batches(columns=columns or schema['columns'], batch_size=chunk_size):
+        if batch.num_rows == 0:
+            continue
+        df = batch.to_pandas()
+        for column in dataset['partition_cols']:
+            if column in df.columns:
+                df[column] = df[column].astype(schema['dtypes'][column])
+        yield df
@@ -0,0 +1,151 @@
+import numpy as np
+
+# 전체 정렬 없이 계산하는 통계 (상/하위 k개, 고정 구간 히스토그램, 근사 분위수)
+# 모두 청크 단위로 update를 호출할 수 있어 전체 데이터를 한 번에 메모리에 올리지 않아도 됨
+
+
+def smallest_k(values, k):
+    # 하위 k개를 오름차순으로 반환 (np.partition으로 O(n) 선택 후 k개만 정렬)
+    values = np.asarray(values)
+    if k >= len(values):
+        return np.sort(values)
+    return np.sort(np.partition(values, k - 1)[:k])
+
+
+def largest_k(values, k):
+    # 상위 k개를 오름차순으로 반환
+    values = np.asarray(values)
+    if k >= len(values):
+        return np.sort(values)
+    return np.sort(np.partition(values, len(values) - k)[-k:])
+
+
+class TopK:
+    # 청크마다 (지금까지의 k개 + 새 청크)에서 다시 k개만 남김
+    def __init__(self, k, largest=True):
+        self.k = k
+        self.largest = largest
+        self.values = None
+
+    def update(self, values):
+        values = np.asarray(values)
+        candidates = values if self.values is None else np.concatenate([self.values, values])
+        self.values = largest_k(candidates, self.k) if self.largest else smallest_k(candidates, self.k)
+        return self
+
+    def result(self):
+        return self.values
+
+
+class StreamingHistogram:
+    # 구간 경계를 먼저 정하고 청크마다 구간별 개수를 더함 (np.histogram(values, bins=edges)와 같은 결과)
+    def __init__(self, edges):
+        self.edges = np.asarray(edges)
+        self.counts = np.zeros(len(self.edges) - 1, dtype='int64')
+
+    @classmethod
+    def from_range(cls, minimum, maximum, bins, dtype='float64'):
+        # np.histogram(values, bins=bins)와 같은 경계 (최솟값~최댓값을 bins개로 균등 분할, 경계 타입은 데이터 타입을 따름)
+        return cls(np.histogram_bin_edges(np.array([minimum, maximum], dtype=dtype), bins=bins))
+
+    def update(self, values):
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        return self
+
+
+class KLLSketch:
+    # KLL 분위수 스케치 : 레벨마다 정해진 크기를 넘으면 정렬 후 하나 걸러 하나만 다음 레벨로 올림 (가중치 2배)
+    # 메모리는 k에 비례하고, 분위수의 순위 오차는 대략 1/k 수준
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.compactors = [np.empty(0)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def capacity(self, level):
+        # 위 레벨일수록 크게, 아래 레벨일수록 작게 (2/3배씩)
+        depth = len(self.compactors) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self.compress()
+        return self
+
+    def merge(self, other):
+        # 다른 청크/프로세스에서 만든 스케치 합치기
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+        return self
+
+    def compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(items)
+                # 홀수 개면 하나는 현재 레벨에 남김
+                keep = items[:1] if len(items) % 2 else items[:0]
+                items = items[len(keep):]
+                promoted = items[self.rng.integers(2)::2]
+                self.compactors[level] = keep
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        # q : 0~1 사이 값 또는 배열
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype='float64')
+                                  for level, level_items in enumerate(self.compactors)])
+        order = np.argsort(items)
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(q, dtype='float64') * cumulative[-1]
+        result = items[np.minimum(np.searchsorted(cumulative, ranks), len(items) - 1)]
+        # 양 끝은 정확한 최솟값/최댓값 사용
+        result = np.where(np.asarray(q) <= 0, self.min, np.where(np.asarray(q) >= 1, self.max, result))
+        return result if np.ndim(q) else float(result)
+
+
+def summarize_chunks(load_chunks, column, bins=10, top_n=None, quantiles=(0.25, 0.5, 0.75), sketch_k=800):
+    # 청크 입력 요약 : 1차 패스에서 최솟값/최댓값, 상/하위 top_n개, 분위수 스케치, 2차 패스에서 히스토그램
+    # load_chunks : 호출할 때마다 데이터를 처음부터 청크 단위로 읽는 함수
+    sketch = KLLSketch(sketch_k)
+    top = TopK(top_n, largest=True) if top_n else None
+    bottom = TopK(top_n, largest=False) if top_n else None
+    dtype = None
+    for chunk in load_chunks():
+        values = chunk[column].to_numpy()
+        dtype = dtype or values.dtype
+        sketch.update(values)
+        if top_n:
+            top.update(values)
+            bottom.update(values)
+
+    histogram = StreamingHistogram.from_range(sketch.min, sketch.max, bins, dtype=dtype)
+    for chunk in load_chunks():
+        histogram.update(chunk[column].to_numpy())
+
+    return {
+        'count': sketch.count, 'min': sketch.min, 'max': sketch.max,
+        'bin_counts': histogram.counts, 'bin_edges': histogram.edges,
+        'top': top.result() if top_n else None, 'bottom': bottom.result() if top_n else None,
+        'quantiles': dict(zip(quantiles, np.atleast_1d(sketch.quantile(list(quantiles))))),
+    }
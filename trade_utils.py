@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+# 거래 데이터 컬럼 변환 함수 (행마다 파이썬 함수를 호출하지 않고 배열 단위로 처리)
+# 수백만 행이어도 고유값(주소, 금액 문자열)은 수만 개 수준이므로 고유값만 변환한 뒤 코드로 펼침
+
+
+def parse_price(series):
+    # '12,500' 형태의 거래금액 문자열을 정수(만원)로 변환, 이미 숫자면 그대로 사용
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('int64') if not series.isna().any() else series.astype('float64')
+    codes, uniques = pd.factorize(series)
+    values = pd.Series(uniques).astype(str).str.replace(',', '').str.strip().astype('int64').to_numpy()
+    if (codes < 0).any():
+        # 결측값이 있으면 NaN을 표현할 수 있도록 실수형으로 반환
+        values = np.append(values.astype('float64'), np.nan)
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def build_road_address(road_name, main_code, sub_code):
+    # '도로명 본번' 또는 '도로명 본번-부번' 형태의 도로명주소 생성 (본번/부번 결측값은 0으로 처리)
+    main_code = main_code.fillna(0).astype('int64').to_numpy()
+    sub_code = sub_code.fillna(0).astype('int64').to_numpy()
+    road_codes, road_names = pd.factorize(road_name, use_na_sentinel=False)
+
+    # (도로명, 본번, 부번)을 정수 하나로 묶어 고유한 주소만 문자열로 만듦
+    key = (road_codes.astype('int64') * 100000 + main_code) * 100000 + sub_code
+    codes, unique_keys = pd.factorize(key)
+    unique_sub = unique_keys % 100000
+    unique_main = (unique_keys // 100000) % 100000
+    unique_roads = pd.Series(np.asarray(road_names, dtype=object)[unique_keys // 10000000000]).astype(str)
+
+    addresses = unique_roads + ' ' + pd.Series(unique_main).astype(str)
+    has_sub = unique_sub != 0
+    addresses[has_sub] = addresses[has_sub] + '-' + pd.Series(unique_sub[has_sub]).astype(str).to_numpy()
+    return pd.Series(addresses.to_numpy()[codes], index=road_name.index, name='도로명주소')
+
+
+def build_ymd_key(year, month, day):
+    # 년, 월, 일을 20230101 형태의 정수 키로 변환
+    return pd.Series(year.to_numpy(dtype='int64') * 10000 + month.to_numpy(dtype='int64') * 100
+                     + day.to_numpy(dtype='int64'), index=year.index, name='년월일').astype('int32')